@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime
+from datetime import date, datetime
 
 from app.api.deps import get_db, get_current_user, get_current_admin
 from app.schemas.logistics_schema import CargoRequestCreate, CargoRequestOut, StationOut, RouteOut, StationCreate, VehicleCapacityUpdate
 from app.services.logistics_service import LogisticsService
 from app.db.models.user_model import User
+from app.db.session import SessionLocal
 
 router = APIRouter(prefix="/logistics", tags=["Logistics"])
 service = LogisticsService()
@@ -37,13 +38,24 @@ def delete_station(
 
     return service.delete_station(db, station_id)
 
+def replan_day(target_date: date):
+    # Runs after the response, so it gets its own session
+    db = SessionLocal()
+    try:
+        service.replan_day(db, target_date)
+    finally:
+        db.close()
+
 @router.post("/cargo", response_model=CargoRequestOut)
 def create_cargo(
     data: CargoRequestCreate, 
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return service.create_cargo_request(db, current_user.id, data)
+    return service.create_cargo_request(
+        db, current_user.id, data, lambda d: background_tasks.add_task(replan_day, d)
+    )
 
 @router.get("/cargo/me", response_model=List[CargoRequestOut])
 def get_my_cargo(
@@ -65,6 +77,10 @@ def optimize_routes(
     rental_cost: float = 200.0,
     rental_capacity: float = 500.0,  
     optimization_mode: str = "max_count",  
+    algorithm: str = "greedy",
+    time_limit_ms: int = 1000,
+    construction: str = "clusters",
+    warm_start: str = "none",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
@@ -74,7 +90,8 @@ def optimize_routes(
     except ValueError:
         raise HTTPException(status_code=400, detail="Geçersiz tarih formatı. YYYY-MM-DD kullanın.")
     
-    return service.solve_vrp(db, date_obj, scenario, cost_per_km, rental_cost, rental_capacity, optimization_mode)
+    return service.solve_vrp(db, date_obj, scenario, cost_per_km, rental_cost, rental_capacity, optimization_mode,
+                             algorithm, time_limit_ms, construction, warm_start)
 
 @router.get("/admin/routes")
 def get_all_routes(
@@ -12,6 +12,23 @@ class Settings:
     JWT_ALGORITHM: str
     DATABASE_URL: str
 
+    ROUTING_PROVIDER: str = "osrm"
+    OSRM_BASE_URL: str = "https://router.project-osrm.org"
+    OSRM_MAX_TABLE_SIZE: int = 100
+    OSRM_MAX_WORKERS: int = 4
+
+    # Solver worker processes; 1 solves serially. The pool is started once
+    # per process and only used for days of at least parallel_min_stations.
+    SOLVER_MAX_WORKERS: int = 1
+    SOLVER_PARALLEL_MIN_STATIONS: int = 200
+    SOLVER_KNAPSACK_TIME_MS: int = 500
+    SOLVER_EXACT_TSP_MAX_STOPS: int = 12
+    SOLVER_REGION_MIN_STATIONS: int = 500
+    SOLVER_REGION_SIZE: int = 120
+    SOLVER_REGION_REPAIR_MS: int = 200
+    SOLVER_TWO_OPT_ENGINE: str = "auto"
+    SOLVER_BATCH_TWO_OPT_MAX_STOPS: int = 100
+
     def __init__(self):
         # Load config.json
         if os.path.exists(CONFIG_PATH):
@@ -30,6 +47,23 @@ class Settings:
             
             self.JWT_SECRET = config_data.get("jwt_secret", "supersecret")
             self.JWT_ALGORITHM = config_data.get("jwt_algorithm", "HS256")
+
+            routing_config = config_data.get("routing", {})
+            self.ROUTING_PROVIDER = routing_config.get("provider", self.ROUTING_PROVIDER)
+            self.OSRM_BASE_URL = routing_config.get("osrm_base_url", self.OSRM_BASE_URL).rstrip("/")
+            self.OSRM_MAX_TABLE_SIZE = routing_config.get("osrm_max_table_size", self.OSRM_MAX_TABLE_SIZE)
+            self.OSRM_MAX_WORKERS = routing_config.get("osrm_max_workers", self.OSRM_MAX_WORKERS)
+
+            solver_config = config_data.get("solver", {})
+            self.SOLVER_MAX_WORKERS = solver_config.get("max_workers", self.SOLVER_MAX_WORKERS)
+            self.SOLVER_PARALLEL_MIN_STATIONS = solver_config.get("parallel_min_stations", self.SOLVER_PARALLEL_MIN_STATIONS)
+            self.SOLVER_KNAPSACK_TIME_MS = solver_config.get("knapsack_time_ms", self.SOLVER_KNAPSACK_TIME_MS)
+            self.SOLVER_EXACT_TSP_MAX_STOPS = solver_config.get("exact_tsp_max_stops", self.SOLVER_EXACT_TSP_MAX_STOPS)
+            self.SOLVER_REGION_MIN_STATIONS = solver_config.get("region_min_stations", self.SOLVER_REGION_MIN_STATIONS)
+            self.SOLVER_REGION_SIZE = solver_config.get("region_size", self.SOLVER_REGION_SIZE)
+            self.SOLVER_REGION_REPAIR_MS = solver_config.get("region_repair_ms", self.SOLVER_REGION_REPAIR_MS)
+            self.SOLVER_TWO_OPT_ENGINE = solver_config.get("two_opt_engine", self.SOLVER_TWO_OPT_ENGINE)
+            self.SOLVER_BATCH_TWO_OPT_MAX_STOPS = solver_config.get("batch_two_opt_max_stops", self.SOLVER_BATCH_TWO_OPT_MAX_STOPS)
         else:
             # Fallback
             self.DATABASE_URL = "sqlite:///./yazlab3.db"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
@@ -57,3 +57,19 @@ class Route(Base):
     
     vehicle = relationship("Vehicle", back_populates="routes")
 
+class DistanceCache(Base):
+    __tablename__ = "distance_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    from_station_id = Column(Integer, ForeignKey("stations.id"), nullable=False)
+    to_station_id = Column(Integer, ForeignKey("stations.id"), nullable=False)
+
+    # "osrm" etc. and a hash of the full station set (ids + coordinates) the row was built for
+    provider = Column(String(20), nullable=False)
+    coords_hash = Column(String(64), nullable=False)
+
+    distance_km = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_distance_cache_lookup", "provider", "coords_hash"),
+    )
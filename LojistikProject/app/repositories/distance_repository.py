@@ -0,0 +1,33 @@
+from typing import Dict, Tuple
+from sqlalchemy.orm import Session
+from app.db.models.logistics_model import DistanceCache
+
+class DistanceCacheRepository:
+
+    def get_matrix(self, db: Session, provider: str, coords_hash: str) -> Dict[Tuple[int, int], float]:
+        rows = db.query(
+            DistanceCache.from_station_id,
+            DistanceCache.to_station_id,
+            DistanceCache.distance_km
+        ).filter(
+            DistanceCache.provider == provider,
+            DistanceCache.coords_hash == coords_hash
+        ).all()
+        return {(r[0], r[1]): r[2] for r in rows}
+
+    def save_matrix(self, db: Session, provider: str, coords_hash: str, matrix: Dict[Tuple[int, int], float]):
+        db.query(DistanceCache).filter(DistanceCache.provider == provider).delete()
+        db.bulk_insert_mappings(DistanceCache, [
+            {
+                "from_station_id": from_id,
+                "to_station_id": to_id,
+                "provider": provider,
+                "coords_hash": coords_hash,
+                "distance_km": dist
+            }
+            for (from_id, to_id), dist in matrix.items()
+        ])
+        db.commit()
+
+    def invalidate(self, db: Session):
+        db.query(DistanceCache).delete()
@@ -3,12 +3,19 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, text
 from app.db.models.logistics_model import Station, Vehicle, CargoRequest, Route
 from app.schemas.logistics_schema import CargoRequestCreate, StationCreate
+from app.repositories.distance_repository import DistanceCacheRepository
+from app.services.routing_provider import get_routing_provider
+from app.core.config import settings
+from app.solver.knapsack import cargo_values, multi_knapsack
+from app.solver.matrix import DistanceMatrix, haversine_km
+from app.solver.problem import Demand, FleetVehicle, Location, PlannedRoute, VRPProblem, VRPSolution
+from app.solver.vrp import ALGORITHMS, CONSTRUCTIONS, VRPSolver
 from fastapi import HTTPException
-from datetime import date, datetime
-from typing import List, Dict, Optional
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Dict, Optional
+import hashlib
 import json
-import math
-import requests
+import numpy as np
 
 DISTRICTS = [
     {"name": "Başiskele", "lat": 40.7140, "lon": 29.9268},
@@ -31,18 +38,38 @@ DEPOT_COORDS = {"lat": 40.8241, "lon": 29.9259}
 
 DEFAULT_VEHICLE_CAPACITY = 500.0  
 DEFAULT_COST_PER_KM = 1.0  
+WARM_STARTS = ("none", "same_date", "last_week")
+
+distance_repo = DistanceCacheRepository()
+routing_provider = get_routing_provider()
+vrp_solver = VRPSolver(
+    max_workers=settings.SOLVER_MAX_WORKERS,
+    parallel_min_stations=settings.SOLVER_PARALLEL_MIN_STATIONS,
+    knapsack_time_ms=settings.SOLVER_KNAPSACK_TIME_MS,
+    exact_max_stops=settings.SOLVER_EXACT_TSP_MAX_STOPS,
+    region_min_stations=settings.SOLVER_REGION_MIN_STATIONS,
+    region_size=settings.SOLVER_REGION_SIZE,
+    region_repair_ms=settings.SOLVER_REGION_REPAIR_MS,
+    two_opt_engine=settings.SOLVER_TWO_OPT_ENGINE,
+    batch_two_opt_max_stops=settings.SOLVER_BATCH_TWO_OPT_MAX_STOPS
+)
+
+# (provider, coords_hash) -> {(from_id, to_id): km}; filled from the distance_cache table on first use
+_distance_memo: Dict = {}
 
 
 class LogisticsService:
     
     def seed_data(self, db: Session):
         db.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        db.execute(text("TRUNCATE TABLE distance_cache"))
         db.execute(text("TRUNCATE TABLE routes"))
         db.execute(text("TRUNCATE TABLE cargo_requests"))
         db.execute(text("TRUNCATE TABLE stations"))
         db.execute(text("TRUNCATE TABLE vehicles"))
         db.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
         db.commit()
+        _distance_memo.clear()
         
         for d in DISTRICTS:
             station = Station(name=d["name"], latitude=d["lat"], longitude=d["lon"])
@@ -57,7 +84,8 @@ class LogisticsService:
         db.add_all(vehicles)
         db.commit()
 
-    def create_cargo_request(self, db: Session, user_id: int, data: CargoRequestCreate):
+    def create_cargo_request(self, db: Session, user_id: int, data: CargoRequestCreate,
+                             schedule_replan: Optional[Callable[[date], None]] = None):
         req = CargoRequest(
             user_id=user_id,
             station_id=data.station_id,
@@ -68,6 +96,13 @@ class LogisticsService:
         db.add(req)
         db.commit()
         db.refresh(req)
+        
+        # The day is already planned: fit the request into its routes, or
+        # leave the full replan to the caller so it runs outside the request
+        if db.query(Route).filter(Route.route_date == req.request_date.date()).first():
+            result = self.insert_late_cargo(db, req)
+            if result["status"] == "needs_replan" and schedule_replan is not None:
+                schedule_replan(req.request_date.date())
         return req
 
     def create_station(self, db: Session, data: StationCreate):
@@ -78,7 +113,9 @@ class LogisticsService:
                 longitude=data.longitude
             )
             db.add(station)
+            distance_repo.invalidate(db)
             db.commit()
+            _distance_memo.clear()
             db.refresh(station)
             return station
         except IntegrityError:
@@ -96,8 +133,10 @@ class LogisticsService:
             raise HTTPException(status_code=400, detail=f"Bu istasyona ait {cargo_count} kargo talebi var. Silinemez.")
             
         try:
+            distance_repo.invalidate(db)
             db.delete(station)
             db.commit()
+            _distance_memo.clear()
             return {"status": "success", "message": "İstasyon silindi."}
         except IntegrityError:
             db.rollback()
@@ -316,7 +355,7 @@ class LogisticsService:
         if not stations:
             return {"stations": [], "matrix": []}
         
-        matrix_dict = self.build_distance_matrix_osrm(stations)
+        matrix_dict = self.get_cached_distance_matrix(db)
         
         station_names = [s.name for s in stations]
         station_ids = [s.id for s in stations]
@@ -339,70 +378,87 @@ class LogisticsService:
         }
 
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        try:
-            url = f"https://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=false"
-            response = requests.get(url, timeout=5)
-            data = response.json()
-            
-            if data.get("code") == "Ok" and data.get("routes"):
-                distance_km = data["routes"][0]["distance"] / 1000
-                return distance_km
-            else:
-                return self._haversine_distance(lat1, lon1, lat2, lon2)
-        except Exception as e:
-            print(f"OSRM error, using Haversine: {e}")
+        distance_km = routing_provider.route_distance((lat1, lon1), (lat2, lon2))
+        if distance_km is None:
             return self._haversine_distance(lat1, lon1, lat2, lon2)
+        return distance_km
     
-    def build_distance_matrix_osrm(self, stations: List[Station]) -> Dict:
+    def get_cached_distance_matrix(self, db: Session) -> DistanceMatrix:
+        stations = db.query(Station).order_by(Station.id).all()
         if not stations:
-            return {}
+            return DistanceMatrix([], np.zeros((0, 0)))
         
-        coords = ";".join([f"{s.longitude},{s.latitude}" for s in stations])
-        url = f"https://router.project-osrm.org/table/v1/driving/{coords}?annotations=distance"
+        provider = routing_provider.name
+        coords_hash = self._coords_hash(stations, routing_provider.fingerprint)
+        key = (provider, coords_hash)
         
-        try:
-            response = requests.get(url, timeout=30)
-            data = response.json()
-            
-            if data.get("code") == "Ok" and data.get("distances"):
-                distances = data["distances"]
-                matrix = {}
-                for i, from_station in enumerate(stations):
-                    for j, to_station in enumerate(stations):
-                        if i != j:
-                            dist_km = distances[i][j] / 1000
-                            matrix[(from_station.id, to_station.id)] = dist_km
-                print(f"OSRM Table API: Built {len(matrix)} distance pairs")
+        matrix = _distance_memo.get(key)
+        if matrix is not None:
+            return matrix
+        
+        station_ids = [s.id for s in stations]
+        coords = [(s.latitude, s.longitude) for s in stations]
+        
+        if routing_provider.cacheable:
+            expected_pairs = len(stations) * (len(stations) - 1)
+            pairs = distance_repo.get_matrix(db, provider, coords_hash)
+            if len(pairs) == expected_pairs:
+                print(f"Distance cache: Loaded {len(pairs)} distance pairs")
+                matrix = DistanceMatrix.from_pairs(station_ids, coords, pairs)
+                _distance_memo[key] = matrix
                 return matrix
-            else:
-                print(f"OSRM Table API failed: {data.get('code')}")
-                return self._build_haversine_matrix(stations)
-        except Exception as e:
-            print(f"OSRM Table API error: {e}")
+        
+        matrix = self._fetch_distance_table(stations)
+        if matrix is None:
             return self._build_haversine_matrix(stations)
+        
+        if routing_provider.cacheable:
+            distance_repo.save_matrix(db, provider, coords_hash, matrix)
+        _distance_memo[key] = matrix
+        return matrix
     
-    def _build_haversine_matrix(self, stations: List[Station]) -> Dict:
-        matrix = {}
-        for from_s in stations:
-            for to_s in stations:
-                if from_s.id != to_s.id:
-                    dist = self._haversine_distance(
-                        from_s.latitude, from_s.longitude,
-                        to_s.latitude, to_s.longitude
-                    )
-                    matrix[(from_s.id, to_s.id)] = dist
+    def _build_solver_matrix(self, db: Session, cargo_data: Dict, depot: Station) -> DistanceMatrix:
+        stations = [cargo_data[sid]["station"] for sid in cargo_data.keys()]
+        stations.append(depot)
+        return DistanceMatrix.from_pairs(
+            [s.id for s in stations],
+            [(s.latitude, s.longitude) for s in stations],
+            self.get_cached_distance_matrix(db)
+        )
+    
+    def _coords_hash(self, stations: List[Station], salt: str = "") -> str:
+        payload = salt + "|" + ";".join(
+            f"{s.id}:{s.latitude:.6f},{s.longitude:.6f}"
+            for s in sorted(stations, key=lambda s: s.id)
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
+    def build_distance_matrix_osrm(self, stations: List[Station]) -> DistanceMatrix:
+        matrix = self._fetch_distance_table(stations)
+        if matrix is None:
+            return self._build_haversine_matrix(stations)
+        return matrix
+    
+    def _fetch_distance_table(self, stations: List[Station]) -> Optional[DistanceMatrix]:
+        values = routing_provider.table([(s.latitude, s.longitude) for s in stations])
+        if values is None:
+            return None
+        return DistanceMatrix.from_pairs(
+            [s.id for s in stations],
+            [(s.latitude, s.longitude) for s in stations],
+            DistanceMatrix([s.id for s in stations], values)
+        )
+    
+    def _build_haversine_matrix(self, stations: List[Station]) -> DistanceMatrix:
+        matrix = DistanceMatrix.from_coordinates(
+            [s.id for s in stations],
+            [(s.latitude, s.longitude) for s in stations]
+        )
         print(f"Haversine fallback: Built {len(matrix)} distance pairs")
         return matrix
     
     def _haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        R = 6371  # km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = math.sin(dlat/2) * math.sin(dlat/2) + \
-            math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
-            math.sin(dlon/2) * math.sin(dlon/2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
+        return haversine_km(lat1, lon1, lat2, lon2)
     
     def get_cargo_by_date(self, db: Session, target_date: date) -> List[CargoRequest]:
         return db.query(CargoRequest).filter(
@@ -430,7 +486,20 @@ class LogisticsService:
     
     def solve_vrp(self, db: Session, target_date: date, scenario_type: str = "unlimited",
                   cost_per_km: float = 1.0, rental_cost: float = 200.0, rental_capacity: float = 500.0,
-                  optimization_mode: str = "max_count") -> Dict:
+                  optimization_mode: str = "max_count", algorithm: str = "greedy",
+                  time_limit_ms: int = 1000, construction: str = "clusters", warm_start: str = "none") -> Dict:
+        
+        if algorithm not in ALGORITHMS:
+            raise HTTPException(status_code=400, detail=f"Geçersiz algoritma. Seçenekler: {', '.join(ALGORITHMS)}")
+        if construction not in CONSTRUCTIONS:
+            raise HTTPException(status_code=400, detail=f"Geçersiz başlangıç yöntemi. Seçenekler: {', '.join(CONSTRUCTIONS)}")
+        if time_limit_ms <= 0:
+            raise HTTPException(status_code=400, detail="time_limit_ms pozitif olmalıdır.")
+        if warm_start not in WARM_STARTS:
+            raise HTTPException(status_code=400, detail=f"Geçersiz sıcak başlangıç. Seçenekler: {', '.join(WARM_STARTS)}")
+        
+        # Read before this date's routes are deleted below
+        initial_routes = self._stored_initial_routes(db, target_date, warm_start)
         
         db.query(Route).filter(Route.route_date == target_date).delete()
         db.commit()
@@ -474,14 +543,44 @@ class LogisticsService:
         total_cargo_before = sum(c["total_count"] for c in cargo_data.values())
         total_weight_before = sum(c["total_weight"] for c in cargo_data.values())
         
-        if scenario_type == "unlimited":
-            routes = self.solve_unlimited(db, cargo_data, depot, target_date, cost_per_km, rental_cost, rental_capacity)
-            rejected_count = 0
-            rejected_weight = 0
-        else:
-            routes, rejected_count, rejected_weight = self.solve_limited(
-                db, cargo_data, depot, target_date, cost_per_km, optimization_mode
-            )
+        existing_vehicles = db.query(Vehicle).filter(Vehicle.is_rented == False).order_by(Vehicle.capacity.desc()).all()
+        problem = VRPProblem(
+            depot=self._to_location(depot),
+            demands=self._to_demands(cargo_data),
+            vehicles=[FleetVehicle(v.id, v.name, v.capacity) for v in existing_vehicles],
+            matrix=self._build_solver_matrix(db, cargo_data, depot),
+            scenario_type=scenario_type,
+            cost_per_km=cost_per_km,
+            rental_cost=rental_cost,
+            rental_capacity=rental_capacity,
+            optimization_mode=optimization_mode,
+            algorithm=algorithm,
+            time_limit_ms=time_limit_ms,
+            construction=construction,
+            initial_routes=initial_routes
+        )
+        
+        # Kept with every route so late requests are priced, and the day
+        # replanned, with the settings it was planned with
+        plan = {
+            "scenario_type": scenario_type,
+            "cost_per_km": cost_per_km,
+            "rental_cost": rental_cost,
+            "rental_capacity": rental_capacity,
+            "optimization_mode": optimization_mode,
+            "algorithm": algorithm,
+            "time_limit_ms": time_limit_ms,
+            "construction": construction,
+            "warm_start": warm_start
+        }
+        
+        solution = vrp_solver.solve(problem)
+        routes = self._persist_solution(db, solution, target_date, plan)
+        rejected_count = solution.rejected_count
+        rejected_weight = solution.rejected_weight
+        
+        route_cache_stats = solution.route_cache
+        print(f"🧮 Rota maliyet önbelleği: {route_cache_stats['hits']} isabet, {route_cache_stats['misses']} ıska (%{route_cache_stats['hit_rate']})")
         
         total_cost = sum(r.total_cost for r in routes)
         total_distance = sum(r.total_distance for r in routes)
@@ -500,1567 +599,187 @@ class LogisticsService:
             "total_cost": round(total_cost, 2),
             "total_distance": round(total_distance, 2),
             "total_cargo": total_cargo,
-            "total_weight": round(total_weight, 2)
+            "total_weight": round(total_weight, 2),
+            "route_cache": route_cache_stats,
+            "algorithm": solution.algorithm,
+            "construction": construction,
+            "warm_start": warm_start if solution.warm_started else "none"
         }
         
+        if solution.improvement_curve:
+            result["improvement_curve"] = solution.improvement_curve
+        
         if scenario_type != "unlimited":
             result["rejected_cargo_count"] = rejected_count
             result["rejected_cargo_weight"] = round(rejected_weight, 2)
+            result["rejected_request_ids"] = solution.rejected_requests
             result["acceptance_rate_count"] = round((total_cargo / total_cargo_before * 100), 1) if total_cargo_before > 0 else 0
             result["acceptance_rate_weight"] = round((total_weight / total_weight_before * 100), 1) if total_weight_before > 0 else 0
             result["optimization_mode"] = optimization_mode
         
         return result
     
-    def solve_unlimited(self, db: Session, cargo_data: Dict, depot: Station, target_date: date,
-                         cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[Route]:
-        
-        all_stations = [cargo_data[sid]["station"] for sid in cargo_data.keys()]
-        all_stations.append(depot)
-        self.distance_matrix = self.build_distance_matrix_osrm(all_stations)
-        
-        existing_vehicles = db.query(Vehicle).filter(Vehicle.is_rented == False).order_by(Vehicle.capacity.desc()).all()
-        num_existing = len(existing_vehicles) if existing_vehicles else 1
-        
-        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
-        total_capacity = sum(v.capacity for v in existing_vehicles) if existing_vehicles else 0
-        
-        num_stations = len(cargo_data)
-        
-        max_vehicle_capacity = max(v.capacity for v in existing_vehicles) if existing_vehicles else rental_capacity
-        min_vehicles_needed = max(1, int((total_cargo_weight + max_vehicle_capacity - 1) / max_vehicle_capacity))
-        
-        min_clusters = min_vehicles_needed
-        max_clusters = min(num_stations, max(num_existing, min_vehicles_needed) + 3)
-        
-        print(f"🔍 Maliyet Optimizasyonu: {min_clusters} - {max_clusters} küme (cluster) konfigürasyonu deneniyor...")
-        
-        best_config = None
-        best_cost = float('inf')
-        
-        for num_clusters in range(min_clusters, max_clusters + 1):
-            simulated_cost = self._simulate_configuration_cost(
-                cargo_data, depot, num_clusters, existing_vehicles,
-                cost_per_km, rental_cost, rental_capacity
-            )
-            
-            print(f"   📊 {num_clusters} küme: Tahmini maliyet = {simulated_cost:.2f} birim")
-            
-            if simulated_cost < best_cost:
-                best_cost = simulated_cost
-                best_config = num_clusters
-        
-        print(f"✅ En iyi konfigürasyon: {best_config} küme (+ overflow için kiralık), Tahmini Maliyet: {best_cost:.2f} birim")
-        
-        return self._execute_configuration(
-            db, cargo_data, depot, target_date, best_config,
-            existing_vehicles, cost_per_km, rental_cost, rental_capacity
+    def insert_late_cargo(self, db: Session, req: CargoRequest) -> Dict:
+        # Cheapest insertion into the stored routes of the request's day;
+        # only the route that takes it is rewritten. When no vehicle has room
+        # left the day needs a full replan (replan_day).
+        target_date = req.request_date.date()
+        stored = db.query(Route).filter(Route.route_date == target_date).all()
+        depot = self.get_depot_station(db)
+        if not stored or not depot or req.station_id == depot.id:
+            return {"status": "skipped", "message": "Eklenecek planlı rota yok."}
+        
+        planned = [self._to_planned_route(r) for r in stored]
+        busy = {r.vehicle_id for r in stored}
+        idle = [
+            FleetVehicle(v.id, v.name, v.capacity)
+            for v in db.query(Vehicle).filter(Vehicle.is_rented == False).order_by(Vehicle.capacity.desc()).all()
+            if v.id not in busy
+        ]
+        station_ids = {sid for p in planned for sid in p.stops} | {req.station_id}
+        stations = {s.id: s for s in db.query(Station).filter(Station.id.in_(station_ids)).all()}
+        cargo_data = {sid: {"station": stations[sid]} for sid in station_ids}
+        plan = self._stored_plan_settings(stored)
+        if plan is None:
+            return {"status": "skipped", "message": "Günün planlama ayarları kayıtlı değil, gün yeniden planlanmalı."}
+        
+        inserted = vrp_solver.insert_demand(
+            self._build_solver_matrix(db, cargo_data, depot),
+            self._to_location(depot),
+            {sid: self._to_location(st) for sid, st in stations.items()},
+            planned,
+            Demand(self._to_location(stations[req.station_id]), req.weight, req.cargo_count, req.id),
+            plan["cost_per_km"],
+            idle
         )
-    
-    def _simulate_configuration_cost(self, cargo_data: Dict, depot: Station, num_clusters: int,
-                                      existing_vehicles: List, cost_per_km: float, 
-                                      rental_cost: float, rental_capacity: float) -> float:
-        if num_clusters == 0:
-            return float('inf')
-        
-        station_ids = list(cargo_data.keys())
-        if not station_ids:
-            return 0
-        
-        clusters = self._create_clusters(cargo_data, depot, num_clusters, station_ids.copy())
-        clusters.sort(key=lambda x: x["total_weight"], reverse=True)
-        
-        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
-        
-        if num_clusters <= len(vehicles_sorted):
-            max_cluster_weight = max(c["total_weight"] for c in clusters) if clusters else 0
-            max_vehicle_capacity = vehicles_sorted[0].capacity if vehicles_sorted else 0
-            
-            if max_cluster_weight > max_vehicle_capacity * 1.3:
-                alt_clusters = self._create_capacity_aware_clusters(
-                    cargo_data, depot, num_clusters, vehicles_sorted
-                )
-                if alt_clusters is not None:
-                    alt_clusters.sort(key=lambda x: x["total_weight"], reverse=True)
-                    alt_cost = self._calculate_clusters_cost(
-                        alt_clusters, cargo_data, depot, vehicles_sorted, 
-                        cost_per_km, rental_cost, rental_capacity
-                    )
-                    orig_cost = self._calculate_clusters_cost(
-                        clusters, cargo_data, depot, vehicles_sorted,
-                        cost_per_km, rental_cost, rental_capacity
-                    )
-                    return min(alt_cost, orig_cost)
-        
-        total_cost = 0
-        overflow_pool = [] 
-        
-        for i, cluster in enumerate(clusters):
-            if i < len(vehicles_sorted):
-                vehicle_capacity = vehicles_sorted[i].capacity
-            else:
-                for sid in cluster["stations"]:
-                    overflow_pool.append({
-                        "sid": sid,
-                        "weight": cargo_data[sid]["total_weight"]
-                    })
-                continue
-            
-            remaining_capacity = vehicle_capacity
-            cluster_stations = []
-            for sid in cluster["stations"]:
-                cluster_stations.append({
-                    "sid": sid,
-                    "weight": cargo_data[sid]["total_weight"]
-                })
-            cluster_stations.sort(key=lambda x: -x["weight"])
-            
-            cluster_route_sids = []
-            for cs in cluster_stations:
-                if cs["weight"] <= remaining_capacity:
-                    cluster_route_sids.append(cs["sid"])
-                    remaining_capacity -= cs["weight"]
-                elif remaining_capacity > 0:
-                    cluster_route_sids.append(cs["sid"])
-                    overflow_pool.append({
-                        "sid": cs["sid"],
-                        "weight": cs["weight"] - remaining_capacity
-                    })
-                    remaining_capacity = 0
-                else:
-                    overflow_pool.append(cs)
-            
-            if cluster_route_sids:
-                route_dist = self._calculate_simple_route_distance(cluster_route_sids, cargo_data, depot)
-                total_cost += route_dist * cost_per_km
-        
-        if overflow_pool:
-            total_overflow = sum(o["weight"] for o in overflow_pool)
-            min_rentals_needed = max(1, int((total_overflow + rental_capacity - 1) / rental_capacity))
-            
-            total_cost += min_rentals_needed * rental_cost
-            
-            overflow_pool.sort(key=lambda x: -x["weight"])
-            rental_bins = [{"sids": [], "remaining": rental_capacity} for _ in range(min_rentals_needed)]
-            
-            for o in overflow_pool:
-                for rb in rental_bins:
-                    if o["weight"] <= rb["remaining"]:
-                        if o["sid"] not in rb["sids"]:
-                            rb["sids"].append(o["sid"])
-                        rb["remaining"] -= o["weight"]
-                        break
-            
-            for rb in rental_bins:
-                if rb["sids"]:
-                    route_dist = self._calculate_simple_route_distance(rb["sids"], cargo_data, depot)
-                    total_cost += route_dist * cost_per_km
-        
-        return total_cost
-    
-    def _calculate_clusters_cost(self, clusters: List[Dict], cargo_data: Dict, depot: Station,
-                                 vehicles_sorted: List, cost_per_km: float, 
-                                 rental_cost: float, rental_capacity: float) -> float:
-        total_cost = 0
-        overflow_pool = []
-        
-        for i, cluster in enumerate(clusters):
-            if i < len(vehicles_sorted):
-                vehicle_capacity = vehicles_sorted[i].capacity
-            else:
-                for sid in cluster["stations"]:
-                    overflow_pool.append({
-                        "sid": sid,
-                        "weight": cargo_data[sid]["total_weight"]
-                    })
-                continue
-            
-            remaining_capacity = vehicle_capacity
-            cluster_stations = []
-            for sid in cluster["stations"]:
-                cluster_stations.append({
-                    "sid": sid,
-                    "weight": cargo_data[sid]["total_weight"]
-                })
-            cluster_stations.sort(key=lambda x: -x["weight"])
-            
-            cluster_route_sids = []
-            for cs in cluster_stations:
-                if cs["weight"] <= remaining_capacity:
-                    cluster_route_sids.append(cs["sid"])
-                    remaining_capacity -= cs["weight"]
-                elif remaining_capacity > 0:
-                    cluster_route_sids.append(cs["sid"])
-                    overflow_pool.append({
-                        "sid": cs["sid"],
-                        "weight": cs["weight"] - remaining_capacity
-                    })
-                    remaining_capacity = 0
-                else:
-                    overflow_pool.append(cs)
-            
-            if cluster_route_sids:
-                route_dist = self._calculate_simple_route_distance(cluster_route_sids, cargo_data, depot)
-                total_cost += route_dist * cost_per_km
-        
-        if overflow_pool:
-            total_overflow = sum(o["weight"] for o in overflow_pool)
-            min_rentals_needed = max(1, int((total_overflow + rental_capacity - 1) / rental_capacity))
-            
-            total_cost += min_rentals_needed * rental_cost
-            
-            overflow_pool.sort(key=lambda x: -x["weight"])
-            rental_bins = [{"sids": [], "remaining": rental_capacity} for _ in range(min_rentals_needed)]
-            
-            for o in overflow_pool:
-                for rb in rental_bins:
-                    if o["weight"] <= rb["remaining"]:
-                        if o["sid"] not in rb["sids"]:
-                            rb["sids"].append(o["sid"])
-                        rb["remaining"] -= o["weight"]
-                        break
-            
-            for rb in rental_bins:
-                if rb["sids"]:
-                    route_dist = self._calculate_simple_route_distance(rb["sids"], cargo_data, depot)
-                    total_cost += route_dist * cost_per_km
         
-        return total_cost
-    
-    def _calculate_simple_route_distance(self, station_ids: List[int], cargo_data: Dict, depot: Station) -> float:
-        if not station_ids:
-            return 0
-        
-        ordered = self._order_stations_nn(station_ids, cargo_data, depot)
-        ordered = self._quick_2opt(ordered, cargo_data, depot)
+        if inserted is None:
+            print(f"⚠️ Geç kargo (Talep {req.id}) mevcut araçlara sığmıyor, gün yeniden planlanmalı")
+            return {
+                "status": "needs_replan",
+                "message": f"Talep {req.id} mevcut araçlara sığmıyor, gün yeniden planlanmalı.",
+                "mode": "full"
+            }
         
-        total_dist = self._get_dist(depot.id, ordered[0], cargo_data, depot)
-        for i in range(len(ordered) - 1):
-            total_dist += self._get_dist(ordered[i], ordered[i+1], cargo_data)
-        total_dist += self._get_dist(ordered[-1], depot.id, cargo_data, depot)
+        index, route = inserted
+        if index is None:
+            row = Route(vehicle_id=route.vehicle.id, route_date=target_date, scenario_type=route.scenario_type)
+            db.add(row)
+        else:
+            row = stored[index]
+        row.path_data = json.dumps({"path": route.path, "logs": route.logs, "plan": plan})
+        row.total_distance = route.distance
+        row.total_cost = route.cost
+        row.cargo_weight = route.weight
+        row.cargo_count = route.count
+        db.commit()
         
-        return total_dist
+        return {
+            "status": "success",
+            "message": f"Talep {req.id} rota {row.id} içine eklendi.",
+            "mode": "incremental",
+            "route_id": row.id
+        }
     
-    def _create_clusters(self, cargo_data: Dict, depot: Station, num_clusters: int, 
-                         unvisited: List) -> List[Dict]:
-        clusters = []
-        used_seeds = []
-        
-        for _ in range(num_clusters):
-            if not unvisited:
-                break
-            
-            candidates = []
-            for sid in unvisited:
-                d = self._get_dist(sid, depot.id, cargo_data, depot)
-                candidates.append((sid, d))
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            
-            buffer = 25.0 if num_clusters <= 3 else 15.0
-            seed = None
-            for sid, _ in candidates:
-                valid = True
-                for us in used_seeds:
-                    if self._get_dist(sid, us, cargo_data) < buffer:
-                        valid = False
-                        break
-                if valid:
-                    seed = sid
-                    break
-            
-            if seed is None:
-                seed = candidates[0][0]
-            
-            used_seeds.append(seed)
-            clusters.append({
-                "seed_sid": seed,
-                "stations": [seed],
-                "total_weight": cargo_data[seed]["total_weight"]
-            })
-            unvisited.remove(seed)
-        
-        while unvisited:
-            best_choice = None
-            min_detour = float('inf')
-            
-            for sid in unvisited:
-                for c_idx, cluster in enumerate(clusters):
-                    seed_sid = cluster["seed_sid"]
-                    d_seed_st = self._get_dist(seed_sid, sid, cargo_data)
-                    d_st_depot = self._get_dist(sid, depot.id, cargo_data, depot)
-                    d_seed_depot = self._get_dist(seed_sid, depot.id, cargo_data, depot)
-                    detour = d_seed_st + d_st_depot - d_seed_depot
-                    
-                    if detour < min_detour:
-                        min_detour = detour
-                        best_choice = (sid, c_idx)
-            
-
-            if best_choice:
-                sid, c_idx = best_choice
-
-                clusters[c_idx]["stations"].append(sid)
-                clusters[c_idx]["total_weight"] += cargo_data[sid]["total_weight"]
-                unvisited.remove(sid)
-            else:
-                break
-        
-        return clusters
+    def replan_day(self, db: Session, target_date: date) -> Dict:
+        # Full solve of a planned day with the settings it was planned with
+        stored = db.query(Route).filter(Route.route_date == target_date).all()
+        plan = self._stored_plan_settings(stored)
+        if plan is None:
+            return {"status": "skipped", "message": "Günün planlama ayarları kayıtlı değil."}
+        print(f"🔁 {target_date} yeniden planlanıyor ({plan['construction']}, {plan['algorithm']})")
+        return self.solve_vrp(db, target_date, **plan)
     
-    def _create_capacity_aware_clusters(self, cargo_data: Dict, depot: Station, 
-                                        num_clusters: int, vehicles_sorted: List) -> List[Dict]:
-        if num_clusters > len(vehicles_sorted):
+    def _stored_initial_routes(self, db: Session, target_date: date, warm_start: str) -> Optional[List]:
+        # "same_date" reuses the last run for the date, "last_week" the plan of
+        # the same weekday a week earlier; rentals are matched by position only
+        if warm_start == "none":
             return None
-        
-        vehicle_capacities = [v.capacity for v in vehicles_sorted[:num_clusters]]
-        
-        station_ids = list(cargo_data.keys())
-        total_weight = sum(cargo_data[sid]["total_weight"] for sid in station_ids)
-        
-        if total_weight > sum(vehicle_capacities):
+        source_date = target_date if warm_start == "same_date" else target_date - timedelta(days=7)
+        stored = db.query(Route).filter(Route.route_date == source_date).order_by(Route.id).all()
+        if not stored:
+            print(f"ℹ️ Sıcak başlangıç için {source_date} tarihli rota yok, sıfırdan planlanıyor.")
             return None
-
-        clusters = []
-        for i in range(num_clusters):
-            clusters.append({
-                "seed_sid": None,
-                "stations": [],
-                "total_weight": 0,
-                "capacity": vehicle_capacities[i]
-            })
-        
-        stations_by_distance = []
-        for sid in station_ids:
-            d = self._get_dist(sid, depot.id, cargo_data, depot)
-            w = cargo_data[sid]["total_weight"]
-            stations_by_distance.append((sid, d, w))
-        stations_by_distance.sort(key=lambda x: x[1], reverse=True)
-        
-        used_seeds = []
-        unassigned = [x[0] for x in stations_by_distance]
-        
-        for i, cluster in enumerate(clusters):
-            best_seed = None
-            for sid, dist, weight in stations_by_distance:
-                if sid not in unassigned:
-                    continue
-                if weight > cluster["capacity"]:
-                    continue  
-                
-                min_dist_to_seeds = float('inf')
-                for used in used_seeds:
-                    d = self._get_dist(sid, used, cargo_data)
-                    if d < min_dist_to_seeds:
-                        min_dist_to_seeds = d
-                
-                if not used_seeds or min_dist_to_seeds > 15: 
-                    best_seed = sid
-                    break
-            
-            if best_seed is None:
-                for sid in unassigned:
-                    if cargo_data[sid]["total_weight"] <= cluster["capacity"]:
-                        best_seed = sid
-                        break
-            
-            if best_seed:
-                cluster["seed_sid"] = best_seed
-                cluster["stations"].append(best_seed)
-                cluster["total_weight"] = cargo_data[best_seed]["total_weight"]
-                unassigned.remove(best_seed)
-                used_seeds.append(best_seed)
-        
-        while unassigned:
-            best_assignment = None
-            best_score = float('inf') 
-            
-            for sid in unassigned:
-                station_weight = cargo_data[sid]["total_weight"]
-                
-                for c_idx, cluster in enumerate(clusters):
-                    if cluster["total_weight"] + station_weight > cluster["capacity"]:
-                        continue
-                    
-                    if cluster["seed_sid"]:
-                        seed_sid = cluster["seed_sid"]
-                        d_seed_st = self._get_dist(seed_sid, sid, cargo_data)
-                        d_st_depot = self._get_dist(sid, depot.id, cargo_data, depot)
-                        d_seed_depot = self._get_dist(seed_sid, depot.id, cargo_data, depot)
-                        detour = d_seed_st + d_st_depot - d_seed_depot
-                    else:
-                        detour = self._get_dist(sid, depot.id, cargo_data, depot)
-                    
-                    if detour < best_score:
-                        best_score = detour
-                        best_assignment = (sid, c_idx)
-            
-            if best_assignment is None:
-                print(f"         ❌ Kalan {len(unassigned)} istasyon atanamadı")
-                return None
-            
-            sid, c_idx = best_assignment
-            clusters[c_idx]["stations"].append(sid)
-            clusters[c_idx]["total_weight"] += cargo_data[sid]["total_weight"]
-            unassigned.remove(sid)
-        
-        for i, cluster in enumerate(clusters):
-            if cluster["total_weight"] > cluster["capacity"]:
-                return None
-
-        for cluster in clusters:
-            del cluster["capacity"]
-        
-        return clusters
-    
-    def _calculate_cluster_route_distance(self, cluster: Dict, cargo_data: Dict, depot: Station) -> float:
-        stations = cluster["stations"]
-        if not stations:
-            return 0
-        
-        ordered = []
-        remaining = stations.copy()
-        current_id = depot.id
-        
-        while remaining:
-            nearest = None
-            min_dist = float('inf')
-            for sid in remaining:
-                d = self._get_dist(current_id, sid, cargo_data, depot)
-                if d < min_dist:
-                    min_dist = d
-                    nearest = sid
-            if nearest:
-                ordered.append(nearest)
-                remaining.remove(nearest)
-                current_id = nearest
-        
-        ordered = self._quick_2opt(ordered, cargo_data, depot)
-        
-        total_dist = 0
-        prev_id = depot.id
-        for sid in ordered:
-            total_dist += self._get_dist(prev_id, sid, cargo_data, depot)
-            prev_id = sid
-        
-        total_dist += self._get_dist(prev_id, depot.id, cargo_data, depot)
-        
-        return total_dist
+        return [
+            (None if r.vehicle.is_rented else r.vehicle_id, self._to_planned_route(r).stops)
+            for r in stored
+        ]
     
-    def _execute_configuration(self, db: Session, cargo_data: Dict, depot: Station, 
-                               target_date: date, num_clusters: int, existing_vehicles: List,
-                               cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[Route]:
-        
-        final_routes = []
-        station_ids = list(cargo_data.keys())
-        
-        clusters = self._create_clusters(cargo_data, depot, num_clusters, station_ids.copy())
-        clusters.sort(key=lambda x: x["total_weight"], reverse=True)
-        
-        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
-        
-        if num_clusters <= len(vehicles_sorted) and clusters:
-            max_cluster_weight = max(c["total_weight"] for c in clusters)
-            max_vehicle_capacity = vehicles_sorted[0].capacity if vehicles_sorted else 0
-            
-            if max_cluster_weight > max_vehicle_capacity * 1.3:
-                alt_clusters = self._create_capacity_aware_clusters(
-                    cargo_data, depot, num_clusters, vehicles_sorted
-                )
-                if alt_clusters is not None:
-                    alt_clusters.sort(key=lambda x: x["total_weight"], reverse=True)
-                    clusters = alt_clusters 
-        
-        assignments = []  
-        overflow_pool = []  
-        
-        for i, cluster in enumerate(clusters):
-            if i < len(vehicles_sorted):
-                vehicle = vehicles_sorted[i]
-                vehicle_capacity = vehicle.capacity
-            else:
-                for sid in cluster["stations"]:
-                    overflow_pool.append({
-                        "sid": sid,
-                        "weight": cargo_data[sid]["total_weight"],
-                        "count": cargo_data[sid]["total_count"],
-                        "station": cargo_data[sid]["station"]
-                    })
+    def _to_planned_route(self, route: Route) -> PlannedRoute:
+        path_data = json.loads(route.path_data) if isinstance(route.path_data, str) else route.path_data
+        path = path_data.get("path", []) if isinstance(path_data, dict) else path_data
+        logs = path_data.get("logs", []) if isinstance(path_data, dict) else []
+        
+        stops = []
+        loads = {}
+        for stop in path:
+            if stop.get("is_depot"):
                 continue
-            
-            vehicle_assignments = []
-            remaining_capacity = vehicle_capacity
-            
-            cluster_stations = []
-            for sid in cluster["stations"]:
-                cluster_stations.append({
-                    "sid": sid,
-                    "weight": cargo_data[sid]["total_weight"],
-                    "count": cargo_data[sid]["total_count"],
-                    "station": cargo_data[sid]["station"]
-                })
-            cluster_stations.sort(key=lambda x: -x["weight"])
-            
-            for cs in cluster_stations:
-                if cs["weight"] <= remaining_capacity:
-                    vehicle_assignments.append(cs)
-                    remaining_capacity -= cs["weight"]
-                elif remaining_capacity > 0:
-                    portion = remaining_capacity / cs["weight"]
-                    partial_count = max(1, int(cs["count"] * portion))
-                    
-                    vehicle_assignments.append({
-                        "sid": cs["sid"],
-                        "weight": remaining_capacity,
-                        "count": partial_count,
-                        "station": cs["station"],
-                        "is_partial": True
-                    })
-                    
-                    overflow_pool.append({
-                        "sid": cs["sid"],
-                        "weight": cs["weight"] - remaining_capacity,
-                        "count": cs["count"] - partial_count,
-                        "station": cs["station"],
-                        "is_partial": True
-                    })
-                    remaining_capacity = 0
-                else:
-                    overflow_pool.append(cs)
-            
-            if vehicle_assignments:
-                assignments.append({
-                    "vehicle": vehicle,
-                    "cargo_list": vehicle_assignments
-                })
-        
-        if overflow_pool:
-            overflow_pool.sort(key=lambda x: -x["weight"])
-
-            for assign in assignments:
-                vehicle = assign["vehicle"]
-                current_weight = sum(c["weight"] for c in assign["cargo_list"])
-                remaining_cap = vehicle.capacity - current_weight
-                
-                if remaining_cap > 0:
-                    still_overflow = []
-                    for ov in overflow_pool:
-                        if ov["weight"] <= remaining_cap:
-                            assign["cargo_list"].append(ov)
-                            remaining_cap -= ov["weight"]
-                        else:
-                            still_overflow.append(ov)
-                    overflow_pool = still_overflow
-                    
-                    if not overflow_pool:
-                        break  
-            
-            if overflow_pool:
-                total_overflow = sum(o["weight"] for o in overflow_pool)
-                min_rentals_needed = max(1, int((total_overflow + rental_capacity - 1) / rental_capacity))
-                
-                print(f"   📦 Overflow: {total_overflow:.1f} kg | {min_rentals_needed} kiralık araç gerekli")
-                print(f"   🚚 Toplam Araç: {len(assignments)} mevcut + {min_rentals_needed} kiralık = {len(assignments) + min_rentals_needed} araç")
-                
-                rental_vehicles = []
-                rental_counter = 1
-                for _ in range(min_rentals_needed):
-                    rv = Vehicle(
-                        name=f"Kiralık Araç {rental_counter}",
-                        capacity=rental_capacity,
-                        is_rented=True,
-                        rental_cost=rental_cost
-                    )
-                    db.add(rv)
-                    db.commit()
-                    db.refresh(rv)
-                    rental_vehicles.append(rv)
-                    rental_counter += 1
-
-                rental_assignments = [{
-                    "vehicle": rv,
-                    "cargo_list": [],
-                    "remaining_capacity": rental_capacity
-                } for rv in rental_vehicles]
-                
-                for overflow_item in overflow_pool:
-                    assigned = False
-                    for ra in rental_assignments:
-                        if overflow_item["weight"] <= ra["remaining_capacity"]:
-                            ra["cargo_list"].append(overflow_item)
-                            ra["remaining_capacity"] -= overflow_item["weight"]
-                            assigned = True
-                            break
-                    
-                    if not assigned:
-                        rv = Vehicle(
-                            name=f"Kiralık Araç {rental_counter}",
-                            capacity=rental_capacity,
-                            is_rented=True,
-                            rental_cost=rental_cost
-                        )
-                        db.add(rv)
-                        db.commit()
-                        db.refresh(rv)
-                        rental_counter += 1
-                        
-                        rental_assignments.append({
-                            "vehicle": rv,
-                            "cargo_list": [overflow_item],
-                            "remaining_capacity": rental_capacity - overflow_item["weight"]
-                        })
-
-                for ra in rental_assignments:
-                    if ra["cargo_list"]:
-                        assignments.append({
-                            "vehicle": ra["vehicle"],
-                            "cargo_list": ra["cargo_list"]
-                        })
+            stops.append(stop["station_id"])
+            loads[stop["station_id"]] = {
+                "weight": stop.get("weight", 0),
+                "count": stop.get("count", 0),
+                "is_partial": stop.get("name", "").endswith("(Parça)")
+            }
         
-
-        has_partial_splits = any(
-            any(c.get("is_partial") for c in assign["cargo_list"])
-            for assign in assignments
+        v = route.vehicle
+        vehicle = FleetVehicle(v.id, v.name, v.capacity, v.is_rented, v.rental_cost or 0.0)
+        return PlannedRoute(
+            vehicle, stops, path, logs, route.total_distance, route.total_cost,
+            route.cargo_weight, route.cargo_count, route.scenario_type, loads
         )
-        
-        if len(assignments) >= 2 and not has_partial_splits:
-            print("   🔀 Inter-route optimizasyonu uygulanıyor...")
-        elif has_partial_splits:
-            print("   ⚠️ Parçalı kargo mevcut - Inter-route optimizasyonu atlandı")
-        
-        if len(assignments) >= 2 and not has_partial_splits:
-            vehicle_bins_for_iro = []
-            for assign in assignments:
-                vehicle = assign["vehicle"]
-                cargo_list = assign["cargo_list"]
-                stations = list(set(c["sid"] for c in cargo_list))
-                total_weight = sum(c["weight"] for c in cargo_list)
-                total_count = sum(c["count"] for c in cargo_list)
-                vehicle_bins_for_iro.append({
-                    "vehicle": vehicle,
-                    "stations": stations,
-                    "total_weight": total_weight,
-                    "total_count": total_count
-                })
-            
-            vehicle_bins_for_iro = self._inter_route_optimization(vehicle_bins_for_iro, cargo_data, depot, cost_per_km)
-            
-            for i, vbin in enumerate(vehicle_bins_for_iro):
-                if i < len(assignments):
-                    new_cargo_list = []
-                    for sid in vbin["stations"]:
-                        station = cargo_data[sid]["station"]
-                        weight = cargo_data[sid]["total_weight"]
-                        count = cargo_data[sid]["total_count"]
-                        new_cargo_list.append({
-                            "sid": sid,
-                            "station": station,
-                            "weight": weight,
-                            "count": count
-                        })
-                    assignments[i]["cargo_list"] = new_cargo_list
-            
-            active_routes = sum(1 for a in assignments if a["cargo_list"])
-            if active_routes < len(vehicle_bins_for_iro):
-                print(f"   📊 Rota konsolidasyonu: {len(vehicle_bins_for_iro)} küme → {active_routes} aktif rota")
-        
-        for assign in assignments:
-            vehicle = assign["vehicle"]
-            cargo_list = assign["cargo_list"]
-            
-            if not cargo_list:
-                continue
-            
-            station_sids = [c["sid"] for c in cargo_list]
-            
-            vehicle_cargo = {}
-            for c in cargo_list:
-                sid = c["sid"]
-                if sid not in vehicle_cargo:
-                    vehicle_cargo[sid] = {
-                        "station": c["station"],
-                        "total_weight": c["weight"],
-                        "total_count": c["count"]
-                    }
-                else:
-                    vehicle_cargo[sid]["total_weight"] += c["weight"]
-                    vehicle_cargo[sid]["total_count"] += c["count"]
-            
-            unique_sids = list(vehicle_cargo.keys())
-            ordered_stations = self._order_stations_nn(unique_sids, cargo_data, depot)
-            
-            ordered_stations = self._optimize_route_2opt(ordered_stations, vehicle_cargo, depot)
-            
-            route_path = []
-            route_logs = []
-            route_dist = 0
-            route_weight = 0
-            route_count = 0
-            
-            total_assigned = sum(c["weight"] for c in cargo_list)
-            route_logs.append(f"ℹ️ Rota Planı: Toplam {total_assigned:.1f} kg yük için {vehicle.name} ({vehicle.capacity} kg) atandı.")
-            
-            if vehicle.is_rented:
-                route_logs.append(f"💰 Kiralık Araç Maliyeti: {rental_cost} birim eklendi.")
-            
-            route_path.append({
-                "station_id": depot.id,
-                "lat": depot.latitude,
-                "lon": depot.longitude,
-                "name": depot.name,
-                "weight": 0,
-                "count": 0,
-                "is_depot": True,
-                "is_start": True
-            })
-            route_logs.append(f"🚀 Başlangıç: {depot.name} (Depo)")
-            
-            current_sid = depot.id
-            
-            for sid in ordered_stations:
-                station = vehicle_cargo[sid]["station"]
-                weight = vehicle_cargo[sid]["total_weight"]
-                count = vehicle_cargo[sid]["total_count"]
-                
-                dist = self._get_dist(current_sid, sid, cargo_data, depot)
-                route_dist += dist
-                route_weight += weight
-                route_count += count
-                
-                station_name = station.name
-                if any(c.get("is_partial") for c in cargo_list if c["sid"] == sid):
-                    station_name = f"{station.name} (Parça)"
-                
-                route_path.append({
-                    "station_id": sid,
-                    "lat": station.latitude,
-                    "lon": station.longitude,
-                    "name": station_name,
-                    "weight": weight,
-                    "count": count
-                })
-                
-                remaining_cap = vehicle.capacity - route_weight
-                if current_sid == depot.id:
-                    route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km (Depodan) | Toplam Yol: {route_dist:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
-                else:
-                    route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km | Toplam Yol: {route_dist:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
-                
-                current_sid = sid
-            
-            return_dist = self._get_dist(current_sid, depot.id, cargo_data, depot)
-            route_dist += return_dist
-            
-            route_logs.append(f"🏁 Hedefe (Umuttepe) Gidiliyor. Son Mesafe: {return_dist:.2f} km | Toplam Yol: {route_dist:.2f} km")
-            
-            route_path.append({
-                "station_id": depot.id,
-                "lat": depot.latitude,
-                "lon": depot.longitude,
-                "name": depot.name,
-                "weight": 0,
-                "count": 0,
-                "is_depot": True
-            })
-            
-            total_cost = route_dist * cost_per_km
-            if vehicle.is_rented:
-                total_cost += rental_cost
-            
-            route = Route(
-                vehicle_id=vehicle.id,
-                path_data=json.dumps({"path": route_path, "logs": route_logs}),
-                total_distance=round(route_dist, 2),
-                total_cost=round(total_cost, 2),
-                route_date=target_date,
-                scenario_type="unlimited",
-                cargo_weight=round(route_weight, 2),
-                cargo_count=route_count
-            )
-            db.add(route)
-            db.commit()
-            final_routes.append(route)
-        
-        return final_routes
     
-    def _optimize_route_2opt(self, route: List[int], cargo_data: Dict, depot: Station) -> List[int]:
-        if len(route) <= 2:
-            return route  
-        
-        def calculate_total_distance(r):
-            if not r:
-                return 0
-            total = self._get_dist(depot.id, r[0], cargo_data, depot)  
-            for i in range(len(r) - 1):
-                total += self._get_dist(r[i], r[i+1], cargo_data)
-            total += self._get_dist(r[-1], depot.id, cargo_data, depot)  
-            return total
-        
-        best = route.copy()
-        best_distance = calculate_total_distance(best)
-        initial_distance = best_distance
-        improved = True
-        iterations = 0
-        max_iterations = 100  
-        
-        while improved and iterations < max_iterations:
-            improved = False
-            iterations += 1
-            
-            for i in range(len(best) - 1):
-                for j in range(i + 2, len(best)):
-                    new_route = best[:i+1] + best[i+1:j+1][::-1] + best[j+1:]
-                    new_distance = calculate_total_distance(new_route)
-                    
-                    if new_distance < best_distance - 0.01:
-                        best = new_route
-                        best_distance = new_distance
-                        improved = True
-                        break
-                if improved:
-                    break
-        
-        if best_distance < calculate_total_distance(route):
-            improvement = calculate_total_distance(route) - best_distance
-            print(f"   🔄 2-opt: Rota iyileştirildi! {improvement:.2f} km tasarruf.")
-        
-        or_opt_improved = True
-        or_iterations = 0
-        while or_opt_improved and or_iterations < 50:
-            or_opt_improved = False
-            or_iterations += 1
-            
-            for i in range(len(best)):
-                station = best[i]
-                current_dist = calculate_total_distance(best)
-                
-                for j in range(len(best) + 1):
-                    if j == i or j == i + 1:
-                        continue
-                    
-                    new_route = best[:i] + best[i+1:] 
-                    if j > i:
-                        new_route = new_route[:j-1] + [station] + new_route[j-1:]
-                    else:
-                        new_route = new_route[:j] + [station] + new_route[j:]
-                    
-                    new_dist = calculate_total_distance(new_route)
-                    
-                    if new_dist < best_distance - 0.1:
-                        improvement = best_distance - new_dist
-                        print(f"      📍 Or-opt: İstasyon {i+1} → pozisyon {j+1}, {improvement:.2f} km tasarruf")
-                        best = new_route
-                        best_distance = new_dist
-                        or_opt_improved = True
-                        break
-                
-                if or_opt_improved:
-                    break
-        
-        if or_iterations > 1:
-            print(f"   🔄 Or-opt: Toplam {or_iterations} iyileştirme yapıldı")
-        
-        return best
+    def _stored_plan_settings(self, routes: List[Route]) -> Optional[Dict]:
+        # solve_vrp parameters the day was planned with; None for routes
+        # stored before they were kept
+        for r in routes:
+            path_data = json.loads(r.path_data) if isinstance(r.path_data, str) else r.path_data
+            if isinstance(path_data, dict) and path_data.get("plan"):
+                return path_data["plan"]
+        return None
     
-    def _quick_2opt(self, route: List[int], cargo_data: Dict, depot: Station) -> List[int]:
-        if len(route) <= 2:
-            return route
-        
-        def calc_dist(r):
-            if not r:
-                return 0
-            total = self._get_dist(depot.id, r[0], cargo_data, depot)
-            for i in range(len(r) - 1):
-                total += self._get_dist(r[i], r[i+1], cargo_data)
-            total += self._get_dist(r[-1], depot.id, cargo_data, depot)
-            return total
-        
-        best = route.copy()
-        best_dist = calc_dist(best)
-        
-        for i in range(len(best) - 1):
-            for j in range(i + 2, len(best)):
-                new_route = best[:i+1] + best[i+1:j+1][::-1] + best[j+1:]
-                new_dist = calc_dist(new_route)
-                if new_dist < best_dist - 0.01:
-                    best = new_route
-                    best_dist = new_dist
-        
-        return best
+    def _to_demands(self, cargo_data: Dict) -> List[Demand]:
+        # One demand per request so the limited scenario can reject single requests
+        demands = []
+        for c in cargo_data.values():
+            location = self._to_location(c["station"])
+            for req in c["requests"]:
+                demands.append(Demand(location, req.weight, req.cargo_count, req.id))
+        return demands
     
-    def _inter_route_optimization(self, routes_data: List[Dict], cargo_data: Dict, 
-                                   depot: Station, cost_per_km: float = 1.0) -> List[Dict]:
-        if len(routes_data) < 2:
-            return routes_data  
-        
-        def calc_route_distance(station_ids):
-            if not station_ids:
-                return 0
-            total = self._get_dist(depot.id, station_ids[0], cargo_data, depot)
-            for i in range(len(station_ids) - 1):
-                total += self._get_dist(station_ids[i], station_ids[i+1], cargo_data)
-            total += self._get_dist(station_ids[-1], depot.id, cargo_data, depot)
-            return total
-        
-        routes = []
-        for rd in routes_data:
-            routes.append({
-                "vehicle": rd.get("vehicle"),
-                "capacity": rd.get("vehicle").capacity if rd.get("vehicle") else rd.get("capacity", 1000),
-                "stations": list(rd.get("stations", [])),
-                "total_weight": rd.get("total_weight", 0),
-                "total_count": rd.get("total_count", 0)
-            })
-        
-        improved = True
-        total_improvement = 0
-        iteration = 0
-        max_iterations = 50  
-        
-        while improved and iteration < max_iterations:
-            improved = False
-            iteration += 1
-            
-            for i, route_a in enumerate(routes):
-                if not route_a["stations"]:
-                    continue
-                
-                for sid_idx, sid in enumerate(route_a["stations"].copy()):
-                    station_weight = cargo_data[sid]["total_weight"]
-                    station_count = cargo_data[sid]["total_count"]
-                    
-                    current_dist_a = calc_route_distance(route_a["stations"])
-                    
-                    best_move = None
-                    best_savings = 0
-                    
-                    for j, route_b in enumerate(routes):
-                        if i == j:
-                            continue
-                        
-                        if route_b["total_weight"] + station_weight > route_b["capacity"]:
-                            continue
-                        
-                        new_stations_a = [s for s in route_a["stations"] if s != sid]
-                        new_stations_b = route_b["stations"] + [sid]
-                        
-                        if new_stations_a:
-                            new_stations_a = self._quick_2opt(new_stations_a, cargo_data, depot)
-                        new_stations_b = self._quick_2opt(new_stations_b, cargo_data, depot)
-                        
-                        new_dist_a = calc_route_distance(new_stations_a)
-                        new_dist_b = calc_route_distance(new_stations_b)
-                        current_dist_b = calc_route_distance(route_b["stations"])
-                        
-                        old_total = current_dist_a + current_dist_b
-                        new_total = new_dist_a + new_dist_b
-                        savings = old_total - new_total
-                        
-                        if savings > 0.5:
-                            if savings > best_savings:
-                                best_savings = savings
-                                best_move = {
-                                    "from_route": i,
-                                    "to_route": j,
-                                    "sid": sid,
-                                    "new_stations_a": new_stations_a,
-                                    "new_stations_b": new_stations_b,
-                                    "weight": station_weight,
-                                    "count": station_count
-                                }
-                    
-                    if best_move:
-                        from_r = routes[best_move["from_route"]]
-                        to_r = routes[best_move["to_route"]]
-                        
-                        from_r["stations"] = best_move["new_stations_a"]
-                        to_r["stations"] = best_move["new_stations_b"]
-                        
-                        from_r["total_weight"] -= best_move["weight"]
-                        to_r["total_weight"] += best_move["weight"]
-                        from_r["total_count"] -= best_move["count"]
-                        to_r["total_count"] += best_move["count"]
-                        
-                        total_improvement += best_savings
-                        improved = True
-                        break  
-                
-                if improved:
-                    break
-        
-        if total_improvement > 0:
-            print(f"   🔀 Inter-route optimizasyonu: {total_improvement:.2f} km tasarruf ({iteration} iterasyon)")
-        
-        for idx, rd in enumerate(routes_data):
-            if idx < len(routes):
-                rd["stations"] = routes[idx]["stations"]
-                rd["total_weight"] = routes[idx]["total_weight"]
-                rd["total_count"] = routes[idx]["total_count"]
-        
-        return routes_data
+    def _to_location(self, station: Station) -> Location:
+        return Location(station.id, station.name, station.latitude, station.longitude)
     
-    def _create_agent(self, vehicle):
-        return {
-            "vehicle": vehicle,
-            "start_sid": None,
-            "assigned_sids": [],
-            "remaining_cap": vehicle.capacity,
-            "total_weight": 0.0,
-            "total_count": 0,
-            "logs": [],
-            "path": [],
-            "active": True
-        }
-
-    def _get_dist(self, sid1, sid2, cargo_data, depot=None):
-        id1 = sid1
-        id2 = sid2
-        
-        station1 = depot if depot and sid1 == depot.id else cargo_data[sid1]["station"]
-        station2 = depot if depot and sid2 == depot.id else cargo_data[sid2]["station"]
-        
-        dist = self.distance_matrix.get((id1, id2), 0)
-        if dist == 0 and id1 != id2:
-             dist = self._haversine_distance(station1.latitude, station1.longitude, station2.latitude, station2.longitude)
-        return dist
-    
-    def solve_limited(self, db: Session, cargo_data: Dict, depot: Station, target_date: date,
-                       cost_per_km: float = 1.0, optimization_mode: str = "max_count") -> tuple:
-        final_routes = []
-        
-        all_stations = [cargo_data[sid]["station"] for sid in cargo_data.keys()]
-        all_stations.append(depot)
-        self.distance_matrix = self.build_distance_matrix_osrm(all_stations)
-        
-        existing_vehicles = db.query(Vehicle).filter(Vehicle.is_rented == False).order_by(Vehicle.capacity.desc()).all()
-        
-        if not existing_vehicles:
-            total_rejected_count = sum(c["total_count"] for c in cargo_data.values())
-            total_rejected_weight = sum(c["total_weight"] for c in cargo_data.values())
-            return [], total_rejected_count, total_rejected_weight
-        
-        total_fleet_capacity = sum(v.capacity for v in existing_vehicles)
-        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
-        total_cargo_count = sum(c["total_count"] for c in cargo_data.values())
-        num_vehicles = len(existing_vehicles)
-        
-        print(f"📊 Sınırlı Araç: {num_vehicles} araç, {total_fleet_capacity} kg kapasite")
-        print(f"📦 Toplam Kargo: {total_cargo_count} adet, {total_cargo_weight} kg")
-        
-        capacity_sufficient = total_cargo_weight <= total_fleet_capacity
-        
-        if capacity_sufficient:
-            print(f"✅ Kapasite yeterli! Coğrafi kümeleme ile minimum maliyet hedefleniyor...")
-            vehicle_bins = self._assign_by_geographic_clustering(
-                cargo_data, depot, existing_vehicles, cost_per_km
+    def _persist_solution(self, db: Session, solution: VRPSolution, target_date: date, plan: Dict) -> List[Route]:
+        # Rental vehicles picked by the solver only exist from here on
+        for fv in solution.rented_vehicles:
+            rv = Vehicle(
+                name=fv.name,
+                capacity=fv.capacity,
+                is_rented=True,
+                rental_cost=fv.rental_cost
             )
-            rejected_stations = []
-        else:
-            print(f"⚠️ Kapasite yetersiz! Best Fit Decreasing ile maksimum kargo hedefleniyor...")
-            vehicle_bins, rejected_stations = self._assign_by_best_fit(
-                cargo_data, existing_vehicles, optimization_mode
-            )
-        
-        rejected_count = sum(cargo_data[sid]["total_count"] for sid in rejected_stations)
-        rejected_weight = sum(cargo_data[sid]["total_weight"] for sid in rejected_stations)
-        
-        accepted_weight = total_cargo_weight - rejected_weight
-        print(f"✅ Kabul: {total_cargo_count - rejected_count} adet, {accepted_weight:.1f} kg")
-        if rejected_stations:
-            print(f"❌ Red: {rejected_count} adet, {rejected_weight:.1f} kg")
+            db.add(rv)
+            db.flush()
+            fv.id = rv.id
         
-        initial_routes = len([v for v in vehicle_bins if v.get("stations")])
-        vehicle_bins = self._inter_route_optimization(vehicle_bins, cargo_data, depot, cost_per_km)
-        active_routes = len([v for v in vehicle_bins if v.get("stations")])
-        if active_routes < initial_routes:
-            print(f"   📊 Rota konsolidasyonu: {initial_routes} → {active_routes} aktif rota")
-        
-        for vbin in vehicle_bins:
-            vehicle = vbin["vehicle"]
-            stations_to_visit = vbin["stations"]
-            station_assignments = vbin.get("station_assignments", [])
-            
-            if not stations_to_visit:
-                continue
-            
-            assignment_lookup = {}
-            for assign in station_assignments:
-                sid = assign["sid"]
-                if sid not in assignment_lookup:
-                    assignment_lookup[sid] = {"weight": 0, "count": 0, "is_partial": False}
-                assignment_lookup[sid]["weight"] += assign["weight"]
-                assignment_lookup[sid]["count"] += assign["count"]
-                if assign.get("is_partial"):
-                    assignment_lookup[sid]["is_partial"] = True
-            
-            vehicle_cargo_data = {}
-            for sid in stations_to_visit:
-                vehicle_cargo_data[sid] = cargo_data[sid]
-            
-            ordered_stations = self._order_stations_nn(stations_to_visit, cargo_data, depot)
-            
-            ordered_stations = self._optimize_route_2opt(ordered_stations, vehicle_cargo_data, depot)
-            
-            route_path = []
-            route_logs = []
-            route_distance = 0
-            route_weight = 0
-            route_count = 0
-            
-            route_logs.append(f"ℹ️ Araç: {vehicle.name} | Kapasite: {vehicle.capacity} kg | Atanan Yük: {vbin['total_weight']:.1f} kg")
-            route_logs.append(f"📋 Optimizasyon Modu: {'Maksimum Kargo Sayısı' if optimization_mode == 'max_count' else 'Maksimum Kargo Ağırlığı'}")
-            
-            route_path.append({
-                "station_id": depot.id,
-                "lat": depot.latitude,
-                "lon": depot.longitude,
-                "name": depot.name,
-                "weight": 0,
-                "count": 0,
-                "is_depot": True,
-                "is_start": True
-            })
-            route_logs.append(f"🚀 Başlangıç: {depot.name} (Depo)")
-            
-            current_sid = depot.id
-            
-            for sid in ordered_stations:
-                station = cargo_data[sid]["station"]
-
-                if sid in assignment_lookup:
-                    weight = assignment_lookup[sid]["weight"]
-                    count = assignment_lookup[sid]["count"]
-                    is_partial = assignment_lookup[sid]["is_partial"]
-                else:
-                    weight = cargo_data[sid]["total_weight"]
-                    count = cargo_data[sid]["total_count"]
-                    is_partial = False
-                
-                dist = self._get_dist(current_sid, sid, cargo_data, depot)
-                route_distance += dist
-                route_weight += weight
-                route_count += count
-                
-                station_name = station.name
-                if is_partial:
-                    station_name = f"{station.name} (Parça)"
-                
-                route_path.append({
-                    "station_id": sid,
-                    "lat": station.latitude,
-                    "lon": station.longitude,
-                    "name": station_name,
-                    "weight": weight,
-                    "count": count
-                })
-                
-                remaining_cap = vehicle.capacity - route_weight
-                if current_sid == depot.id:
-                    route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km (Depodan) | Toplam Yol: {route_distance:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
-                else:
-                    route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km | Toplam Yol: {route_distance:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
-                
-                current_sid = sid
-
-            return_dist = self._get_dist(current_sid, depot.id, cargo_data, depot)
-            route_distance += return_dist
-            
-            route_logs.append(f"🏁 Hedefe (Umuttepe) Gidiliyor. Son Mesafe: {return_dist:.2f} km | Toplam Yol: {route_distance:.2f} km")
-            
-            route_path.append({
-                "station_id": depot.id,
-                "lat": depot.latitude,
-                "lon": depot.longitude,
-                "name": depot.name,
-                "weight": 0,
-                "count": 0,
-                "is_depot": True
-            })
-            
-            total_cost = route_distance * cost_per_km
-            route_logs.append(f"💰 Toplam Maliyet: {total_cost:.2f} birim (Kiralama maliyeti yok)")
-            
+        routes = []
+        for planned in solution.routes:
             route = Route(
-                vehicle_id=vehicle.id,
-                path_data=json.dumps({"path": route_path, "logs": route_logs}),
-                total_distance=round(route_distance, 2),
-                total_cost=round(total_cost, 2),
+                vehicle_id=planned.vehicle.id,
+                path_data=json.dumps({"path": planned.path, "logs": planned.logs, "plan": plan}),
+                total_distance=planned.distance,
+                total_cost=planned.cost,
                 route_date=target_date,
-                scenario_type=f"limited_{optimization_mode}",
-                cargo_weight=round(route_weight, 2),
-                cargo_count=route_count
+                scenario_type=planned.scenario_type,
+                cargo_weight=planned.weight,
+                cargo_count=planned.count
             )
             db.add(route)
-            db.commit()
-            final_routes.append(route)
-        
-        return final_routes, rejected_count, rejected_weight
-    
-    def _assign_by_geographic_clustering(self, cargo_data: Dict, depot: Station, 
-                                          existing_vehicles: List, cost_per_km: float) -> List[Dict]:
-        num_vehicles = len(existing_vehicles)
-        station_ids = list(cargo_data.keys())
-        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
-        
-        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
-        max_vehicle_capacity = vehicles_sorted[0].capacity if vehicles_sorted else 0
-        
-        min_clusters = max(1, int((total_cargo_weight + max_vehicle_capacity - 1) / max_vehicle_capacity))
-        max_clusters = min(num_vehicles, len(station_ids))
-        
-        best_clusters = None
-        best_cost = float('inf')
-        best_cluster_count = min_clusters
-        
-        print(f"   🔍 Sınırlı Araç: {min_clusters} - {max_clusters} küme deneniyor...")
-        
-        for num_clusters in range(min_clusters, max_clusters + 1):
-            test_clusters = self._create_clusters(cargo_data, depot, num_clusters, station_ids.copy())
-            
-            test_clusters_sorted = sorted(test_clusters, key=lambda x: x["total_weight"], reverse=True)
-            all_fit = True
-            for i, cluster in enumerate(test_clusters_sorted):
-                if i < len(vehicles_sorted):
-                    if cluster["total_weight"] > vehicles_sorted[i].capacity:
-                        all_fit = False
-                        break
-            
-            if not all_fit:
-                print(f"      ⚠️ {num_clusters} küme (k-means): Kapasite aşımı - alternatif deneniyor...")
-                test_clusters = self._create_capacity_aware_clusters(
-                    cargo_data, depot, num_clusters, vehicles_sorted
-                )
-                
-                if test_clusters is None:
-                    print(f"      ❌ {num_clusters} küme: Kapasite-duyarlı kümeleme de başarısız - atlandı")
-                    continue
-                else:
-                    print(f"      ✅ {num_clusters} küme: Kapasite-duyarlı kümeleme başarılı!")
-            
-            test_cost = 0
-            for cluster in test_clusters:
-                route_dist = self._calculate_cluster_route_distance(cluster, cargo_data, depot)
-                test_cost += route_dist * cost_per_km
-            
-            print(f"      📊 {num_clusters} küme: Tahmini maliyet = {test_cost:.2f} birim")
-            
-            if test_cost < best_cost:
-                best_cost = test_cost
-                best_clusters = test_clusters
-                best_cluster_count = num_clusters
-        
-        if best_clusters is None:
-            best_clusters = self._create_clusters(cargo_data, depot, num_vehicles, station_ids.copy())
-            best_cluster_count = num_vehicles
-        
-        print(f"   🚚 Sınırlı Araç Optimizasyonu: {best_cluster_count} araç (mevcut: {num_vehicles}), Tahmini: {best_cost:.2f} birim")
-        
-        clusters = best_clusters
-        clusters.sort(key=lambda x: x["total_weight"], reverse=True)
-        
-        vehicle_bins = []
-        for i, vehicle in enumerate(vehicles_sorted):
-            if i < len(clusters):
-                cluster = clusters[i]
-                cluster_weight = cluster["total_weight"]
-                
-                if cluster_weight <= vehicle.capacity:
-                    station_list = list(cluster["stations"])
-                    station_assignments = []
-                    for sid in station_list:
-                        station_assignments.append({
-                            "sid": sid,
-                            "weight": cargo_data[sid]["total_weight"],
-                            "count": cargo_data[sid]["total_count"]
-                        })
-                    
-                    vehicle_bins.append({
-                        "vehicle": vehicle,
-                        "stations": station_list,
-                        "station_assignments": station_assignments,
-                        "remaining_capacity": vehicle.capacity - cluster_weight,
-                        "total_weight": cluster_weight,
-                        "total_count": sum(cargo_data[sid]["total_count"] for sid in cluster["stations"])
-                    })
-                else:
-                    assigned_weight = 0
-                    assigned_stations = []
-                    station_assignments = []
-                    for sid in cluster["stations"]:
-                        if assigned_weight + cargo_data[sid]["total_weight"] <= vehicle.capacity:
-                            assigned_stations.append(sid)
-                            station_assignments.append({
-                                "sid": sid,
-                                "weight": cargo_data[sid]["total_weight"],
-                                "count": cargo_data[sid]["total_count"]
-                            })
-                            assigned_weight += cargo_data[sid]["total_weight"]
-                    
-                    vehicle_bins.append({
-                        "vehicle": vehicle,
-                        "stations": assigned_stations,
-                        "station_assignments": station_assignments,
-                        "remaining_capacity": vehicle.capacity - assigned_weight,
-                        "total_weight": assigned_weight,
-                        "total_count": sum(cargo_data[sid]["total_count"] for sid in assigned_stations)
-                    })
-            else:
-                vehicle_bins.append({
-                    "vehicle": vehicle,
-                    "stations": [],
-                    "station_assignments": [],
-                    "remaining_capacity": vehicle.capacity,
-                    "total_weight": 0,
-                    "total_count": 0
-                })
-        
-        return vehicle_bins
-    
-    def _assign_by_best_fit(self, cargo_data: Dict, existing_vehicles: List, 
-                            optimization_mode: str) -> tuple:
-        vehicle_bins = []
-        for v in sorted(existing_vehicles, key=lambda x: -x.capacity):
-            vehicle_bins.append({
-                "vehicle": v,
-                "stations": [],  
-                "station_assignments": [],  
-                "remaining_capacity": v.capacity,
-                "total_weight": 0,
-                "total_count": 0
-            })
-        
-        station_list = []
-        for sid in cargo_data.keys():
-            weight = cargo_data[sid]["total_weight"]
-            count = cargo_data[sid]["total_count"]
-            weight_per_count = weight / count if count > 0 else float('inf')
-            station_list.append({
-                "sid": sid,
-                "weight": weight,
-                "count": count,
-                "weight_per_count": weight_per_count
-            })
-        
-
-        if optimization_mode == "max_count":
-            station_list.sort(key=lambda x: x["weight_per_count"])
-            print(f"   📊 max_count modu: Kargo sayısı öncelikli sıralama (düşük kg/adet oranı önce)")
-        else:  
-
-            station_list.sort(key=lambda x: -x["weight"])
-            print(f"   📊 max_weight modu: Kargo ağırlığı öncelikli sıralama (ağır kargolar önce)")
-        
-        print(f"   📋 Öncelik Sırası:")
-        for i, s in enumerate(station_list, 1):
-            print(f"      {i}. Station {s['sid']}: {s['count']} adet, {s['weight']} kg, {s['weight_per_count']:.1f} kg/adet")
-        
-        accepted_stations = []
-        rejected_stations = []
-        
-        for station in station_list:
-            best_fit = None
-            min_remaining = float('inf')
-            
-            for vbin in vehicle_bins:
-                if station["weight"] <= vbin["remaining_capacity"]:
-                    if vbin["remaining_capacity"] < min_remaining:
-                        min_remaining = vbin["remaining_capacity"]
-                        best_fit = vbin
-            
-            if best_fit:
-                best_fit["stations"].append(station["sid"])
-                best_fit["station_assignments"].append({
-                    "sid": station["sid"],
-                    "weight": station["weight"],
-                    "count": station["count"]
-                })
-                best_fit["remaining_capacity"] -= station["weight"]
-                best_fit["total_weight"] += station["weight"]
-                best_fit["total_count"] += station["count"]
-                accepted_stations.append(station["sid"])
-                print(f"      ✅ Station {station['sid']}: {station['weight']} kg → {best_fit['vehicle'].name} (kalan: {best_fit['remaining_capacity']:.0f} kg)")
-            
-            elif optimization_mode == "max_count":
-                weight_per_item = station["weight_per_count"]
-                remaining_weight = station["weight"]
-                remaining_count = station["count"]
-                items_placed_total = 0
-                
-                sorted_bins = sorted(vehicle_bins, key=lambda x: -x["remaining_capacity"])
-                
-                for vbin in sorted_bins:
-                    if remaining_count <= 0:
-                        break
-                    
-                    if vbin["remaining_capacity"] >= weight_per_item:
-                        items_can_fit = int(vbin["remaining_capacity"] / weight_per_item)
-                        items_to_place = min(items_can_fit, remaining_count)
-                        
-                        if items_to_place > 0:
-                            weight_to_place = items_to_place * weight_per_item
-                            
-                            if station["sid"] not in vbin["stations"]:
-                                vbin["stations"].append(station["sid"])
-                            vbin["station_assignments"].append({
-                                "sid": station["sid"],
-                                "weight": weight_to_place,
-                                "count": items_to_place,
-                                "is_partial": True
-                            })
-                            vbin["remaining_capacity"] -= weight_to_place
-                            vbin["total_weight"] += weight_to_place
-                            vbin["total_count"] += items_to_place
-                            
-                            items_placed_total += items_to_place
-                            remaining_weight -= weight_to_place
-                            remaining_count -= items_to_place
-                            
-                            print(f"      🔀 Station {station['sid']}: {items_to_place} adet ({weight_to_place:.0f} kg) → {vbin['vehicle'].name} (PARÇA, kalan: {vbin['remaining_capacity']:.0f} kg)")
-                
-                if items_placed_total > 0:
-                    if remaining_count > 0:
-                        print(f"      ⚠️ Station {station['sid']}: {remaining_count} adet ({remaining_weight:.0f} kg) → REDDEDİLDİ")
-                        rejected_stations.append(station["sid"])  # Track as partially rejected
-                    else:
-                        accepted_stations.append(station["sid"])
-                else:
-                    rejected_stations.append(station["sid"])
-                    print(f"      ❌ Station {station['sid']}: {station['weight']} kg → REDDEDİLDİ (hiçbir araca sığmıyor)")
-            else:
-                rejected_stations.append(station["sid"])
-                print(f"      ❌ Station {station['sid']}: {station['weight']} kg → REDDEDİLDİ (hiçbir araca sığmıyor)")
-        
-        return vehicle_bins, rejected_stations
-    
-    def _select_cargo_for_capacity(self, cluster: Dict, cargo_data: Dict, 
-                                    capacity: float, optimization_mode: str) -> tuple:
-        stations = cluster["stations"]
-        
-        station_list = []
-        for sid in stations:
-            station_list.append({
-                "sid": sid,
-                "weight": cargo_data[sid]["total_weight"],
-                "count": cargo_data[sid]["total_count"],
-                "weight_per_count": cargo_data[sid]["total_weight"] / cargo_data[sid]["total_count"] if cargo_data[sid]["total_count"] > 0 else float('inf')
-            })
-        
-        if optimization_mode == "max_count":
-            station_list.sort(key=lambda x: x["weight_per_count"])
-        else: 
-
-            station_list.sort(key=lambda x: -x["weight"])
-        
-        accepted = []
-        rejected = []
-        remaining_capacity = capacity
-        
-        for s in station_list:
-            if s["weight"] <= remaining_capacity:
-                accepted.append(s["sid"])
-                remaining_capacity -= s["weight"]
-            else:
-                rejected.append(s["sid"])
-        
-        return accepted, rejected
-    
-    def _order_stations_nn(self, stations: List[int], cargo_data: Dict, depot: Station) -> List[int]:
-        if not stations:
-            return []
-        
-        if len(stations) == 1:
-            return stations.copy()
-        
-        farthest_sid = None
-        max_dist = -1
-        for sid in stations:
-            d = self._get_dist(depot.id, sid, cargo_data, depot)
-            if d > max_dist:
-                max_dist = d
-                farthest_sid = sid
-        
-        ordered = [farthest_sid]
-        remaining = [s for s in stations if s != farthest_sid]
-        current_id = farthest_sid
-        
-        while remaining:
-            best = None
-            best_score = float('inf')
-            
-            for sid in remaining:
-                dist_from_current = self._get_dist(current_id, sid, cargo_data, depot)
-                dist_to_depot = self._get_dist(sid, depot.id, cargo_data, depot)
-                
-                score = dist_from_current - (dist_to_depot * 0.1)
-                
-                if score < best_score:
-                    best_score = score
-                    best = sid
-            
-            if best:
-                ordered.append(best)
-                remaining.remove(best)
-                current_id = best
-        
-        return ordered
-    
-    def _find_farthest_station(self, station_ids: List[int], cargo_data: Dict, depot: Station) -> int:
-        max_dist = -1
-        farthest_sid = station_ids[0]
-        
-        for sid in station_ids:
-            dist = self.distance_matrix.get((sid, depot.id), 0)
-            if dist == 0:
-                station = cargo_data[sid]["station"]
-                dist = self._haversine_distance(
-                    station.latitude, station.longitude,
-                    depot.latitude, depot.longitude
-                )
-            if dist > max_dist:
-                max_dist = dist
-                farthest_sid = sid
-        
-        return farthest_sid
-    
-    def _find_nearest_feasible(self, current: Station, unvisited: List[int], 
-                                cargo_data: Dict, remaining_capacity: float) -> tuple[Optional[int], List[str]]:
-        min_dist = float('inf')
-        nearest_sid = None
-        logs = []
-        
-        candidates = []
+            routes.append(route)
         
-        for sid in unvisited:
-            station = cargo_data[sid]["station"]
-            weight = cargo_data[sid]["total_weight"]
-            
-            dist = self.distance_matrix.get((current.id, sid), 0)
-            if dist == 0:
-                dist = self._haversine_distance(
-                    current.latitude, current.longitude,
-                    station.latitude, station.longitude
-                )
-            candidates.append({
-                "sid": sid,
-                "name": station.name,
-                "weight": weight,
-                "dist": dist
-            })
-
-        candidates.sort(key=lambda x: x["dist"])
-        
-        for cand in candidates:
-            if cand["weight"] <= remaining_capacity:
-                if nearest_sid is None:
-                    nearest_sid = cand["sid"]
-                    min_dist = cand["dist"]
-                    break
-            else:
-                logs.append(
-                    f"⚠️ {cand['name']} ({cand['dist']:.1f} km) en yakındı, ancak yükü ({cand['weight']} kg) kalan kapasiteyi ({remaining_capacity} kg) aşıyor."
-                )
-        
-        return nearest_sid, logs
-    
+        db.commit()
+        return routes
     
     def get_statistics(self, db: Session, target_date: date) -> Dict:
         import json
@@ -2252,56 +971,28 @@ class LogisticsService:
         }
     
     def _simulate_scenario_run(self, vehicles: List[Vehicle], items: List[Dict], mode: str) -> Dict:
-        pool = [item.copy() for item in items]
-        
-        if mode == 'max_count':
-             pool.sort(key=lambda x: x['weight'])
-        elif mode == 'max_weight':
-             pool.sort(key=lambda x: x['weight'], reverse=True)
-
         if mode == 'unlimited':
             return {
-                "accepted_weight": sum(i['weight'] for i in pool),
-                "accepted_count": sum(i['count'] for i in pool),
+                "accepted_weight": sum(i['weight'] for i in items),
+                "accepted_count": sum(i['count'] for i in items),
                 "rejected_weight": 0,
                 "rejected_count": 0,
                 "vehicles_used": 0 
             }
-            
-        
-        total_capacity = sum(v.capacity for v in vehicles)
-        accepted_weight = 0
-        accepted_count = 0
-        rejected_weight = 0
-        rejected_count = 0
-        
-        current_fill = 0
         
-        for item in pool:
-            w = item['weight']
-            c = item['count']
-            
-            if current_fill + w <= total_capacity:
-                current_fill += w
-                accepted_weight += w
-                accepted_count += c
-            else:
-                remaining = total_capacity - current_fill
-                if remaining > 0:
-                    current_fill += remaining
-                    accepted_weight += remaining
-                    ratio = remaining / w
-                    accepted_count += int(c * ratio)
-                    
-                    rejected_weight += (w - remaining)
-                    rejected_count += (c - int(c * ratio))
-                else:
-                    rejected_weight += w
-                    rejected_count += c
+        # Same request-level selection as the limited scenario solver
+        weights = [i['weight'] for i in items]
+        counts = [i['count'] for i in items]
+        _, rejected = multi_knapsack(
+            weights, cargo_values(weights, counts, mode), [v.capacity for v in vehicles],
+            settings.SOLVER_KNAPSACK_TIME_MS
+        )
+        rejected_weight = sum(weights[i] for i in rejected)
+        rejected_count = sum(counts[i] for i in rejected)
 
         return {
-            "accepted_weight": round(accepted_weight, 2),
-            "accepted_count": int(accepted_count),
+            "accepted_weight": round(sum(weights) - rejected_weight, 2),
+            "accepted_count": int(sum(counts) - rejected_count),
             "rejected_weight": round(rejected_weight, 2),
             "rejected_count": int(rejected_count)
         }
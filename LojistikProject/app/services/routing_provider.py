@@ -0,0 +1,144 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.solver.matrix import haversine_km, haversine_matrix
+
+Coord = Tuple[float, float]  # (lat, lon)
+
+
+class RoutingProvider(ABC):
+    name = "base"
+    # Whether tables from this provider are worth persisting in distance_cache
+    cacheable = False
+
+    @property
+    def fingerprint(self) -> str:
+        return self.name
+
+    @abstractmethod
+    def table(self, coords: List[Coord]) -> Optional[np.ndarray]:
+        ...
+
+    @abstractmethod
+    def route_distance(self, origin: Coord, destination: Coord) -> Optional[float]:
+        ...
+
+
+class HaversineProvider(RoutingProvider):
+    # Offline, deterministic provider for tests and benchmarks.
+    name = "haversine"
+
+    def table(self, coords: List[Coord]) -> Optional[np.ndarray]:
+        return haversine_matrix(coords)
+
+    def route_distance(self, origin: Coord, destination: Coord) -> Optional[float]:
+        return haversine_km(origin[0], origin[1], destination[0], destination[1])
+
+
+class OSRMProvider(RoutingProvider):
+    name = "osrm"
+    cacheable = True
+
+    def __init__(self, base_url: str, max_table_size: int = 100, max_workers: int = 4, timeout: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.max_table_size = max(2, max_table_size)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self.name}@{self.base_url}"
+
+    def table(self, coords: List[Coord]) -> Optional[np.ndarray]:
+        n = len(coords)
+        if n == 0:
+            return np.zeros((0, 0))
+
+        # Sources and destinations of one request share the coordinate list,
+        # so each block may hold at most half of the server's table limit.
+        block = n if n <= self.max_table_size else self.max_table_size // 2
+        starts = list(range(0, n, block))
+        jobs = [(src, dst) for src in starts for dst in starts]
+
+        result = np.zeros((n, n))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            blocks = list(pool.map(lambda job: self._fetch_block(coords, job[0], job[1], block), jobs))
+
+        for (src, dst), values in zip(jobs, blocks):
+            if values is None:
+                return None
+            result[src:src + values.shape[0], dst:dst + values.shape[1]] = values
+
+        print(f"OSRM Table API: {len(jobs)} istek ile {n}x{n} matris oluşturuldu")
+        return result
+
+    def _fetch_block(self, coords: List[Coord], src: int, dst: int, block: int) -> Optional[np.ndarray]:
+        src_idx = list(range(src, min(src + block, len(coords))))
+        dst_idx = list(range(dst, min(dst + block, len(coords))))
+
+        if src == dst:
+            request_idx = src_idx
+            sources = list(range(len(src_idx)))
+            destinations = sources
+        else:
+            request_idx = src_idx + dst_idx
+            sources = list(range(len(src_idx)))
+            destinations = list(range(len(src_idx), len(request_idx)))
+
+        coord_str = ";".join(f"{coords[i][1]},{coords[i][0]}" for i in request_idx)
+        url = (f"{self.base_url}/table/v1/driving/{coord_str}?annotations=distance"
+               f"&sources={';'.join(map(str, sources))}"
+               f"&destinations={';'.join(map(str, destinations))}")
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            data = response.json()
+        except Exception as e:
+            print(f"OSRM Table API error: {e}")
+            return None
+
+        if data.get("code") != "Ok" or not data.get("distances"):
+            print(f"OSRM Table API failed: {data.get('code')}")
+            return None
+
+        # Unroutable pairs come back as null; 0 lets the matrix builder
+        # fill them with the great-circle distance.
+        distances = np.array(
+            [[d if d is not None else 0 for d in row] for row in data["distances"]],
+            dtype=np.float64
+        )
+        return distances / 1000
+
+    def route_distance(self, origin: Coord, destination: Coord) -> Optional[float]:
+        url = (f"{self.base_url}/route/v1/driving/"
+               f"{origin[1]},{origin[0]};{destination[1]},{destination[0]}?overview=false")
+        try:
+            response = self.session.get(url, timeout=5)
+            data = response.json()
+        except Exception as e:
+            print(f"OSRM error: {e}")
+            return None
+
+        if data.get("code") == "Ok" and data.get("routes"):
+            return data["routes"][0]["distance"] / 1000
+        return None
+
+
+def get_routing_provider() -> RoutingProvider:
+    if settings.ROUTING_PROVIDER == "haversine":
+        return HaversineProvider()
+    return OSRMProvider(
+        settings.OSRM_BASE_URL,
+        max_table_size=settings.OSRM_MAX_TABLE_SIZE,
+        max_workers=settings.OSRM_MAX_WORKERS
+    )
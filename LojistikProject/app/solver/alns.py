@@ -0,0 +1,341 @@
+import math
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.solver.local_search import two_opt
+from app.solver.matrix import DistanceMatrix
+from app.solver.problem import FleetVehicle
+
+# Adaptive Large Neighbourhood Search over a finished solution. Destroy
+# operators pull stops out of their routes, repair operators put them back
+# at the cheapest capacity-feasible position, and a simulated-annealing test
+# decides whether the result replaces the current solution. Operators that
+# keep producing good solutions are picked more often. Stops are moved with
+# the load they carry, so partial splits and rejected cargo stay as they are.
+
+SEGMENT_LENGTH = 50
+REACTION = 0.2
+SCORE_BEST = 33
+SCORE_BETTER = 9
+SCORE_ACCEPTED = 13
+START_WORSENING = 0.05
+END_TEMPERATURE_RATIO = 0.001
+
+
+class ALNSRoute:
+    def __init__(self, vehicle: FleetVehicle, stops: List[int], loads: Dict):
+        self.vehicle = vehicle
+        self.stops = list(stops)
+        self.loads = dict(loads)
+        self.load = sum(l["weight"] for l in self.loads.values())
+
+    def copy(self) -> "ALNSRoute":
+        route = ALNSRoute.__new__(ALNSRoute)
+        route.vehicle = self.vehicle
+        route.stops = list(self.stops)
+        route.loads = dict(self.loads)
+        route.load = self.load
+        return route
+
+    def remove(self, sid: int) -> Dict:
+        self.stops.remove(sid)
+        load = self.loads.pop(sid)
+        self.load -= load["weight"]
+        return load
+
+    def insert(self, position: int, sid: int, load: Dict):
+        self.stops.insert(position, sid)
+        self.loads[sid] = load
+        self.load += load["weight"]
+
+
+class ALNS:
+
+    def __init__(self, matrix: DistanceMatrix, depot_id: int, cost_per_km: float,
+                 rental_cost: float = 0.0, rental_capacity: float = 0.0,
+                 allow_rentals: bool = False, seed: int = 0,
+                 two_opt_pass: Optional[Callable[[List[int]], float]] = None):
+        self.matrix = matrix
+        self.depot_id = depot_id
+        self.cost_per_km = cost_per_km
+        self.rental_cost = rental_cost
+        self.rental_capacity = rental_capacity
+        self.allow_rentals = allow_rentals and rental_capacity > 0
+        self.rng = random.Random(seed)
+        # 2-opt on a tour of matrix indices; the solver passes its configured engine
+        self.two_opt = two_opt_pass or (lambda tour: two_opt(matrix, tour))
+
+        self.destroy_ops = [self._random_removal, self._worst_removal, self._related_removal, self._route_removal]
+        self.repair_ops = [self._greedy_repair, self._regret_repair]
+
+    def _dist(self, a: int, b: int) -> float:
+        return self.matrix.between(a, b)
+
+    def route_distance(self, stops: List[int]) -> float:
+        if not stops:
+            return 0.0
+        total = self._dist(self.depot_id, stops[0]) + self._dist(stops[-1], self.depot_id)
+        for i in range(len(stops) - 1):
+            total += self._dist(stops[i], stops[i + 1])
+        return total
+
+    def route_cost(self, route: ALNSRoute) -> float:
+        if not route.stops:
+            return 0.0
+        cost = self.route_distance(route.stops) * self.cost_per_km
+        if route.vehicle.is_rented:
+            cost += self.rental_cost
+        return cost
+
+    def total_cost(self, routes: List[ALNSRoute]) -> float:
+        return sum(self.route_cost(r) for r in routes)
+
+    def run(self, routes: List[ALNSRoute], time_limit_ms: float,
+            max_iterations: Optional[int] = None) -> Tuple[List[ALNSRoute], List[Dict], int]:
+        # Returns (best routes, improvement curve, iterations). The curve has
+        # one point per new best solution: elapsed ms, iteration and cost.
+        started = time.perf_counter()
+        deadline = started + time_limit_ms / 1000.0
+
+        current = [r.copy() for r in routes]
+        current_cost = self.total_cost(current)
+        best = [r.copy() for r in current]
+        best_cost = current_cost
+        curve = [{"ms": 0, "iteration": 0, "cost": round(best_cost, 2)}]
+
+        num_items = sum(len(r.stops) for r in current)
+        if num_items < 2 or time_limit_ms <= 0:
+            return best, curve, 0
+
+        t0 = START_WORSENING * current_cost / math.log(2) if current_cost > 0 else 1.0
+        d_weights = [1.0] * len(self.destroy_ops)
+        r_weights = [1.0] * len(self.repair_ops)
+        d_scores = [0.0] * len(self.destroy_ops)
+        r_scores = [0.0] * len(self.repair_ops)
+        d_uses = [0] * len(self.destroy_ops)
+        r_uses = [0] * len(self.repair_ops)
+
+        iteration = 0
+        while True:
+            now = time.perf_counter()
+            if now >= deadline or (max_iterations is not None and iteration >= max_iterations):
+                break
+            iteration += 1
+            progress = (now - started) / (deadline - started)
+            temperature = t0 * (END_TEMPERATURE_RATIO ** progress)
+
+            d = self._roulette(d_weights)
+            r = self._roulette(r_weights)
+            d_uses[d] += 1
+            r_uses[r] += 1
+
+            candidate = [route.copy() for route in current]
+            q = self._removal_count(num_items)
+            removed = self.destroy_ops[d](candidate, q)
+            if not self.repair_ops[r](candidate, removed):
+                continue
+            candidate = [route for route in candidate if route.stops or not route.vehicle.is_rented]
+            candidate_cost = self.total_cost(candidate)
+
+            score = 0
+            if candidate_cost < best_cost - 1e-6:
+                candidate_cost = self._polish(candidate)
+                best = [route.copy() for route in candidate]
+                best_cost = candidate_cost
+                curve.append({
+                    "ms": int((time.perf_counter() - started) * 1000),
+                    "iteration": iteration,
+                    "cost": round(best_cost, 2)
+                })
+                score = SCORE_BEST
+            elif candidate_cost < current_cost - 1e-6:
+                score = SCORE_BETTER
+            elif self.rng.random() < math.exp(-(candidate_cost - current_cost) / max(temperature, 1e-9)):
+                score = SCORE_ACCEPTED
+            else:
+                candidate = None
+
+            if candidate is not None:
+                current = candidate
+                current_cost = candidate_cost
+            d_scores[d] += score
+            r_scores[r] += score
+
+            if iteration % SEGMENT_LENGTH == 0:
+                self._update_weights(d_weights, d_scores, d_uses)
+                self._update_weights(r_weights, r_scores, r_uses)
+
+        return best, curve, iteration
+
+    def repair(self, routes: List[ALNSRoute], removed: List[Tuple[int, Dict]]) -> bool:
+        # Greedy insertion of stops placed from outside the search (warm starts)
+        return self._greedy_repair(routes, removed)
+
+    def relocate(self, sources: List[ALNSRoute], targets: List[ALNSRoute]):
+        # Empties source routes onto the target routes, cheapest insertion
+        # first, lightest source first; a source that does not fit whole is
+        # left as it is (warm starts drop stored rentals the owned vehicles
+        # have room for)
+        for route in sorted(sources, key=lambda r: r.load):
+            trial = [target.copy() for target in targets]
+            for sid in route.stops:
+                options = self._best_insertions(trial, sid, route.loads[sid])
+                if not options:
+                    break
+                _, ri, pos = min(options)
+                trial[ri].insert(pos, sid, route.loads[sid])
+            else:
+                for target, moved in zip(targets, trial):
+                    target.stops, target.loads, target.load = moved.stops, moved.loads, moved.load
+                for sid in list(route.stops):
+                    route.remove(sid)
+
+    def _roulette(self, weights: List[float]) -> int:
+        pick = self.rng.random() * sum(weights)
+        for i, w in enumerate(weights):
+            pick -= w
+            if pick <= 0:
+                return i
+        return len(weights) - 1
+
+    def _update_weights(self, weights: List[float], scores: List[float], uses: List[int]):
+        for i in range(len(weights)):
+            if uses[i]:
+                weights[i] = max(0.1, weights[i] * (1 - REACTION) + REACTION * scores[i] / uses[i])
+            scores[i] = 0.0
+            uses[i] = 0
+
+    def _removal_count(self, num_items: int) -> int:
+        low = max(1, int(num_items * 0.1))
+        high = max(low, min(int(num_items * 0.4), 30))
+        return self.rng.randint(low, high)
+
+    def _polish(self, routes: List[ALNSRoute]) -> float:
+        # Intra-route 2-opt on a new best solution only; cheap next to the
+        # search itself and keeps the incumbent locally optimal.
+        index = self.matrix.index
+        ids = self.matrix.ids
+        depot = index[self.depot_id]
+        for route in routes:
+            if len(route.stops) > 2:
+                tour = [depot] + [index[sid] for sid in route.stops] + [depot]
+                if self.two_opt(tour) > 0:
+                    route.stops = [ids[i] for i in tour[1:-1]]
+        return self.total_cost(routes)
+
+    # --- destroy operators: remove q stops, return [(sid, load)] ---
+
+    def _items(self, routes: List[ALNSRoute]) -> List[Tuple[int, int]]:
+        return [(ri, sid) for ri, route in enumerate(routes) for sid in route.stops]
+
+    def _random_removal(self, routes: List[ALNSRoute], q: int) -> List[Tuple[int, Dict]]:
+        items = self._items(routes)
+        picked = self.rng.sample(items, min(q, len(items)))
+        return [(sid, routes[ri].remove(sid)) for ri, sid in picked]
+
+    def _worst_removal(self, routes: List[ALNSRoute], q: int) -> List[Tuple[int, Dict]]:
+        # Stops whose detour costs the most, with some randomness in the pick
+        gains = []
+        for ri, route in enumerate(routes):
+            stops = route.stops
+            for p, sid in enumerate(stops):
+                prev = stops[p - 1] if p > 0 else self.depot_id
+                nxt = stops[p + 1] if p + 1 < len(stops) else self.depot_id
+                gain = self._dist(prev, sid) + self._dist(sid, nxt) - self._dist(prev, nxt)
+                if len(stops) == 1 and route.vehicle.is_rented:
+                    gain += self.rental_cost / max(self.cost_per_km, 1e-9)
+                gains.append((gain, ri, sid))
+        gains.sort(reverse=True)
+
+        removed = []
+        for _ in range(min(q, len(gains))):
+            pick = int((self.rng.random() ** 3) * len(gains))
+            _, ri, sid = gains.pop(pick)
+            removed.append((sid, routes[ri].remove(sid)))
+        return removed
+
+    def _related_removal(self, routes: List[ALNSRoute], q: int) -> List[Tuple[int, Dict]]:
+        # A random stop and the stops closest to it, wherever they are routed
+        items = self._items(routes)
+        _, seed_sid = self.rng.choice(items)
+        items.sort(key=lambda item: self._dist(seed_sid, item[1]) + self._dist(item[1], seed_sid))
+        return [(sid, routes[ri].remove(sid)) for ri, sid in items[:q]]
+
+    def _route_removal(self, routes: List[ALNSRoute], q: int) -> List[Tuple[int, Dict]]:
+        # Empties one route; the way vehicles (and rentals) get dropped
+        candidates = [ri for ri, route in enumerate(routes) if route.stops]
+        ri = self.rng.choice(candidates)
+        route = routes[ri]
+        return [(sid, route.remove(sid)) for sid in list(route.stops)]
+
+    # --- repair operators: reinsert every removed stop or return False ---
+
+    def _ensure_spare_rental(self, routes: List[ALNSRoute]):
+        if self.allow_rentals and not any(r.vehicle.is_rented and not r.stops for r in routes):
+            rental = FleetVehicle(None, "Kiralık Araç", self.rental_capacity,
+                                  is_rented=True, rental_cost=self.rental_cost)
+            routes.append(ALNSRoute(rental, [], {}))
+
+    def _best_insertions(self, routes: List[ALNSRoute], sid: int, load: Dict) -> List[Tuple[float, int, int]]:
+        # Cheapest position per feasible route as (cost, route index, position)
+        options = []
+        weight = load["weight"]
+        for ri, route in enumerate(routes):
+            if sid in route.loads or route.load + weight > route.vehicle.capacity + 1e-9:
+                continue
+            stops = route.stops
+            if not stops:
+                cost = (self._dist(self.depot_id, sid) + self._dist(sid, self.depot_id)) * self.cost_per_km
+                if route.vehicle.is_rented:
+                    cost += self.rental_cost
+                options.append((cost, ri, 0))
+                continue
+            best_cost = float('inf')
+            best_pos = 0
+            prev = self.depot_id
+            for p in range(len(stops) + 1):
+                nxt = stops[p] if p < len(stops) else self.depot_id
+                delta = self._dist(prev, sid) + self._dist(sid, nxt) - self._dist(prev, nxt)
+                if delta < best_cost:
+                    best_cost = delta
+                    best_pos = p
+                prev = nxt
+            options.append((best_cost * self.cost_per_km, ri, best_pos))
+        return options
+
+    def _greedy_repair(self, routes: List[ALNSRoute], removed: List[Tuple[int, Dict]]) -> bool:
+        pending = list(removed)
+        self.rng.shuffle(pending)
+        # Heavy stops first: they have the fewest places left to go
+        pending.sort(key=lambda item: -item[1]["weight"])
+        for sid, load in pending:
+            self._ensure_spare_rental(routes)
+            options = self._best_insertions(routes, sid, load)
+            if not options:
+                return False
+            _, ri, pos = min(options)
+            routes[ri].insert(pos, sid, load)
+        return True
+
+    def _regret_repair(self, routes: List[ALNSRoute], removed: List[Tuple[int, Dict]]) -> bool:
+        # Regret-2: insert first the stop that loses most if its best route
+        # is taken away, instead of the one that is cheapest right now
+        pending = list(removed)
+        while pending:
+            self._ensure_spare_rental(routes)
+            chosen = None
+            chosen_regret = -1.0
+            for k, (sid, load) in enumerate(pending):
+                options = self._best_insertions(routes, sid, load)
+                if not options:
+                    return False
+                options.sort()
+                regret = options[1][0] - options[0][0] if len(options) > 1 else float('inf')
+                if regret > chosen_regret:
+                    chosen_regret = regret
+                    chosen = (k, options[0])
+            k, (_, ri, pos) = chosen
+            sid, load = pending.pop(k)
+            routes[ri].insert(pos, sid, load)
+        return True
@@ -0,0 +1,82 @@
+import heapq
+from typing import List, Tuple
+
+import numpy as np
+
+# Station-to-cluster assignment once the seeds are fixed. detours[c, p] is
+# the extra km of serving station p from cluster c and never changes; only
+# cluster loads do. Every station keeps one heap entry keyed on its cheapest
+# (and, for regret, second cheapest) cluster that still has room. When an
+# assignment fills a cluster, just the stations that were counting on it
+# and no longer fit are re-ranked; every other entry stays valid.
+#
+# greedy: cheapest (detour, station, cluster) first, the order of the old
+#   "search all pairs after every assignment" loop.
+# regret: the station that would lose most by missing its best cluster
+#   first, which keeps tight fleets feasible where greedy strands a station.
+
+
+def assign_stations(detours: np.ndarray, weights: List[float], loads: List[float],
+                    capacities: List[float], regret: bool = False) -> List[Tuple[int, int]]:
+    # Returns (station position, cluster) pairs in assignment order; stations
+    # that end up fitting no cluster are left out
+    k, n = detours.shape
+    ranked = np.argsort(detours, axis=0, kind="stable").T.tolist()
+    loads = list(loads)
+    cursor = [0] * n
+    version = [0] * n
+    assigned = [False] * n
+    heap = []
+    # Per cluster: (-weight, station) of stations whose best or second best
+    # it is, heaviest first, so the ones that stop fitting pop off the top
+    watchers: List[list] = [[] for _ in range(k)]
+
+    def fits(c: int, p: int) -> bool:
+        return loads[c] + weights[p] <= capacities[c]
+
+    def push(p: int) -> bool:
+        # Clusters that are too full stay too full, so the cursor only moves on
+        row = ranked[p]
+        i = cursor[p]
+        while i < k and not fits(row[i], p):
+            i += 1
+        cursor[p] = i
+        if i == k:
+            return False
+        best = row[i]
+        detour = detours[best, p]
+        heapq.heappush(watchers[best], (-weights[p], p))
+        if regret:
+            j = i + 1
+            while j < k and not fits(row[j], p):
+                j += 1
+            if j < k:
+                heapq.heappush(watchers[row[j]], (-weights[p], p))
+                key = (detour - detours[row[j], p], detour)
+            else:
+                key = (-float("inf"), detour)
+        else:
+            key = (detour,)
+        heapq.heappush(heap, (key, p, version[p], best))
+        return True
+
+    for p in range(n):
+        push(p)
+
+    order = []
+    while heap:
+        _, p, ver, c = heapq.heappop(heap)
+        if assigned[p] or ver != version[p]:
+            continue
+        assigned[p] = True
+        loads[c] += weights[p]
+        order.append((p, c))
+
+        watching = watchers[c]
+        while watching and not fits(c, watching[0][1]):
+            _, q = heapq.heappop(watching)
+            if assigned[q]:
+                continue
+            version[q] += 1
+            push(q)
+    return order
@@ -0,0 +1,223 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.solver.matrix import DistanceMatrix
+
+# Packing the unlimited scenario's overflow onto rental vehicles, all of one
+# capacity. The number of bins is settled first: best fit decreasing, then a
+# short search that tries to empty the lightest bins by relocating and
+# swapping items, stopping once the Martello-Toth L2 lower bound is met.
+# With a distance matrix the stations are then regrouped for compact routes
+# without using more bins: a nearest-bin packing capped at that count, and
+# relocations scored on a route length proxy (each stop's link to its
+# nearest neighbour in the bin, depot included).
+# Items must already fit a bin; callers cut heavier stations into pieces.
+
+EPS = 1e-9
+# Passes of each improvement search
+DEFAULT_MAX_ROUNDS = 20
+# Bins a compaction move may send an item to, nearest first
+NEAR_BINS = 3
+
+
+def l2_lower_bound(weights: List[float], capacity: float) -> int:
+    # For every threshold a <= C/2: items over C - a need a bin each, items
+    # in (C/2, C - a] too, and items in [a, C/2] must go into the room the
+    # latter leave or into further bins
+    if not weights:
+        return 0
+    w = np.asarray(weights, dtype=np.float64)
+    half = capacity / 2
+    best = math.ceil(w.sum() / capacity - EPS)
+    for a in [0.0] + sorted({x for x in w.tolist() if x <= half + EPS}):
+        big = w > capacity - a + EPS
+        mid = (w > half + EPS) & ~big
+        small = (w >= a - EPS) & (w <= half + EPS)
+        room = mid.sum() * capacity - w[mid].sum()
+        extra = max(0, math.ceil((w[small].sum() - room) / capacity - EPS))
+        best = max(best, int(big.sum() + mid.sum()) + extra)
+    return best
+
+
+def best_fit_decreasing(weights: List[float], capacity: float) -> List[List[int]]:
+    bins: List[List[int]] = []
+    loads: List[float] = []
+    for i in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        best = None
+        for b, load in enumerate(loads):
+            if load + weights[i] <= capacity + EPS and (best is None or load > loads[best]):
+                best = b
+        if best is None:
+            bins.append([i])
+            loads.append(weights[i])
+        else:
+            bins[best].append(i)
+            loads[best] += weights[i]
+    return bins
+
+
+def pack_bins(items: List[Tuple[int, float]], capacity: float, matrix: Optional[DistanceMatrix] = None,
+              depot_id: Optional[int] = None, max_rounds: int = DEFAULT_MAX_ROUNDS) -> List[List[int]]:
+    # items: (station id, weight); pieces of one station may repeat the id.
+    # Returns bins as lists of item indices.
+    if not items:
+        return []
+    weights = [w for _, w in items]
+    lower = l2_lower_bound(weights, capacity)
+    bins = best_fit_decreasing(weights, capacity)
+
+    while len(bins) > lower:
+        reduced = None
+        for target in sorted(range(len(bins)), key=lambda b: sum(weights[i] for i in bins[b])):
+            reduced = _empty_bin(bins, target, weights, capacity, max_rounds)
+            if reduced is not None:
+                break
+        if reduced is None:
+            break
+        bins = reduced
+
+    if matrix is None:
+        return bins
+
+    values = matrix.values
+    nodes = [matrix.index[sid] for sid, _ in items]
+    depot = matrix.index[depot_id]
+    spreads = [_spread(values, depot, nodes, b) for b in bins]
+    nearest = _nearest_fit(weights, capacity, nodes, values, len(bins))
+    if nearest is not None:
+        nearest_spreads = [_spread(values, depot, nodes, b) for b in nearest]
+        if sum(nearest_spreads) < sum(spreads):
+            bins, spreads = nearest, nearest_spreads
+    return _compact(bins, spreads, weights, capacity, nodes, values, depot, max_rounds)
+
+
+def _empty_bin(bins: List[List[int]], target: int, weights: List[float], capacity: float,
+               max_rounds: int) -> Optional[List[List[int]]]:
+    # Moves the target's items into the other bins, best fit, or swaps each
+    # for a lighter item that leaves its bin within capacity. Every swap
+    # lightens what is still pending, so the search ends either way.
+    others = [list(b) for t, b in enumerate(bins) if t != target]
+    loads = [sum(weights[i] for i in b) for b in others]
+    pending = sorted(bins[target], key=lambda i: -weights[i])
+
+    for _ in range(max_rounds):
+        if not pending:
+            return others
+        progress = False
+        for x in list(pending):
+            wx = weights[x]
+            best = None
+            for b, load in enumerate(loads):
+                if load + wx <= capacity + EPS and (best is None or load > loads[best]):
+                    best = b
+            if best is not None:
+                others[best].append(x)
+                loads[best] += wx
+                pending.remove(x)
+                progress = True
+                continue
+
+            swap = None
+            for b, load in enumerate(loads):
+                for y in others[b]:
+                    wy = weights[y]
+                    if wy < wx - EPS and load - wy + wx <= capacity + EPS and (swap is None or wy < weights[swap[1]]):
+                        swap = (b, y)
+            if swap is not None:
+                b, y = swap
+                others[b].remove(y)
+                others[b].append(x)
+                loads[b] += wx - weights[y]
+                pending[pending.index(x)] = y
+                progress = True
+        pending.sort(key=lambda i: -weights[i])
+        if not progress:
+            break
+    return others if not pending else None
+
+
+def _spread(values: np.ndarray, depot: int, nodes: List[int], members: List[int]) -> float:
+    # Sum of nearest neighbour links over the bin's stops and the depot; a
+    # lone stop costs its round trip
+    if not members:
+        return 0.0
+    idx = np.array([depot] + [nodes[i] for i in members], dtype=np.intp)
+    sub = values[np.ix_(idx, idx)].copy()
+    np.fill_diagonal(sub, np.inf)
+    return float(sub.min(axis=1).sum())
+
+
+def _nearest_fit(weights: List[float], capacity: float, nodes: List[int], values: np.ndarray,
+                 limit: int) -> Optional[List[List[int]]]:
+    # Heaviest first, each item into the bin with room holding its nearest
+    # stop; a new bin only when none has room. None past the limit.
+    # near[i, b] is item i's distance to the nearest stop in bin b.
+    node_of = np.asarray(nodes, dtype=np.intp)
+    near = np.full((len(nodes), limit), np.inf)
+    loads = np.zeros(limit)
+    bins: List[List[int]] = []
+    for i in sorted(range(len(weights)), key=lambda i: -weights[i]):
+        opened = len(bins)
+        room = loads[:opened] + weights[i] <= capacity + EPS
+        if room.any():
+            b = int(np.argmin(np.where(room, near[i, :opened], np.inf)))
+        elif opened == limit:
+            return None
+        else:
+            b = opened
+            bins.append([])
+        bins[b].append(i)
+        loads[b] += weights[i]
+        np.minimum(near[:, b], values[node_of, nodes[i]], out=near[:, b])
+    return bins
+
+
+def _compact(bins: List[List[int]], spreads: List[float], weights: List[float], capacity: float,
+             nodes: List[int], values: np.ndarray, depot: int, max_rounds: int) -> List[List[int]]:
+    # Best relocation of each item by spread. Only the few bins holding the
+    # stops nearest to it, and nearer than its current link, are tried;
+    # moving a bin's last item away drops the bin.
+    bins = [list(b) for b in bins]
+    loads = [sum(weights[i] for i in b) for b in bins]
+    spreads = list(spreads)
+    node_of = np.asarray(nodes, dtype=np.intp)
+    bin_of = np.empty(len(nodes), dtype=np.intp)
+    for b, members in enumerate(bins):
+        bin_of[members] = b
+
+    for _ in range(max_rounds):
+        improved = False
+        for a in range(len(bins)):
+            for x in sorted(bins[a], key=lambda i: -weights[i]):
+                without = [i for i in bins[a] if i != x]
+                row = values[nodes[x]]
+                link = min([row[depot]] + [row[nodes[i]] for i in without])
+                closer = np.flatnonzero(row[node_of] < link - EPS)
+                if not len(closer):
+                    continue
+                closer = closer[np.argsort(row[node_of[closer]], kind="stable")]
+                near = [b for b in dict.fromkeys(bin_of[closer].tolist()) if b != a][:NEAR_BINS]
+                base = _spread(values, depot, nodes, without) - spreads[a]
+                best, best_delta, best_spread = None, -EPS, 0.0
+                for b in near:
+                    if loads[b] + weights[x] > capacity + EPS:
+                        continue
+                    spread = _spread(values, depot, nodes, bins[b] + [x])
+                    delta = base + spread - spreads[b]
+                    if delta < best_delta:
+                        best, best_delta, best_spread = b, delta, spread
+                if best is None:
+                    continue
+                bins[best].append(x)
+                loads[best] += weights[x]
+                spreads[best] = best_spread
+                bin_of[x] = best
+                bins[a] = without
+                loads[a] -= weights[x]
+                spreads[a] = _spread(values, depot, nodes, without)
+                improved = True
+        if not improved:
+            break
+    return [b for b in bins if b]
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.solver.exact import DEFAULT_MAX_STOPS
+from app.solver.local_search import DEFAULT_BATCH_MAX_STOPS, improve_two_opt
+from app.solver.matrix import DistanceMatrix
+
+DEFAULT_ROUTE_CACHE_SIZE = 4096
+
+
+class RouteCostCache:
+    # Bounded LRU of station set -> (route km, visiting order). The cluster
+    # sweep, cost simulation, inter-route moves and final route building
+    # keep asking for the same sets, so each is sequenced once per solve.
+
+    def __init__(self, maxsize: int = DEFAULT_ROUTE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[FrozenSet[int], Tuple[float, List[int]]]" = OrderedDict()
+
+    def __contains__(self, key: FrozenSet[int]) -> bool:
+        return key in self._entries
+
+    def get(self, key: FrozenSet[int]) -> Optional[Tuple[float, List[int]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: FrozenSet[int], distance: float, order: List[int]):
+        self._entries[key] = (distance, list(order))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def entries(self) -> List[Tuple[FrozenSet[int], float, List[int]]]:
+        return [(key, distance, order) for key, (distance, order) in self._entries.items()]
+
+    def merge(self, entries: List[Tuple[FrozenSet[int], float, List[int]]]):
+        # Routes sequenced elsewhere (worker processes); not counted as lookups
+        for key, distance, order in entries:
+            if key not in self._entries:
+                self.put(key, distance, order)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0
+        }
+
+
+class SolverContext:
+    # Everything a single optimize call needs; built per request and passed
+    # down explicitly so concurrent solves never share mutable state.
+
+    def __init__(self, matrix: DistanceMatrix, depot_id: int, route_cache_size: int = DEFAULT_ROUTE_CACHE_SIZE,
+                 exact_max_stops: int = DEFAULT_MAX_STOPS, two_opt_engine: str = "auto",
+                 batch_two_opt_max_stops: int = DEFAULT_BATCH_MAX_STOPS):
+        self.matrix = matrix
+        self.depot_id = depot_id
+        self.route_costs = RouteCostCache(route_cache_size)
+        # Routes up to this many stops are sequenced exactly (Held-Karp)
+        self.exact_max_stops = exact_max_stops
+        self.two_opt_engine = two_opt_engine
+        self.batch_two_opt_max_stops = batch_two_opt_max_stops
+
+    def dist(self, sid1: int, sid2: int) -> float:
+        return self.matrix.between(sid1, sid2)
+
+    def two_opt(self, tour: List[int]) -> float:
+        return improve_two_opt(self.matrix, tour, self.two_opt_engine, self.batch_two_opt_max_stops)
+
+    def to_tour(self, route: List[int]) -> List[int]:
+        index = self.matrix.index
+        depot = index[self.depot_id]
+        return [depot] + [index[sid] for sid in route] + [depot]
+
+    def from_tour(self, tour: List[int]) -> List[int]:
+        ids = self.matrix.ids
+        return [ids[i] for i in tour[1:-1]]
@@ -0,0 +1,100 @@
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from app.solver.binpacking import pack_bins
+from app.solver.matrix import DistanceMatrix
+
+# Cost estimate of candidate clusterings for the unlimited sweep. Clusters
+# go to owned vehicles heaviest first, each vehicle takes its cluster's
+# stations heaviest first and splits the first one that does not fit, and
+# whatever is left overflows to rentals, cut to rental size and packed like
+# the final assignment does (binpacking.pack_bins). A clustering is
+# scored as km * cost_per_km plus the rental fee, with every route's km
+# from one route length oracle. All candidates of a sweep are planned
+# first, so each distinct station set is sequenced once however many
+# candidates share it.
+
+
+class ConfigurationPlan:
+    def __init__(self, owned_routes: List[List[int]], rentals: int, rental_routes: List[List[int]]):
+        self.owned_routes = owned_routes
+        self.rentals = rentals
+        self.rental_routes = rental_routes
+
+
+class ConfigurationEvaluator:
+
+    def __init__(self, weights: Dict[int, float], capacities: List[float], cost_per_km: float,
+                 rental_cost: float, rental_capacity: float, matrix: Optional[DistanceMatrix] = None,
+                 depot_id: Optional[int] = None):
+        self.weights = weights
+        self.capacities = sorted(capacities, reverse=True)
+        self.cost_per_km = cost_per_km
+        self.rental_cost = rental_cost
+        self.rental_capacity = rental_capacity
+        self.matrix = matrix
+        self.depot_id = depot_id
+
+    def plan(self, clusters: List[Dict]) -> ConfigurationPlan:
+        # clusters: {"stations", "total_weight"} dicts, in any order
+        weights = self.weights
+        owned_routes = []
+        overflow: List[Tuple[int, float]] = []
+
+        for i, cluster in enumerate(sorted(clusters, key=lambda c: c["total_weight"], reverse=True)):
+            if i >= len(self.capacities):
+                overflow.extend((sid, weights[sid]) for sid in cluster["stations"])
+                continue
+
+            remaining = self.capacities[i]
+            route = []
+            for sid in sorted(cluster["stations"], key=lambda s: -weights[s]):
+                weight = weights[sid]
+                if weight <= remaining:
+                    route.append(sid)
+                    remaining -= weight
+                elif remaining > 0:
+                    route.append(sid)
+                    overflow.append((sid, weight - remaining))
+                    remaining = 0
+                else:
+                    overflow.append((sid, weight))
+            if route:
+                owned_routes.append(route)
+
+        if not overflow:
+            return ConfigurationPlan(owned_routes, 0, [])
+
+        items = []
+        for sid, weight in overflow:
+            while weight > self.rental_capacity + 1e-9:
+                items.append((sid, self.rental_capacity))
+                weight -= self.rental_capacity
+            items.append((sid, weight))
+        bins = pack_bins(items, self.rental_capacity, self.matrix, self.depot_id)
+        rental_routes = [list(dict.fromkeys(items[i][0] for i in b)) for b in bins]
+        return ConfigurationPlan(owned_routes, len(bins), rental_routes)
+
+    def costs(self, candidates: List[List[Dict]],
+              route_lengths: Callable[[List[List[int]]], List[float]]) -> List[float]:
+        # route_lengths gets every distinct station set once, in first-use order
+        plans = [self.plan(clusters) for clusters in candidates]
+        keys: Dict[FrozenSet[int], int] = {}
+        station_sets = []
+        for plan in plans:
+            for route in plan.owned_routes + plan.rental_routes:
+                key = frozenset(route)
+                if key not in keys:
+                    keys[key] = len(station_sets)
+                    station_sets.append(route)
+        lengths = route_lengths(station_sets)
+
+        costs = []
+        for plan in plans:
+            total = 0
+            for route in plan.owned_routes:
+                total += lengths[keys[frozenset(route)]] * self.cost_per_km
+            total += plan.rentals * self.rental_cost
+            for route in plan.rental_routes:
+                total += lengths[keys[frozenset(route)]] * self.cost_per_km
+            costs.append(total)
+        return costs
@@ -0,0 +1,85 @@
+from itertools import permutations
+from typing import List, Tuple
+
+import numpy as np
+
+from app.solver.matrix import DistanceMatrix
+
+# Held-Karp: exact shortest depot round trip through a small set of stops.
+# best[mask, j] is the shortest walk from the depot through the stops in
+# mask ending at stop j. Masks are filled one popcount layer at a time, so
+# each (layer, j) pair is a single NumPy min over the previous layer.
+# Time O(2^m m^2) and memory O(2^m m), so it is only used up to
+# DEFAULT_MAX_STOPS stops.
+
+DEFAULT_MAX_STOPS = 12
+# Below this many stops trying every order is cheaper than setting up the tables
+ENUMERATE_MAX_STOPS = 4
+
+_LAYERS = {}
+
+
+def _masks_by_size(m: int) -> List[np.ndarray]:
+    if m not in _LAYERS:
+        masks = np.arange(1 << m)
+        sizes = np.zeros(1 << m, dtype=np.int64)
+        for j in range(m):
+            sizes += (masks >> j) & 1
+        _LAYERS[m] = [masks[sizes == s] for s in range(m + 1)]
+    return _LAYERS[m]
+
+
+def held_karp(matrix: DistanceMatrix, depot: int, nodes: List[int]) -> Tuple[float, List[int]]:
+    # depot and nodes are matrix indices; returns (length, nodes in visiting order)
+    m = len(nodes)
+    if m == 0:
+        return 0.0, []
+    if m <= ENUMERATE_MAX_STOPS:
+        data = matrix.data
+        n = matrix.n
+        best_length = float("inf")
+        best_order = None
+        for order in permutations(nodes):
+            length = data[depot * n + order[0]] + data[order[-1] * n + depot]
+            for p in range(m - 1):
+                length += data[order[p] * n + order[p + 1]]
+            if length < best_length:
+                best_length = length
+                best_order = order
+        return float(best_length), list(best_order)
+
+    idx = np.asarray(nodes, dtype=np.intp)
+    d = matrix.values[np.ix_(idx, idx)]
+
+    best = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int8)
+    for j in range(m):
+        best[1 << j, j] = matrix.values[depot, idx[j]]
+
+    layers = _masks_by_size(m)
+    for size in range(2, m + 1):
+        masks = layers[size]
+        for j in range(m):
+            bit = 1 << j
+            with_j = masks[(masks & bit) != 0]
+            prev = with_j ^ bit
+            # Stops outside prev stay at inf, so they never win the min
+            cand = best[prev] + d[:, j]
+            k = np.argmin(cand, axis=1)
+            best[with_j, j] = cand[np.arange(len(with_j)), k]
+            parent[with_j, j] = k
+
+    full = (1 << m) - 1
+    closing = best[full] + matrix.values[idx, depot]
+    j = int(np.argmin(closing))
+    length = float(closing[j])
+
+    order = []
+    mask = full
+    while j >= 0:
+        order.append(nodes[j])
+        prev_j = int(parent[mask, j])
+        mask ^= 1 << j
+        j = prev_j
+    order.reverse()
+    return length, order
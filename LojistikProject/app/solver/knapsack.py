@@ -0,0 +1,109 @@
+import math
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+# Multiple 0/1 knapsack for the limited scenario: choose which cargo
+# requests ride on which vehicle so the accepted value is as large as
+# possible. Vehicles are filled one after another, largest first, each by an
+# exact DP over integer weights on a 1-D table. Weights are rounded up, so a
+# chosen set always fits the real capacity. The weight unit grows when the
+# table would not fit the time budget, and once the budget is spent the
+# remaining vehicles are filled greedily by value density.
+
+DEFAULT_RESOLUTION = 0.1
+DEFAULT_TIME_BUDGET_MS = 500
+# Rough DP throughput (item x capacity cells per ms) and a memory cap for the
+# keep table used to read back the chosen items
+CELLS_PER_MS = 100_000
+MAX_CELLS = 20_000_000
+MIN_UNITS = 50
+
+
+def cargo_values(weights: List[float], counts: List[int], optimization_mode: str) -> List[float]:
+    # max_count values parcels and breaks ties on weight, max_weight the
+    # other way round; a tie-break never outweighs one parcel or 0.05 kg
+    total_weight = sum(weights) + 1.0
+    total_count = sum(counts) + 1.0
+    if optimization_mode == "max_count":
+        return [c + 0.5 * w / total_weight for w, c in zip(weights, counts)]
+    return [w + 0.05 * c / total_count for w, c in zip(weights, counts)]
+
+
+def _greedy_fill(items: List[int], weights: List[float], values: List[float], capacity: float) -> List[int]:
+    chosen = []
+    load = 0.0
+    for i in sorted(items, key=lambda i: -values[i] / max(weights[i], 1e-9)):
+        if load + weights[i] <= capacity + 1e-9:
+            chosen.append(i)
+            load += weights[i]
+    return chosen
+
+
+def _dp_fill(items: List[int], weights: List[float], values: List[float], capacity: float,
+             unit: float) -> List[int]:
+    size = int(math.floor(capacity / unit + 1e-9))
+    scaled = [max(1, int(math.ceil(weights[i] / unit - 1e-9))) for i in items]
+    best = np.zeros(size + 1)
+    keep = np.zeros((len(items), size + 1), dtype=bool)
+
+    for k, (i, w) in enumerate(zip(items, scaled)):
+        if w > size:
+            continue
+        candidate = best[:size + 1 - w] + values[i]
+        better = candidate > best[w:]
+        best[w:] = np.where(better, candidate, best[w:])
+        keep[k, w:] = better
+
+    chosen = []
+    c = size
+    for k in range(len(items) - 1, -1, -1):
+        if keep[k, c]:
+            chosen.append(items[k])
+            c -= scaled[k]
+    chosen.reverse()
+
+    # Rounding up may leave real room for a few more items
+    load = sum(weights[i] for i in chosen)
+    picked = set(chosen)
+    rest = [i for i in items if i not in picked]
+    chosen.extend(_greedy_fill(rest, weights, values, capacity - load))
+    return chosen
+
+
+def multi_knapsack(weights: List[float], values: List[float], capacities: List[float],
+                   time_budget_ms: float = DEFAULT_TIME_BUDGET_MS,
+                   resolution: float = DEFAULT_RESOLUTION) -> Tuple[List[List[int]], List[int]]:
+    # Returns (item indices per capacity, in the given order; rejected indices)
+    started = time.perf_counter()
+    bins: List[List[int]] = [[] for _ in capacities]
+    remaining = [i for i in range(len(weights)) if weights[i] <= max(capacities, default=0) + 1e-9]
+    order = sorted(range(len(capacities)), key=lambda b: -capacities[b])
+
+    for pos, b in enumerate(order):
+        if not remaining:
+            break
+        capacity = capacities[b]
+        candidates = [i for i in remaining if weights[i] <= capacity + 1e-9]
+        if not candidates:
+            continue
+
+        if sum(weights[i] for i in candidates) <= capacity + 1e-9:
+            chosen = candidates
+        else:
+            left_ms = time_budget_ms - (time.perf_counter() - started) * 1000
+            cells = min(MAX_CELLS, max(0.0, left_ms) * CELLS_PER_MS / (len(order) - pos))
+            unit = max(resolution, capacity * len(candidates) / max(cells, 1.0))
+            if capacity / unit >= MIN_UNITS:
+                chosen = _dp_fill(candidates, weights, values, capacity, unit)
+            else:
+                chosen = _greedy_fill(candidates, weights, values, capacity)
+
+        bins[b] = chosen
+        taken = set(chosen)
+        remaining = [i for i in remaining if i not in taken]
+
+    placed = {i for chosen in bins for i in chosen}
+    rejected = [i for i in range(len(weights)) if i not in placed]
+    return bins, rejected
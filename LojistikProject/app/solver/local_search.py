@@ -0,0 +1,413 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.solver.matrix import DistanceMatrix
+
+# Tours are lists of matrix indices that start and end at the depot:
+# [depot, s1, s2, ..., sm, depot]. Every operator edits the list in place
+# and returns the distance it saved.
+
+DEFAULT_NEIGHBORS = 10
+TWO_OPT_ENGINES = ("scalar", "batch", "auto")
+# Up to this many stops the batch engine is faster than the scalar one
+# (scripts/benchmark_solver.py --two-opt); auto switches here
+DEFAULT_BATCH_MAX_STOPS = 100
+
+
+def tour_length(matrix: DistanceMatrix, tour: List[int]) -> float:
+    d = matrix.data
+    n = matrix.n
+    total = 0.0
+    for p in range(len(tour) - 1):
+        total += d[tour[p] * n + tour[p + 1]]
+    return total
+
+
+def nearest_neighbors(matrix: DistanceMatrix, nodes: List[int], k: int = DEFAULT_NEIGHBORS) -> Dict[int, List[int]]:
+    # k closest tour members of every node (by round-trip distance so the
+    # lists stay meaningful on asymmetric road matrices), nearest first.
+    if len(nodes) < 2:
+        return {node: [] for node in nodes}
+    k = min(k, len(nodes) - 1)
+    idx = np.asarray(nodes, dtype=np.intp)
+    sub = matrix.values[np.ix_(idx, idx)]
+    sym = sub + sub.T
+    np.fill_diagonal(sym, np.inf)
+    if k < len(nodes) - 1:
+        nearest = np.argpartition(sym, k - 1, axis=1)[:, :k]
+    else:
+        nearest = np.tile(np.arange(len(nodes)), (len(nodes), 1))
+    result = {}
+    for row, node in enumerate(nodes):
+        cols = [c for c in nearest[row] if c != row]
+        cols.sort(key=lambda c: sym[row, c])
+        result[node] = [nodes[c] for c in cols]
+    return result
+
+
+def _prefix_sums(d, n: int, tour: List[int], fwd: List[float], bwd: List[float], start: int = 0):
+    # fwd[k] = length of tour[0..k] walked forwards, bwd[k] = same walked backwards
+    for p in range(start, len(tour) - 1):
+        a = tour[p]
+        b = tour[p + 1]
+        fwd[p + 1] = fwd[p] + d[a * n + b]
+        bwd[p + 1] = bwd[p] + d[b * n + a]
+
+
+def two_opt(matrix: DistanceMatrix, tour: List[int], k: int = DEFAULT_NEIGHBORS,
+            min_gain: float = 0.01, max_passes: int = 100) -> float:
+    # Move (lo, hi) reverses tour[lo+1..hi], replacing edges (t[lo], t[lo+1])
+    # and (t[hi], t[hi+1]) with (t[lo], t[hi]) and (t[lo+1], t[hi+1]). Its
+    # delta is O(1) from the prefix sums, including the reversed segment
+    # cost on asymmetric matrices. Only moves that create an edge to one of
+    # a node's k nearest neighbours are scored.
+    m = len(tour) - 2
+    if m < 2:
+        return 0.0
+
+    d = matrix.data
+    n = matrix.n
+    depot = tour[0]
+    neighbors = nearest_neighbors(matrix, tour[:-1], k)
+
+    pos = {node: p for p, node in enumerate(tour)}
+    pos[depot] = 0
+    fwd = [0.0] * (m + 2)
+    bwd = [0.0] * (m + 2)
+    _prefix_sums(d, n, tour, fwd, bwd)
+
+    def positions(node):
+        return (0, m + 1) if node == depot else (pos[node],)
+
+    def move_delta(lo, hi):
+        if lo < 0 or hi > m or hi < lo + 2:
+            return 0.0
+        a = tour[lo]
+        b = tour[lo + 1]
+        c = tour[hi]
+        e = tour[hi + 1]
+        return (d[a * n + c] + d[b * n + e] + (bwd[hi] - bwd[lo + 1])
+                - d[a * n + b] - d[c * n + e] - (fwd[hi] - fwd[lo + 1]))
+
+    total_gain = 0.0
+    passes = 0
+    improved = True
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+
+        for a in tour[1:-1] + [depot]:
+            for c in neighbors[a]:
+                best_delta = -min_gain
+                best_move = None
+                for p in positions(a):
+                    for q in positions(c):
+                        if q >= p + 2:
+                            candidates = ((p, q), (p - 1, q - 1))
+                        elif p >= q + 2:
+                            candidates = ((q, p), (q - 1, p - 1))
+                        else:
+                            continue
+                        for lo, hi in candidates:
+                            delta = move_delta(lo, hi)
+                            if delta < best_delta:
+                                best_delta = delta
+                                best_move = (lo, hi)
+
+                if best_move is None:
+                    continue
+
+                lo, hi = best_move
+                tour[lo + 1:hi + 1] = tour[lo + 1:hi + 1][::-1]
+                for p in range(lo + 1, hi + 1):
+                    pos[tour[p]] = p
+                _prefix_sums(d, n, tour, fwd, bwd, lo)
+                total_gain -= best_delta
+                improved = True
+                break
+
+    return total_gain
+
+
+def two_opt_batch(matrix: DistanceMatrix, tour: List[int], min_gain: float = 0.01,
+                  max_moves: int = 1000) -> float:
+    # Same move as two_opt, but the delta of every (lo, hi) pair is one
+    # array expression over the tour's sub-matrix; the best move is applied
+    # and the table rebuilt. O(m^2) per move without neighbour lists, so it
+    # wins on mid-sized tours and loses on long ones.
+    m = len(tour) - 2
+    if m < 2:
+        return 0.0
+
+    total_gain = 0.0
+    for _ in range(max_moves):
+        idx = np.asarray(tour, dtype=np.intp)
+        sub = matrix.values[np.ix_(idx, idx)]
+        edges = np.diagonal(sub, 1)
+        back = np.diagonal(sub, -1)
+        fwd = np.concatenate(([0.0], np.cumsum(edges)))
+        bwd = np.concatenate(([0.0], np.cumsum(back)))
+
+        # rows lo = 0..m-1, columns hi = 0..m; only hi >= lo + 2 is a move
+        delta = (sub[:m, :m + 1] + sub[1:m + 1, 1:m + 2]
+                 + (bwd[None, :m + 1] - bwd[1:m + 1, None])
+                 - (fwd[None, :m + 1] - fwd[1:m + 1, None])
+                 - edges[:m, None] - edges[None, :m + 1])
+        delta[np.tril_indices(m, 1, m + 1)] = np.inf
+
+        best = int(np.argmin(delta))
+        lo, hi = divmod(best, m + 1)
+        if delta[lo, hi] >= -min_gain:
+            break
+        tour[lo + 1:hi + 1] = tour[lo + 1:hi + 1][::-1]
+        total_gain -= float(delta[lo, hi])
+
+    return total_gain
+
+
+def improve_two_opt(matrix: DistanceMatrix, tour: List[int], engine: str = "auto",
+                    batch_max_stops: int = DEFAULT_BATCH_MAX_STOPS) -> float:
+    if engine == "batch" or (engine == "auto" and len(tour) - 2 <= batch_max_stops):
+        return two_opt_batch(matrix, tour)
+    return two_opt(matrix, tour)
+
+
+def or_opt(matrix: DistanceMatrix, tour: List[int], max_segment: int = 3, k: int = DEFAULT_NEIGHBORS,
+           min_gain: float = 0.01, max_moves: int = 10000) -> float:
+    # Relocates chains of 1..max_segment consecutive stops, forwards or
+    # reversed, next to one of their nearest neighbours. Each move is scored
+    # from the three removed and three added edges. Don't-look bits: only
+    # stops whose surroundings changed since their last scan are queued.
+    m = len(tour) - 2
+    if m < 2:
+        return 0.0
+
+    d = matrix.data
+    n = matrix.n
+    depot = tour[0]
+    neighbors = nearest_neighbors(matrix, tour[:-1], k)
+
+    pos = {}
+
+    def reindex():
+        pos.clear()
+        for p in range(1, m + 1):
+            pos[tour[p]] = p
+
+    def insertion_edges(node):
+        # edges (t[j], t[j+1]) that touch the node
+        if node == depot:
+            return (0, m)
+        p = pos[node]
+        return (p - 1, p)
+
+    reindex()
+    queue = list(tour[1:-1])
+    queued = set(queue)
+    total_gain = 0.0
+    moves = 0
+
+    while queue and moves < max_moves:
+        start = queue.pop()
+        queued.discard(start)
+        if start == depot:
+            continue
+
+        best_delta = -min_gain
+        best_move = None
+        i = pos[start]
+
+        for length in range(1, max_segment + 1):
+            last_pos = i + length - 1
+            if last_pos > m:
+                break
+            first = tour[i]
+            last = tour[last_pos]
+            prev = tour[i - 1]
+            nxt = tour[last_pos + 1]
+
+            internal_fwd = 0.0
+            internal_bwd = 0.0
+            for p in range(i, last_pos):
+                internal_fwd += d[tour[p] * n + tour[p + 1]]
+                internal_bwd += d[tour[p + 1] * n + tour[p]]
+
+            removal_gain = d[prev * n + first] + d[last * n + nxt] - d[prev * n + nxt]
+
+            candidate_edges = set()
+            for end in (first, last):
+                for c in neighbors[end]:
+                    for j in insertion_edges(c):
+                        if j < i - 1 or j > last_pos:
+                            candidate_edges.add(j)
+
+            for j in candidate_edges:
+                u = tour[j]
+                v = tour[j + 1]
+                base = d[u * n + v]
+                forward = d[u * n + first] + d[last * n + v] - base
+                if forward - removal_gain < best_delta:
+                    best_delta = forward - removal_gain
+                    best_move = (i, length, j, False)
+                backward = d[u * n + last] + d[first * n + v] - base + internal_bwd - internal_fwd
+                if backward - removal_gain < best_delta:
+                    best_delta = backward - removal_gain
+                    best_move = (i, length, j, True)
+
+        if best_move is None:
+            continue
+
+        i, length, j, reverse = best_move
+        segment = tour[i:i + length]
+        touched = {tour[i - 1], tour[i + length], tour[j], tour[j + 1]}
+        if reverse:
+            segment.reverse()
+        del tour[i:i + length]
+        if j > i:
+            j -= length
+        tour[j + 1:j + 1] = segment
+        reindex()
+
+        total_gain -= best_delta
+        moves += 1
+        for node in touched.union(segment):
+            if node != depot and node not in queued:
+                queue.append(node)
+                queued.add(node)
+
+    return total_gain
+
+
+def inter_route(matrix: DistanceMatrix, tours: List[List[int]], loads: List[float], capacities: List[float],
+                weights: Dict[int, float], k: int = DEFAULT_NEIGHBORS, min_gain: float = 0.01,
+                max_moves: int = 10000,
+                two_opt_pass: Optional[Callable[[List[int]], float]] = None) -> Tuple[float, Set[int]]:
+    # Moves stops between tours that share one depot: relocate a stop next
+    # to a neighbour in another tour, swap two stops, or 2-opt* (cross the
+    # tails of two tours so a stop is followed by its neighbour). Deltas come
+    # from the few edges each move touches, so nothing is re-sequenced while
+    # scoring; after a move only the two tours it changed get a 2-opt pass.
+    # Stops whose tour changed are queued again instead of restarting the
+    # scan. two_opt_pass is the 2-opt to use, scalar two_opt unless given. Edits
+    # tours and loads in place and returns (distance saved, indices of the
+    # tours that changed).
+    d = matrix.data
+    n = matrix.n
+    nodes = [node for tour in tours for node in tour[1:-1]]
+    if len(tours) < 2 or len(nodes) < 2:
+        return 0.0, set()
+    neighbors = nearest_neighbors(matrix, nodes, k)
+    if two_opt_pass is None:
+        two_opt_pass = lambda tour: two_opt(matrix, tour)
+
+    route_of = {}
+    pos = {}
+    prefix: List[List[float]] = [[] for _ in tours]
+
+    def reindex(r):
+        tour = tours[r]
+        acc = [0.0]
+        for p in range(1, len(tour) - 1):
+            route_of[tour[p]] = r
+            pos[tour[p]] = p
+            acc.append(acc[-1] + weights[tour[p]])
+        acc.append(acc[-1])
+        prefix[r] = acc
+
+    for r in range(len(tours)):
+        reindex(r)
+
+    def fits(r, load):
+        return load <= capacities[r] + 1e-9
+
+    queue = list(reversed(nodes))
+    queued = set(queue)
+    total_gain = 0.0
+    changed: Set[int] = set()
+    moves = 0
+
+    while queue and moves < max_moves:
+        u = queue.pop()
+        queued.discard(u)
+        a = route_of[u]
+        tour_a = tours[a]
+        pu = pos[u]
+        prev_u = tour_a[pu - 1]
+        next_u = tour_a[pu + 1]
+        wu = weights[u]
+        removal_gain = d[prev_u * n + u] + d[u * n + next_u] - d[prev_u * n + next_u]
+
+        best_delta = -min_gain
+        best_move = None
+        for v in neighbors[u]:
+            b = route_of[v]
+            if b == a:
+                continue
+            tour_b = tours[b]
+            pv = pos[v]
+            prev_v = tour_b[pv - 1]
+            next_v = tour_b[pv + 1]
+            wv = weights[v]
+
+            # relocate u before or after v
+            if fits(b, loads[b] + wu):
+                for x, y, at in ((prev_v, v, pv), (v, next_v, pv + 1)):
+                    delta = d[x * n + u] + d[u * n + y] - d[x * n + y] - removal_gain
+                    if delta < best_delta:
+                        best_delta = delta
+                        best_move = ("relocate", a, pu, b, at)
+
+            # swap u and v
+            if fits(a, loads[a] - wu + wv) and fits(b, loads[b] - wv + wu):
+                delta = (d[prev_u * n + v] + d[v * n + next_u] - d[prev_u * n + u] - d[u * n + next_u]
+                         + d[prev_v * n + u] + d[u * n + next_v] - d[prev_v * n + v] - d[v * n + next_v])
+                if delta < best_delta:
+                    best_delta = delta
+                    best_move = ("swap", a, pu, b, pv)
+
+            # 2-opt*: a keeps its head up to u and continues with v's tail
+            # (u -> v), or b keeps its head up to v and continues with u (v -> u)
+            head_a = prefix[a][pu]
+            head_b = prefix[b][pv - 1]
+            if fits(a, head_a + loads[b] - head_b) and fits(b, head_b + loads[a] - head_a):
+                delta = d[u * n + v] + d[prev_v * n + next_u] - d[u * n + next_u] - d[prev_v * n + v]
+                if delta < best_delta:
+                    best_delta = delta
+                    best_move = ("cross", a, pu + 1, b, pv)
+            head_a = prefix[a][pu - 1]
+            head_b = prefix[b][pv]
+            if fits(b, head_b + loads[a] - head_a) and fits(a, head_a + loads[b] - head_b):
+                delta = d[v * n + u] + d[prev_u * n + next_v] - d[v * n + next_v] - d[prev_u * n + u]
+                if delta < best_delta:
+                    best_delta = delta
+                    best_move = ("cross", a, pu, b, pv + 1)
+
+        if best_move is None:
+            continue
+
+        kind, a, i, b, j = best_move
+        tour_a = tours[a]
+        tour_b = tours[b]
+        if kind == "relocate":
+            tour_b.insert(j, tour_a.pop(i))
+        elif kind == "swap":
+            tour_a[i], tour_b[j] = tour_b[j], tour_a[i]
+        else:
+            # tour_a[i:] and tour_b[j:] are the tails, both ending at the depot
+            tours[a], tours[b] = tour_a[:i] + tour_b[j:], tour_b[:j] + tour_a[i:]
+
+        gain = -best_delta
+        for r in (a, b):
+            gain += two_opt_pass(tours[r])
+            reindex(r)
+            loads[r] = prefix[r][-1]
+            for node in tours[r][1:-1]:
+                if node not in queued:
+                    queue.append(node)
+                    queued.add(node)
+        total_gain += gain
+        changed.update((a, b))
+        moves += 1
+
+    return total_gain, changed
@@ -0,0 +1,132 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat/2) * math.sin(dlat/2) + \
+        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
+        math.sin(dlon/2) * math.sin(dlon/2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_matrix(coords: List[Tuple[float, float]]) -> np.ndarray:
+    # Full n x n great-circle matrix. Same distance as haversine_km, computed
+    # from the chord between unit vectors: one (n x 3) @ (3 x n) product and a
+    # few in-place passes instead of n^2 Python calls with six trig ops each.
+    n = len(coords)
+    if n == 0:
+        return np.zeros((0, 0))
+    latlon = np.radians(np.asarray(coords, dtype=np.float64))
+    lat = latlon[:, 0]
+    lon = latlon[:, 1]
+    cos_lat = np.cos(lat)
+    points = np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+    dist = points @ points.T
+    dist *= -2.0
+    dist += 2.0
+    np.clip(dist, 0.0, 4.0, out=dist)
+    np.sqrt(dist, out=dist)
+    dist *= 0.5
+    np.arcsin(dist, out=dist)
+    dist *= 2 * EARTH_RADIUS_KM
+    np.fill_diagonal(dist, 0.0)
+    return dist
+
+
+class DistanceMatrix:
+    # Row-major n x n matrix of km distances; station ids are mapped to
+    # 0..n-1 once so solver loops can work on plain integer indices.
+    # It also answers the old {(from_id, to_id): km} dict interface.
+    # straight_line marks great-circle values: symmetric, and never shorter
+    # than the flat distances SpatialIndex bounds its searches with. Road
+    # tables may be neither.
+
+    def __init__(self, station_ids: List[int], values: np.ndarray, straight_line: bool = False):
+        self.ids = list(station_ids)
+        self.straight_line = straight_line
+        self.n = len(self.ids)
+        self.index = {sid: i for i, sid in enumerate(self.ids)}
+        self.values = np.ascontiguousarray(values, dtype=np.float64).reshape(self.n, self.n)
+        # Flat zero-copy view; scalar reads on it are several times cheaper
+        # than indexing the ndarray itself.
+        self.data = memoryview(self.values).cast("B").cast("d")
+
+    def __getstate__(self):
+        # memoryviews do not pickle; ship the ids and array and rebuild the view
+        return {"ids": self.ids, "values": self.values, "straight_line": self.straight_line}
+
+    def __setstate__(self, state):
+        self.__init__(state["ids"], state["values"], state.get("straight_line", False))
+
+    @classmethod
+    def from_coordinates(cls, station_ids: List[int], coords: List[Tuple[float, float]]) -> "DistanceMatrix":
+        return cls(station_ids, haversine_matrix(coords), straight_line=True)
+
+    @classmethod
+    def from_pairs(cls, station_ids: List[int], coords: List[Tuple[float, float]],
+                   pairs: Optional[Dict[Tuple[int, int], float]] = None) -> "DistanceMatrix":
+        # Missing or zero entries are filled with the great-circle distance
+        # here, so lookups never have to fall back during a solve.
+        values = haversine_matrix(coords)
+        straight_line = True
+        if isinstance(pairs, DistanceMatrix) and all(sid in pairs.index for sid in station_ids):
+            idx = np.fromiter((pairs.index[sid] for sid in station_ids), dtype=np.intp, count=len(station_ids))
+            known = pairs.values[np.ix_(idx, idx)]
+            values = np.where(known != 0, known, values)
+            straight_line = pairs.straight_line
+        elif pairs:
+            for i, from_id in enumerate(station_ids):
+                for j, to_id in enumerate(station_ids):
+                    if i != j:
+                        dist = pairs.get((from_id, to_id), 0)
+                        if dist != 0:
+                            values[i, j] = dist
+                            straight_line = False
+        return cls(station_ids, values, straight_line)
+
+    def subset(self, station_ids: List[int]) -> "DistanceMatrix":
+        idx = np.fromiter((self.index[sid] for sid in station_ids), dtype=np.intp, count=len(station_ids))
+        return DistanceMatrix(station_ids, self.values[np.ix_(idx, idx)], self.straight_line)
+
+    def dist(self, i: int, j: int) -> float:
+        return self.data[i * self.n + j]
+
+    def between(self, sid1: int, sid2: int) -> float:
+        index = self.index
+        return self.data[index[sid1] * self.n + index[sid2]]
+
+    def row(self, i: int) -> np.ndarray:
+        return self.values[i]
+
+    def get(self, key: Tuple[int, int], default: float = 0) -> float:
+        sid1, sid2 = key
+        if sid1 not in self.index or sid2 not in self.index:
+            return default
+        return self.between(sid1, sid2)
+
+    def __getitem__(self, key: Tuple[int, int]) -> float:
+        sid1, sid2 = key
+        return self.between(sid1, sid2)
+
+    def __contains__(self, key) -> bool:
+        sid1, sid2 = key
+        return sid1 != sid2 and sid1 in self.index and sid2 in self.index
+
+    def __len__(self) -> int:
+        return self.n * (self.n - 1)
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], float]]:
+        ids = self.ids
+        for i, from_id in enumerate(ids):
+            row = i * self.n
+            for j, to_id in enumerate(ids):
+                if i != j:
+                    yield (from_id, to_id), self.data[row + j]
@@ -0,0 +1,120 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from app.solver.context import SolverContext
+from app.solver.problem import FleetVehicle, Location
+
+
+class SweepProblem:
+    # Picklable snapshot of one optimize call: what the cluster configuration
+    # evaluators read, as plain ids, arrays and problem types. It is shipped
+    # to each worker process once per sweep.
+
+    def __init__(self, ctx: SolverContext, depot: Location, cargo_data: Dict, vehicles: List[FleetVehicle]):
+        self.depot = depot
+        self.matrix = ctx.matrix
+        self.station_ids = list(cargo_data.keys())
+        self.weights = np.array([cargo_data[sid]["total_weight"] for sid in self.station_ids], dtype=np.float64)
+        self.counts = np.array([cargo_data[sid]["total_count"] for sid in self.station_ids], dtype=np.int64)
+        self.stations = [cargo_data[sid]["station"] for sid in self.station_ids]
+        self.vehicles = list(vehicles)
+        self.exact_max_stops = ctx.exact_max_stops
+        self.two_opt_engine = ctx.two_opt_engine
+        self.batch_two_opt_max_stops = ctx.batch_two_opt_max_stops
+        self._ctx = ctx
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_ctx"] = None
+        return state
+
+    def context(self) -> SolverContext:
+        # The caller's context in-process (its route cache is reused later),
+        # one fresh context per worker process otherwise.
+        if self._ctx is None:
+            self._ctx = SolverContext(self.matrix, self.depot.id, exact_max_stops=self.exact_max_stops,
+                                      two_opt_engine=self.two_opt_engine,
+                                      batch_two_opt_max_stops=self.batch_two_opt_max_stops)
+        return self._ctx
+
+    def route_entries(self) -> List[Tuple[FrozenSet[int], float, List[int]]]:
+        return self._ctx.route_costs.entries() if self._ctx is not None else []
+
+    def cargo_data(self) -> Dict:
+        return {
+            sid: {"station": self.stations[i], "total_weight": float(self.weights[i]),
+                  "total_count": int(self.counts[i])}
+            for i, sid in enumerate(self.station_ids)
+        }
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # One pool per process, started on first use and kept for later solves.
+    # Workers are spawned (forkserver where available) rather than forked,
+    # as solves run on the web server's threads.
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+
+def _run_chunk(job):
+    # The worker's copy of a SweepProblem starts with an empty route cache;
+    # whatever it sequences goes back to the caller with the results
+    evaluate, problem, args = job
+    results = [evaluate(problem, arg) for arg in args]
+    entries = problem.route_entries() if isinstance(problem, SweepProblem) else []
+    return results, entries
+
+
+def evaluate_configurations(evaluate: Callable, problem, args: List,
+                            max_workers: int = 1) -> List:
+    # Runs evaluate(problem, arg) for every arg and returns the results in
+    # the order of args, so picking the best one stays deterministic.
+    # evaluate must be a module-level function and problem a picklable
+    # snapshot (SweepProblem, RegionBatch) to cross process boundaries.
+    # args are dealt round-robin into one chunk per worker, so the problem
+    # is pickled once per worker and not once per arg.
+    workers = min(max_workers, len(args))
+    if workers <= 1:
+        return [evaluate(problem, arg) for arg in args]
+
+    try:
+        pool = _get_pool(workers)
+        chunks = list(pool.map(_run_chunk, [(evaluate, problem, args[w::workers]) for w in range(workers)]))
+    except (OSError, BrokenProcessPool) as e:
+        print(f"⚠️ Paralel değerlendirme başarısız, sıralı devam ediliyor: {e}")
+        shutdown_pool()
+        return [evaluate(problem, arg) for arg in args]
+
+    results = [None] * len(args)
+    for w, (chunk, entries) in enumerate(chunks):
+        results[w::workers] = chunk
+        if entries:
+            problem.context().route_costs.merge(entries)
+    return results
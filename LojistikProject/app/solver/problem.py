@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.solver.matrix import DistanceMatrix
+
+# Plain, picklable problem and solution types for the VRP solver. They carry
+# the same attribute names as the ORM rows they are built from (id, name,
+# latitude, capacity, ...) so solver code reads the same either way, but
+# nothing here touches SQLAlchemy.
+
+
+class Location:
+    def __init__(self, id: int, name: str, latitude: float, longitude: float):
+        self.id = id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class Demand:
+    # One cargo request, or all cargo at a station when request_id is None.
+    # The limited scenario accepts or rejects demands one by one.
+    def __init__(self, station: Location, weight: float, count: int, request_id: Optional[int] = None):
+        self.station = station
+        self.weight = weight
+        self.count = count
+        self.request_id = request_id
+
+
+class FleetVehicle:
+    # id is None for vehicles the solver decided to rent; they are created
+    # when the solution is persisted.
+    def __init__(self, id: Optional[int], name: str, capacity: float,
+                 is_rented: bool = False, rental_cost: float = 0.0):
+        self.id = id
+        self.name = name
+        self.capacity = capacity
+        self.is_rented = is_rented
+        self.rental_cost = rental_cost
+
+
+class VRPProblem:
+    def __init__(self, depot: Location, demands: List[Demand], vehicles: List[FleetVehicle],
+                 matrix: Optional[DistanceMatrix] = None, scenario_type: str = "unlimited",
+                 cost_per_km: float = 1.0, rental_cost: float = 200.0, rental_capacity: float = 500.0,
+                 optimization_mode: str = "max_count", algorithm: str = "greedy",
+                 time_limit_ms: int = 1000, seed: int = 0, construction: str = "clusters",
+                 initial_routes: Optional[List[Tuple[Optional[int], List[int]]]] = None):
+        self.depot = depot
+        self.demands = demands
+        self.vehicles = vehicles
+        self.scenario_type = scenario_type
+        self.cost_per_km = cost_per_km
+        self.rental_cost = rental_cost
+        self.rental_capacity = rental_capacity
+        self.optimization_mode = optimization_mode
+        # algorithm "alns" spends up to time_limit_ms improving the greedy
+        # solution; seed makes that search repeatable
+        self.algorithm = algorithm
+        self.time_limit_ms = time_limit_ms
+        self.seed = seed
+        # unlimited scenario start: "clusters" sweep, "savings" (Clarke-Wright)
+        # or "split" (Prins giant-tour split)
+        self.construction = construction
+        # (vehicle id or None for a rental, station ids) of a stored plan to
+        # start from instead of constructing one
+        self.initial_routes = initial_routes
+
+        if matrix is None:
+            locations = list({loc.id: loc for loc in [depot] + [d.station for d in demands]}.values())
+            matrix = DistanceMatrix.from_coordinates(
+                [loc.id for loc in locations], [(loc.latitude, loc.longitude) for loc in locations]
+            )
+        self.matrix = matrix
+
+    def cargo_data(self) -> Dict:
+        # station id -> {"station", "total_weight", "total_count"}, the shape
+        # the solver heuristics work on
+        cargo_data = {}
+        for demand in self.demands:
+            sid = demand.station.id
+            if sid not in cargo_data:
+                cargo_data[sid] = {"station": demand.station, "total_weight": 0.0, "total_count": 0}
+            cargo_data[sid]["total_weight"] += demand.weight
+            cargo_data[sid]["total_count"] += demand.count
+        return cargo_data
+
+
+class PlannedRoute:
+    # loads: station id -> {"weight", "count", "is_partial"} carried on this route
+    def __init__(self, vehicle: FleetVehicle, stops: List[int], path: List[Dict], logs: List[str],
+                 distance: float, cost: float, weight: float, count: int, scenario_type: str,
+                 loads: Optional[Dict] = None):
+        self.vehicle = vehicle
+        self.stops = stops
+        self.loads = loads or {}
+        self.path = path
+        self.logs = logs
+        self.distance = distance
+        self.cost = cost
+        self.weight = weight
+        self.count = count
+        self.scenario_type = scenario_type
+
+
+class VRPSolution:
+    def __init__(self, routes: List[PlannedRoute], rejected_count: int = 0, rejected_weight: float = 0.0,
+                 route_cache: Optional[Dict] = None, rejected_requests: Optional[List[int]] = None):
+        self.routes = routes
+        self.rejected_count = rejected_count
+        self.rejected_weight = rejected_weight
+        # request ids of demands left out in the limited scenario
+        self.rejected_requests = rejected_requests or []
+        self.route_cache = route_cache or {}
+        self.algorithm = "greedy"
+        # True only when the stored initial routes were actually used
+        self.warm_started = False
+        # [{"ms", "iteration", "cost"}] each time the search found a new best
+        self.improvement_curve: List[Dict] = []
+
+    @property
+    def total_cost(self) -> float:
+        return sum(r.cost for r in self.routes)
+
+    @property
+    def total_distance(self) -> float:
+        return sum(r.distance for r in self.routes)
+
+    @property
+    def rented_vehicles(self) -> List[FleetVehicle]:
+        seen = []
+        for r in self.routes:
+            if r.vehicle.id is None and r.vehicle not in seen:
+                seen.append(r.vehicle)
+        return seen
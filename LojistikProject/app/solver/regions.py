@@ -0,0 +1,60 @@
+import math
+from typing import Dict, List
+
+from app.solver.problem import FleetVehicle, Location, VRPProblem
+
+# Geographic decomposition for large days: stations are cut into angular
+# sectors around the depot with about the same number of stations each,
+# so every region is a small VRP of its own.
+
+
+class RegionBatch:
+    # Picklable input of the parallel region solves: one sub-problem per
+    # region and the solver settings the workers should use, as VRPSolver
+    # keyword arguments
+    def __init__(self, problems: List[VRPProblem], solver_settings: Dict):
+        self.problems = problems
+        self.solver_settings = solver_settings
+
+
+def partition_by_angle(depot: Location, stations: List[Location], region_size: int) -> List[List[int]]:
+    # Returns station id lists, one per sector, in angular order so that
+    # consecutive regions (and the last and first) are neighbours
+    if not stations:
+        return []
+    scale = math.cos(math.radians(depot.latitude))
+    angles = sorted(
+        (math.atan2(s.latitude - depot.latitude, (s.longitude - depot.longitude) * scale), s.id)
+        for s in stations
+    )
+    # Start the sweep after the widest empty wedge so no region straddles it
+    gaps = [
+        (angles[(i + 1) % len(angles)][0] - angles[i][0]) % (2 * math.pi)
+        for i in range(len(angles))
+    ]
+    start = (max(range(len(gaps)), key=lambda i: gaps[i]) + 1) % len(angles)
+    ordered = [sid for _, sid in angles[start:] + angles[:start]]
+
+    k = max(1, math.ceil(len(ordered) / max(region_size, 1)))
+    bounds = [round(i * len(ordered) / k) for i in range(k + 1)]
+    return [ordered[bounds[i]:bounds[i + 1]] for i in range(k)]
+
+
+def allocate_vehicles(region_weights: List[float], vehicles: List[FleetVehicle]) -> List[List[FleetVehicle]]:
+    # Largest vehicle first to the region with the most cargo not yet covered
+    uncovered = list(region_weights)
+    allocation: List[List[FleetVehicle]] = [[] for _ in region_weights]
+    for vehicle in sorted(vehicles, key=lambda v: -v.capacity):
+        r = max(range(len(uncovered)), key=lambda i: uncovered[i])
+        allocation[r].append(vehicle)
+        uncovered[r] -= vehicle.capacity
+    return allocation
+
+
+def region_of(stops: List[int], region_index: Dict[int, int]) -> int:
+    # Region holding most of a route's stops
+    votes: Dict[int, int] = {}
+    for sid in stops:
+        r = region_index[sid]
+        votes[r] = votes.get(r, 0) + 1
+    return max(votes, key=lambda r: (votes[r], -r))
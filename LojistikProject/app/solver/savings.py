@@ -0,0 +1,107 @@
+import heapq
+from typing import List, Tuple
+
+import numpy as np
+
+from app.solver.matrix import DistanceMatrix
+
+# Parallel Clarke-Wright savings. Every stop starts on its own depot round
+# trip; joining two routes end-to-start through (i, j) saves
+# d(i, depot) + d(depot, j) - d(i, j). Savings are put on a heap once and
+# merges are applied best-first while they keep the fleet feasible.
+
+DEFAULT_CANDIDATES = 40
+
+
+def fleet_fits(loads: List[float], owned_capacities: List[float], rental_capacity: float) -> bool:
+    # Routes heavier than a rental need their own owned vehicle; matching the
+    # heaviest such route with the largest vehicle and so on decides it.
+    big = sorted((l for l in loads if l > rental_capacity + 1e-9), reverse=True)
+    if len(big) > len(owned_capacities):
+        return False
+    return all(load <= cap + 1e-9 for load, cap in zip(big, owned_capacities))
+
+
+def savings_routes(matrix: DistanceMatrix, depot_id: int, items: List[Tuple[int, float]],
+                   owned_capacities: List[float], rental_capacity: float,
+                   k: int = DEFAULT_CANDIDATES) -> List[List[int]]:
+    # items: (station id, weight) per stop; pieces of one station may repeat
+    # the id but never share a route. Returns routes as lists of item indices.
+    m = len(items)
+    if m == 0:
+        return []
+    owned = sorted(owned_capacities, reverse=True)
+
+    idx = np.fromiter((matrix.index[sid] for sid, _ in items), dtype=np.intp, count=m)
+    depot = matrix.index[depot_id]
+    to_depot = matrix.values[idx, depot]
+    from_depot = matrix.values[depot, idx]
+    between = matrix.values[np.ix_(idx, idx)]
+    # Best orientation of each pair; the final route polish fixes direction
+    savings = to_depot[:, None] + from_depot[None, :] - between
+    savings = np.maximum(savings, savings.T)
+    np.fill_diagonal(savings, -np.inf)
+
+    # Only each stop's k best partners go on the heap
+    k = min(k, m - 1)
+    heap = []
+    if k > 0:
+        if k < m - 1:
+            partners = np.argpartition(-savings, k - 1, axis=1)[:, :k]
+        else:
+            partners = np.tile(np.arange(m), (m, 1))
+        seen = set()
+        for i in range(m):
+            for j in partners[i]:
+                j = int(j)
+                if i == j or items[i][0] == items[j][0]:
+                    continue
+                pair = (i, j) if i < j else (j, i)
+                if pair in seen or savings[i, j] <= 0:
+                    continue
+                seen.add(pair)
+                heap.append((-float(savings[i, j]), pair[0], pair[1]))
+    heapq.heapify(heap)
+
+    route_of = list(range(m))
+    routes = {r: [r] for r in range(m)}
+    loads = {r: items[r][1] for r in range(m)}
+    sids = {r: {items[r][0]} for r in range(m)}
+    heavy = {r: l for r, l in loads.items() if l > rental_capacity + 1e-9}
+
+    while heap:
+        _, i, j = heapq.heappop(heap)
+        ri = route_of[i]
+        rj = route_of[j]
+        if ri == rj:
+            continue
+        a = routes[ri]
+        b = routes[rj]
+        # Both stops must still touch the depot
+        if i not in (a[0], a[-1]) or j not in (b[0], b[-1]):
+            continue
+        if sids[ri] & sids[rj]:
+            continue
+        merged_load = loads[ri] + loads[rj]
+        if merged_load > rental_capacity + 1e-9:
+            # Only routes too heavy for a rental compete for owned vehicles
+            trial = [l for r, l in heavy.items() if r != ri and r != rj] + [merged_load]
+            if not fleet_fits(trial, owned, rental_capacity):
+                continue
+            heavy.pop(rj, None)
+            heavy[ri] = merged_load
+
+        if a[-1] != i:
+            a.reverse()
+        if b[0] != j:
+            b.reverse()
+        a.extend(b)
+        loads[ri] = merged_load
+        sids[ri] |= sids[rj]
+        for stop in b:
+            route_of[stop] = ri
+        del routes[rj]
+        del loads[rj]
+        del sids[rj]
+
+    return [routes[r] for r in sorted(routes)]
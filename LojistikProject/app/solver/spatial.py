@@ -0,0 +1,93 @@
+import math
+from typing import Dict, Iterator, List, Tuple
+
+from app.solver.matrix import EARTH_RADIUS_KM
+from app.solver.problem import Location
+
+# Uniform grid over station coordinates for neighbour searches. Stations are
+# projected to flat km (equirectangular, with the east-west scale of the
+# northernmost station) and shrunk a little more, so over a region up to
+# country size the flat distance between two stations never exceeds their
+# great-circle distance. Road distances are never shorter than the straight
+# line either, so anything a query skips is at least that far away in the
+# solver matrix.
+# Callers still compare exact matrix distances on what the grid returns.
+# Built with bounded=False (road tables, which may be asymmetric or come
+# out shorter than the flat distance) it prunes nothing: within returns
+# every station left and rings a single ring holding all of them.
+
+SHRINK = 0.98
+# Target stations per cell
+CELL_OCCUPANCY = 2
+
+
+class SpatialIndex:
+
+    def __init__(self, stations: List[Location], bounded: bool = True):
+        self.bounded = bounded
+        scale = math.cos(math.radians(max((abs(s.latitude) for s in stations), default=0.0)))
+        km = math.radians(1) * EARTH_RADIUS_KM * SHRINK
+        self.positions: Dict[int, Tuple[float, float]] = {
+            s.id: (s.longitude * km * scale, s.latitude * km) for s in stations
+        }
+
+        xs = [p[0] for p in self.positions.values()]
+        ys = [p[1] for p in self.positions.values()]
+        width = max(xs, default=0.0) - min(xs, default=0.0)
+        height = max(ys, default=0.0) - min(ys, default=0.0)
+        n = max(len(stations), 1)
+        if width > 0 and height > 0:
+            self.cell = math.sqrt(width * height * CELL_OCCUPANCY / n)
+        else:
+            self.cell = max(width, height, 1.0) / n
+
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for sid, pos in self.positions.items():
+            self.cells.setdefault(self._cell_of(pos), []).append(sid)
+        keys = list(self.cells) or [(0, 0)]
+        self._bounds = (min(k[0] for k in keys), max(k[0] for k in keys),
+                        min(k[1] for k in keys), max(k[1] for k in keys))
+
+    def _cell_of(self, pos: Tuple[float, float]) -> Tuple[int, int]:
+        return int(math.floor(pos[0] / self.cell)), int(math.floor(pos[1] / self.cell))
+
+    def remove(self, sid: int):
+        self.cells[self._cell_of(self.positions[sid])].remove(sid)
+
+    def within(self, sid: int, radius: float) -> List[int]:
+        # Stations whose flat distance to sid is at most radius: a superset
+        # of those within radius km in the matrix
+        if not self.bounded:
+            return [other for ids in self.cells.values() for other in ids]
+        x, y = self.positions[sid]
+        ci, cj = self._cell_of((x, y))
+        reach = int(math.ceil(radius / self.cell))
+        radius_sq = radius * radius
+        found = []
+        for i in range(ci - reach, ci + reach + 1):
+            for j in range(cj - reach, cj + reach + 1):
+                for other in self.cells.get((i, j), ()):
+                    ox, oy = self.positions[other]
+                    if (ox - x) ** 2 + (oy - y) ** 2 <= radius_sq:
+                        found.append(other)
+        return found
+
+    def rings(self, sid: int) -> Iterator[Tuple[float, List[int]]]:
+        # Square rings of cells around sid, nearest first. With each ring
+        # comes a distance every station in the later rings is at least
+        # away, so callers can stop as soon as it beats their best candidate.
+        if not self.bounded:
+            yield float("inf"), [other for ids in self.cells.values() for other in ids]
+            return
+        ci, cj = self._cell_of(self.positions[sid])
+        min_i, max_i, min_j, max_j = self._bounds
+        last = max(ci - min_i, max_i - ci, cj - min_j, max_j - cj, 0)
+        cells = self.cells
+        for k in range(last + 1):
+            if k == 0:
+                ring = [(ci, cj)]
+            else:
+                ring = [(i, j) for i in range(ci - k, ci + k + 1) for j in (cj - k, cj + k)]
+                ring += [(i, j) for i in (ci - k, ci + k) for j in range(cj - k + 1, cj + k)]
+            ids = [other for key in ring for other in cells.get(key, ())]
+            yield k * self.cell, ids
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+
+from app.solver.matrix import DistanceMatrix
+
+# Prins' Split: cut a giant tour into depot round trips by a shortest path
+# over tour positions, where arc (i, j) is one trip serving items i..j-1.
+# The fleet is heterogeneous and partly limited, so each position keeps a
+# small Pareto set of labels (cost, owned vehicles used per capacity type)
+# instead of a single cost; rentals are unlimited and cost rental_cost each.
+
+DEFAULT_MAX_LABELS = 64
+
+
+def _prune(labels: List[tuple], max_labels: int) -> List[tuple]:
+    # Drop labels that cost more and use at least as many owned vehicles
+    labels.sort(key=lambda label: label[0])
+    kept = []
+    for label in labels:
+        used = label[1]
+        if any(all(a <= b for a, b in zip(k[1], used)) for k in kept):
+            continue
+        kept.append(label)
+        if len(kept) >= max_labels:
+            break
+    return kept
+
+
+def split_tour(matrix: DistanceMatrix, depot_id: int, items: List[Tuple[int, float]],
+               owned_capacities: List[float], rental_capacity: float, rental_cost: float,
+               cost_per_km: float, max_labels: int = DEFAULT_MAX_LABELS) -> List[Tuple[int, int, float]]:
+    # items: (station id, weight) in giant-tour order. Returns trips as
+    # (start, end, capacity) item ranges, where capacity is the owned
+    # vehicle type used or None for a rental.
+    m = len(items)
+    if m == 0:
+        return []
+
+    types = sorted(set(owned_capacities), reverse=True)
+    counts = [owned_capacities.count(c) for c in types]
+    max_capacity = max(types + [rental_capacity])
+    d = matrix.data
+    n = matrix.n
+    index = matrix.index
+    depot = index[depot_id]
+    nodes = [index[sid] for sid, _ in items]
+
+    # label: (cost, used per type, previous position, previous label, type or -1)
+    labels: List[List[tuple]] = [[] for _ in range(m + 1)]
+    labels[0] = [(0.0, tuple([0] * len(types)), -1, -1, -1)]
+
+    for i in range(m):
+        if not labels[i]:
+            continue
+        labels[i] = _prune(labels[i], max_labels)
+
+        load = 0.0
+        inner = 0.0
+        seen = set()
+        for j in range(i, m):
+            sid, weight = items[j]
+            if sid in seen:
+                break
+            seen.add(sid)
+            load += weight
+            if load > max_capacity + 1e-9:
+                break
+            if j > i:
+                inner += d[nodes[j - 1] * n + nodes[j]]
+            trip = (d[depot * n + nodes[i]] + inner + d[nodes[j] * n + depot]) * cost_per_km
+
+            target = labels[j + 1]
+            for li, (cost, used, _, _, _) in enumerate(labels[i]):
+                if load <= rental_capacity + 1e-9:
+                    target.append((cost + trip + rental_cost, used, i, li, -1))
+                for t, cap in enumerate(types):
+                    if cap + 1e-9 >= load and used[t] < counts[t]:
+                        more = used[:t] + (used[t] + 1,) + used[t + 1:]
+                        target.append((cost + trip, more, i, li, t))
+
+    if not labels[m]:
+        return []
+    labels[m] = _prune(labels[m], max_labels)
+
+    trips = []
+    pos = m
+    li = 0
+    while pos > 0:
+        _, _, prev, prev_li, t = labels[pos][li]
+        trips.append((prev, pos, types[t] if t >= 0 else None))
+        pos = prev
+        li = prev_li
+    trips.reverse()
+    return trips
@@ -0,0 +1,1668 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.solver.alns import ALNS, ALNSRoute
+from app.solver.assignment import assign_stations
+from app.solver.binpacking import l2_lower_bound, pack_bins
+from app.solver.context import SolverContext
+from app.solver.evaluation import ConfigurationEvaluator
+from app.solver.exact import DEFAULT_MAX_STOPS, held_karp
+from app.solver.knapsack import DEFAULT_TIME_BUDGET_MS, cargo_values, multi_knapsack
+from app.solver.local_search import DEFAULT_BATCH_MAX_STOPS, inter_route, or_opt
+from app.solver.matrix import DistanceMatrix
+from app.solver.parallel import SweepProblem, evaluate_configurations
+from app.solver.problem import Demand, FleetVehicle, Location, PlannedRoute, VRPProblem, VRPSolution
+from app.solver.regions import RegionBatch, allocate_vehicles, partition_by_angle, region_of
+from app.solver.savings import savings_routes
+from app.solver.spatial import SpatialIndex
+from app.solver.split import split_tour
+
+ALGORITHMS = ("greedy", "alns")
+CONSTRUCTIONS = ("clusters", "savings", "split")
+# ALNS iterations per stop when repairing the routes of two neighbouring regions
+BOUNDARY_ITERATIONS_PER_STOP = 5
+# Smallest estimated km saving an inter-route move has to bring
+INTER_ROUTE_MIN_GAIN = 0.5
+
+
+class VRPSolver:
+    # Cluster-first route-second VRP heuristics on plain problem types. No
+    # database access: callers build a VRPProblem and persist the solution.
+
+    def __init__(self, max_workers: int = 1, parallel_min_stations: int = 200,
+                 knapsack_time_ms: float = DEFAULT_TIME_BUDGET_MS, exact_max_stops: int = DEFAULT_MAX_STOPS,
+                 region_min_stations: int = 500, region_size: int = 120, region_repair_ms: float = 200,
+                 two_opt_engine: str = "auto", batch_two_opt_max_stops: int = DEFAULT_BATCH_MAX_STOPS):
+        self.max_workers = max_workers
+        self.parallel_min_stations = parallel_min_stations
+        self.knapsack_time_ms = knapsack_time_ms
+        self.exact_max_stops = exact_max_stops
+        # 2-opt engine for route sequencing: scalar, batch, or auto (batch
+        # up to batch_two_opt_max_stops stops)
+        self.two_opt_engine = two_opt_engine
+        self.batch_two_opt_max_stops = batch_two_opt_max_stops
+        # Unlimited days with at least region_min_stations stations are cut
+        # into regions of about region_size stations
+        self.region_min_stations = region_min_stations
+        self.region_size = region_size
+        self.region_repair_ms = region_repair_ms
+
+    def settings(self) -> Dict:
+        # Constructor arguments that rebuild this solver, e.g. in a worker
+        return {
+            "max_workers": self.max_workers, "parallel_min_stations": self.parallel_min_stations,
+            "knapsack_time_ms": self.knapsack_time_ms, "exact_max_stops": self.exact_max_stops,
+            "region_min_stations": self.region_min_stations, "region_size": self.region_size,
+            "region_repair_ms": self.region_repair_ms, "two_opt_engine": self.two_opt_engine,
+            "batch_two_opt_max_stops": self.batch_two_opt_max_stops
+        }
+
+    def _context(self, matrix: DistanceMatrix, depot_id: int) -> SolverContext:
+        return SolverContext(matrix, depot_id, exact_max_stops=self.exact_max_stops,
+                             two_opt_engine=self.two_opt_engine,
+                             batch_two_opt_max_stops=self.batch_two_opt_max_stops)
+
+    def solve(self, problem: VRPProblem) -> VRPSolution:
+        ctx = self._context(problem.matrix, problem.depot.id)
+        cargo_data = problem.cargo_data()
+        vehicles = sorted((v for v in problem.vehicles if not v.is_rented), key=lambda v: v.capacity, reverse=True)
+        
+        warm_routes = None
+        if problem.initial_routes:
+            warm_routes = self.solve_warm_start(ctx, cargo_data, problem, vehicles)
+        
+        routes = None
+        if (problem.scenario_type == "unlimited" and len(cargo_data) >= self.region_min_stations
+                and len(cargo_data) > self.region_size):
+            routes = self.solve_regions(ctx, cargo_data, problem, vehicles)
+        
+        if routes is not None:
+            rejected_count = 0
+            rejected_weight = 0
+            rejected_requests = []
+        elif problem.scenario_type == "unlimited" and problem.construction == "savings":
+            routes = self.solve_savings(
+                ctx, cargo_data, problem.depot, vehicles,
+                problem.cost_per_km, problem.rental_cost, problem.rental_capacity
+            )
+            rejected_count = 0
+            rejected_weight = 0
+            rejected_requests = []
+        elif problem.scenario_type == "unlimited" and problem.construction == "split":
+            routes = self.solve_split(
+                ctx, cargo_data, problem.depot, vehicles,
+                problem.cost_per_km, problem.rental_cost, problem.rental_capacity
+            )
+            rejected_count = 0
+            rejected_weight = 0
+            rejected_requests = []
+        elif problem.scenario_type == "unlimited":
+            routes = self.solve_unlimited(
+                ctx, cargo_data, problem.depot, vehicles,
+                problem.cost_per_km, problem.rental_cost, problem.rental_capacity
+            )
+            rejected_count = 0
+            rejected_weight = 0
+            rejected_requests = []
+        else:
+            routes, rejected_count, rejected_weight, rejected_requests = self.solve_limited(
+                ctx, cargo_data, problem.depot, vehicles, problem.cost_per_km, problem.optimization_mode,
+                problem.demands
+            )
+        
+        # The stored plan is kept unless a fresh one carrying all the cargo
+        # is cheaper
+        warm_started = False
+        if warm_routes is not None:
+            warm_cost = sum(r.cost for r in warm_routes)
+            cold_cost = sum(r.cost for r in routes)
+            if rejected_count or rejected_weight or warm_cost <= cold_cost + 1e-6:
+                routes = warm_routes
+                rejected_count, rejected_weight, rejected_requests = 0, 0, []
+                warm_started = True
+            else:
+                print(f"♻️ Sıcak başlangıç: Yeni plan daha ucuz ({cold_cost:.2f} < {warm_cost:.2f} birim), kayıtlı plan bırakıldı")
+        
+        curve = []
+        if problem.algorithm == "alns" and routes:
+            routes, curve = self._improve_alns(ctx, cargo_data, problem, vehicles, routes)
+        
+        solution = VRPSolution(routes, rejected_count, rejected_weight, ctx.route_costs.stats(), rejected_requests)
+        solution.algorithm = problem.algorithm
+        solution.warm_started = warm_started
+        solution.improvement_curve = curve
+        return solution
+    
+    def _improve_alns(self, ctx: SolverContext, cargo_data: Dict, problem: VRPProblem,
+                      vehicles: List[FleetVehicle], routes: List[PlannedRoute]) -> tuple:
+        # Anytime improvement of the greedy solution within time_limit_ms
+        used = set(id(r.vehicle) for r in routes)
+        state = [ALNSRoute(r.vehicle, r.stops, r.loads) for r in routes]
+        # Idle owned vehicles are free capacity the search may use
+        state += [ALNSRoute(v, [], {}) for v in vehicles if id(v) not in used]
+        
+        search = ALNS(
+            ctx.matrix, problem.depot.id, problem.cost_per_km,
+            rental_cost=problem.rental_cost, rental_capacity=problem.rental_capacity,
+            allow_rentals=problem.scenario_type == "unlimited", seed=problem.seed, two_opt_pass=ctx.two_opt
+        )
+        best, curve, iterations = search.run(state, problem.time_limit_ms)
+        
+        scenario_type = routes[0].scenario_type
+        rental_cost = problem.rental_cost if scenario_type == "unlimited" else 0
+        rental_counter = 1
+        improved = []
+        for route in best:
+            if not route.stops:
+                continue
+            vehicle = route.vehicle
+            if vehicle.is_rented:
+                vehicle = FleetVehicle(None, f"Kiralık Araç {rental_counter}", vehicle.capacity,
+                                       is_rented=True, rental_cost=vehicle.rental_cost)
+                rental_counter += 1
+            improved.append(self._build_route(
+                ctx, cargo_data, problem.depot, vehicle, route.loads,
+                problem.cost_per_km, rental_cost, scenario_type, order=route.stops
+            ))
+        
+        before = sum(r.cost for r in routes)
+        after = sum(r.cost for r in improved)
+        print(f"🔥 ALNS: {iterations} iterasyon, {problem.time_limit_ms} ms | Maliyet {before:.2f} → {after:.2f} birim")
+        
+        if after > before:
+            return routes, curve
+        return improved, curve
+    
+    def solve_warm_start(self, ctx: SolverContext, cargo_data: Dict, problem: VRPProblem,
+                         vehicles: List[FleetVehicle]) -> Optional[List[PlannedRoute]]:
+        # Start from a stored plan instead of new clusters. Old routes keep
+        # today's cargo at the stations they visited, overloaded ones shed
+        # the stops that cost them most, old rentals whose stops fit on owned
+        # vehicles are dropped, and new or shed stops are inserted greedily.
+        # None means the old plan cannot carry today's cargo (or the limited
+        # scenario has to choose cargo first).
+        depot = problem.depot
+        unlimited = problem.scenario_type == "unlimited"
+        if not unlimited and sum(c["total_weight"] for c in cargo_data.values()) > sum(v.capacity for v in vehicles):
+            return None
+        
+        def full_load(sid):
+            return {"weight": cargo_data[sid]["total_weight"], "count": cargo_data[sid]["total_count"], "is_partial": False}
+        
+        owned = {v.id: v for v in vehicles}
+        placed = set()
+        state = []
+        rentals = []
+        for vehicle_id, stops in problem.initial_routes:
+            vehicle = owned.pop(vehicle_id, None)
+            if vehicle is None:
+                if not unlimited:
+                    continue
+                vehicle = FleetVehicle(None, "Kiralık Araç", problem.rental_capacity,
+                                       is_rented=True, rental_cost=problem.rental_cost)
+            route = ALNSRoute(vehicle, [], {})
+            for sid in stops:
+                if sid in cargo_data and sid not in placed:
+                    placed.add(sid)
+                    route.insert(len(route.stops), sid, full_load(sid))
+            (rentals if vehicle.is_rented else state).append(route)
+        state += [ALNSRoute(v, [], {}) for v in owned.values()]
+        
+        def removal_saving(stops, p):
+            prev = stops[p - 1] if p > 0 else depot.id
+            nxt = stops[p + 1] if p + 1 < len(stops) else depot.id
+            return self._get_dist(ctx, prev, stops[p]) + self._get_dist(ctx, stops[p], nxt) - self._get_dist(ctx, prev, nxt)
+        
+        removed = []
+        for route in state + rentals:
+            while route.load > route.vehicle.capacity + 1e-9:
+                p = max(range(len(route.stops)), key=lambda p: removal_saving(route.stops, p))
+                sid = route.stops[p]
+                removed.append((sid, route.remove(sid)))
+        removed += [(sid, full_load(sid)) for sid in cargo_data if sid not in placed]
+        
+        # Stations that may not find a vehicle with room go in pieces: rental
+        # sized ones when rentals are allowed, else the largest vehicle's size
+        piece_capacity = problem.rental_capacity if unlimited else max((v.capacity for v in vehicles), default=0)
+        pending = []
+        for sid, load in removed:
+            if load["weight"] <= piece_capacity + 1e-9 or piece_capacity <= 0:
+                pending.append((sid, load))
+                continue
+            remaining_weight = load["weight"]
+            remaining_count = load["count"]
+            while remaining_weight > 1e-9:
+                weight = min(remaining_weight, piece_capacity)
+                count = remaining_count if weight >= remaining_weight else int(load["count"] * weight / load["weight"])
+                pending.append((sid, {"weight": weight, "count": count, "is_partial": True}))
+                remaining_weight -= weight
+                remaining_count -= count
+        
+        search = ALNS(
+            ctx.matrix, depot.id, problem.cost_per_km,
+            rental_cost=problem.rental_cost, rental_capacity=problem.rental_capacity,
+            allow_rentals=unlimited, seed=problem.seed, two_opt_pass=ctx.two_opt
+        )
+        # Stored rentals the owned fleet has room for are dropped
+        search.relocate(rentals, state)
+        state += [route for route in rentals if route.stops]
+        if not search.repair(state, pending):
+            return None
+        state = [route for route in state if route.stops]
+        print(f"♻️ Sıcak başlangıç: {len(problem.initial_routes)} kayıtlı rota, {len(pending)} durak yeniden yerleştirildi")
+        
+        vehicle_bins = [{
+            "vehicle": route.vehicle,
+            "stations": list(route.stops),
+            "loads": route.loads,
+            "total_weight": route.load,
+            "total_count": sum(l["count"] for l in route.loads.values())
+        } for route in state]
+        if not any(l["is_partial"] for route in state for l in route.loads.values()):
+            vehicle_bins = self._inter_route_optimization(ctx, vehicle_bins, cargo_data, depot, problem.cost_per_km)
+        
+        scenario_type = "unlimited" if unlimited else f"limited_{problem.optimization_mode}"
+        rental_cost = problem.rental_cost if unlimited else 0
+        rental_counter = 1
+        routes = []
+        for vbin in vehicle_bins:
+            if not vbin["stations"]:
+                continue
+            vehicle = vbin["vehicle"]
+            if vehicle.is_rented:
+                vehicle = FleetVehicle(None, f"Kiralık Araç {rental_counter}", vehicle.capacity,
+                                       is_rented=True, rental_cost=vehicle.rental_cost)
+                rental_counter += 1
+            # Stations moved by the inter-route pass carry their full cargo
+            loads = {sid: vbin["loads"].get(sid) or full_load(sid) for sid in vbin["stations"]}
+            routes.append(self._build_route(
+                ctx, cargo_data, depot, vehicle, loads, problem.cost_per_km, rental_cost, scenario_type,
+                order=vbin["stations"]
+            ))
+        return routes
+    
+    def solve_regions(self, ctx: SolverContext, cargo_data: Dict, problem: VRPProblem,
+                      vehicles: List[FleetVehicle]) -> List[PlannedRoute]:
+        # Very large days: every angular sector around the depot is solved as
+        # its own problem, in parallel, then ALNS runs on each pair of
+        # neighbouring sectors to repair routes the boundaries cut badly.
+        # The repairs build on each other, so they run one after another and
+        # share a single region_repair_ms budget.
+        depot = problem.depot
+        regions = partition_by_angle(depot, [c["station"] for c in cargo_data.values()], self.region_size)
+        region_index = {sid: r for r, sids in enumerate(regions) for sid in sids}
+        allocation = allocate_vehicles(
+            [sum(cargo_data[sid]["total_weight"] for sid in sids) for sids in regions], vehicles
+        )
+        print(f"🗺️ Bölgesel ayrıştırma: {len(cargo_data)} istasyon, {len(regions)} bölge")
+        
+        subproblems = []
+        for sids, fleet in zip(regions, allocation):
+            members = set(sids)
+            subproblems.append(VRPProblem(
+                depot, [d for d in problem.demands if d.station.id in members], fleet,
+                matrix=problem.matrix.subset([depot.id] + sids), scenario_type="unlimited",
+                cost_per_km=problem.cost_per_km, rental_cost=problem.rental_cost,
+                rental_capacity=problem.rental_capacity, construction=problem.construction, seed=problem.seed
+            ))
+        solutions = evaluate_configurations(
+            _solve_region,
+            RegionBatch(subproblems, self.settings()),
+            list(range(len(subproblems))), self.max_workers
+        )
+        routes_by_region = [solution.routes for solution in solutions]
+        
+        k = len(regions)
+        neighbours = [(r, r + 1) for r in range(k - 1)] + ([(k - 1, 0)] if k > 2 else [])
+        repair_ms = self.region_repair_ms / max(1, len(neighbours))
+        for a, b in neighbours:
+            repaired = self._repair_boundary(
+                ctx, cargo_data, problem, routes_by_region[a] + routes_by_region[b], repair_ms
+            )
+            routes_by_region[a] = []
+            routes_by_region[b] = []
+            for route in repaired:
+                routes_by_region[region_of(route.stops, region_index)].append(route)
+        
+        # Rentals were numbered per region
+        routes = []
+        rental_counter = 1
+        for route in (r for region_routes in routes_by_region for r in region_routes):
+            if route.vehicle.is_rented:
+                vehicle = FleetVehicle(None, f"Kiralık Araç {rental_counter}", route.vehicle.capacity,
+                                       is_rented=True, rental_cost=route.vehicle.rental_cost)
+                rental_counter += 1
+                route = self._build_route(
+                    ctx, cargo_data, depot, vehicle, route.loads, problem.cost_per_km,
+                    problem.rental_cost, "unlimited", order=route.stops
+                )
+            routes.append(route)
+        return routes
+    
+    def _repair_boundary(self, ctx: SolverContext, cargo_data: Dict, problem: VRPProblem,
+                         routes: List[PlannedRoute], time_limit_ms: float) -> List[PlannedRoute]:
+        state = [ALNSRoute(r.vehicle, r.stops, r.loads) for r in routes]
+        num_stops = sum(len(r.stops) for r in routes)
+        search = ALNS(
+            ctx.matrix, problem.depot.id, problem.cost_per_km,
+            rental_cost=problem.rental_cost, rental_capacity=problem.rental_capacity,
+            allow_rentals=True, seed=problem.seed, two_opt_pass=ctx.two_opt
+        )
+        best, _, _ = search.run(state, time_limit_ms, BOUNDARY_ITERATIONS_PER_STOP * num_stops)
+        if search.total_cost(best) >= search.total_cost(state) - 1e-6:
+            return routes
+        return [
+            self._build_route(
+                ctx, cargo_data, problem.depot, route.vehicle, route.loads, problem.cost_per_km,
+                problem.rental_cost, "unlimited", order=route.stops
+            )
+            for route in best if route.stops
+        ]
+    
+    def solve_unlimited(self, ctx: SolverContext, cargo_data: Dict, depot: Location, existing_vehicles: List[FleetVehicle],
+                         cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[PlannedRoute]:
+        
+        num_existing = len(existing_vehicles) if existing_vehicles else 1
+        
+        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
+        total_capacity = sum(v.capacity for v in existing_vehicles) if existing_vehicles else 0
+        
+        num_stations = len(cargo_data)
+        
+        max_vehicle_capacity = max(v.capacity for v in existing_vehicles) if existing_vehicles else rental_capacity
+        min_vehicles_needed = max(1, int((total_cargo_weight + max_vehicle_capacity - 1) / max_vehicle_capacity))
+        
+        max_clusters = min(num_stations, max(num_existing, min_vehicles_needed) + 3)
+        # More vehicles than stations are needed: each cluster overflows to rentals
+        min_clusters = min(min_vehicles_needed, max_clusters)
+        
+        print(f"🔍 Maliyet Optimizasyonu: {min_clusters} - {max_clusters} küme (cluster) konfigürasyonu deneniyor...")
+        
+        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
+        configs = list(range(min_clusters, max_clusters + 1))
+        candidates = []
+        for num_clusters in configs:
+            for clusters in self._candidate_clusterings(ctx, cargo_data, depot, num_clusters, vehicles_sorted):
+                candidates.append((num_clusters, clusters))
+        
+        evaluator = ConfigurationEvaluator(
+            {sid: c["total_weight"] for sid, c in cargo_data.items()},
+            [v.capacity for v in existing_vehicles], cost_per_km, rental_cost, rental_capacity,
+            ctx.matrix, depot.id
+        )
+        costs = evaluator.costs(
+            [clusters for _, clusters in candidates],
+            lambda station_sets: self._route_lengths(ctx, cargo_data, depot, station_sets)
+        )
+        
+        config_costs = {}
+        best_clusters = None
+        best_config = None
+        best_cost = float('inf')
+        for (num_clusters, clusters), simulated_cost in zip(candidates, costs):
+            config_costs[num_clusters] = min(config_costs.get(num_clusters, float('inf')), simulated_cost)
+            if simulated_cost < best_cost:
+                best_cost = simulated_cost
+                best_config = num_clusters
+                best_clusters = clusters
+        
+        for num_clusters in configs:
+            print(f"   📊 {num_clusters} küme: Tahmini maliyet = {config_costs.get(num_clusters, float('inf')):.2f} birim")
+        
+        print(f"✅ En iyi konfigürasyon: {best_config} küme (+ overflow için kiralık), Tahmini Maliyet: {best_cost:.2f} birim")
+        
+        return self._execute_configuration(
+            ctx, cargo_data, depot, best_clusters,
+            existing_vehicles, cost_per_km, rental_cost, rental_capacity
+        )
+    
+    def solve_savings(self, ctx: SolverContext, cargo_data: Dict, depot: Location, existing_vehicles: List[FleetVehicle],
+                      cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[PlannedRoute]:
+        owned_capacities = [v.capacity for v in existing_vehicles]
+        
+        items = self._vehicle_sized_items(cargo_data, owned_capacities, rental_capacity)
+        
+        routes = savings_routes(ctx.matrix, depot.id, [(it["sid"], it["weight"]) for it in items],
+                                owned_capacities, rental_capacity)
+        route_loads = [sum(items[i]["weight"] for i in r) for r in routes]
+        print(f"💡 Clarke-Wright: {len(items)} durak → {len(routes)} rota")
+        
+        # Heaviest routes first, each on the smallest owned vehicle that fits;
+        # whatever no owned vehicle can take goes on a rental
+        free = sorted(existing_vehicles, key=lambda v: v.capacity)
+        assignments = []
+        rental_counter = 1
+        for r in sorted(range(len(routes)), key=lambda r: -route_loads[r]):
+            vehicle = next((v for v in free if v.capacity >= route_loads[r] - 1e-9), None)
+            if vehicle is not None:
+                free.remove(vehicle)
+            else:
+                vehicle = FleetVehicle(None, f"Kiralık Araç {rental_counter}", rental_capacity,
+                                       is_rented=True, rental_cost=rental_cost)
+                rental_counter += 1
+            assignments.append({"vehicle": vehicle, "cargo_list": [items[i] for i in routes[r]]})
+        
+        assignments = self._absorb_rentals(ctx, cargo_data, depot, assignments, cost_per_km, rental_cost)
+        return self._finalize_assignments(
+            ctx, cargo_data, depot, assignments, [], cost_per_km, rental_cost, rental_capacity
+        )
+    
+    def solve_split(self, ctx: SolverContext, cargo_data: Dict, depot: Location, existing_vehicles: List[FleetVehicle],
+                    cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[PlannedRoute]:
+        owned_capacities = [v.capacity for v in existing_vehicles]
+        items = self._vehicle_sized_items(cargo_data, owned_capacities, rental_capacity)
+        
+        # Giant tour over every station, then cut it optimally for this order
+        station_ids = list(cargo_data.keys())
+        giant = self._order_stations_nn(ctx, station_ids, cargo_data, depot)
+        giant = self._optimize_route_2opt(ctx, giant, cargo_data, depot)
+        position = {sid: p for p, sid in enumerate(giant)}
+        items.sort(key=lambda it: position[it["sid"]])
+        
+        trips = split_tour(ctx.matrix, depot.id, [(it["sid"], it["weight"]) for it in items],
+                           owned_capacities, rental_capacity, rental_cost, cost_per_km)
+        if not trips:
+            print("⚠️ Split: Filoya uygun bölme bulunamadı, Clarke-Wright ile devam ediliyor")
+            return self.solve_savings(ctx, cargo_data, depot, existing_vehicles, cost_per_km, rental_cost, rental_capacity)
+        print(f"✂️ Split: {len(items)} duraklı dev tur → {len(trips)} rota "
+              f"({sum(1 for t in trips if t[2] is None)} kiralık)")
+        
+        free = sorted(existing_vehicles, key=lambda v: v.capacity)
+        assignments = []
+        rental_counter = 1
+        for start, end, capacity in trips:
+            if capacity is None:
+                vehicle = FleetVehicle(None, f"Kiralık Araç {rental_counter}", rental_capacity,
+                                       is_rented=True, rental_cost=rental_cost)
+                rental_counter += 1
+            else:
+                vehicle = next(v for v in free if v.capacity == capacity)
+                free.remove(vehicle)
+            assignments.append({"vehicle": vehicle, "cargo_list": items[start:end]})
+        
+        assignments = self._absorb_rentals(ctx, cargo_data, depot, assignments, cost_per_km, rental_cost)
+        return self._finalize_assignments(
+            ctx, cargo_data, depot, assignments, [], cost_per_km, rental_cost, rental_capacity
+        )
+    
+    def _vehicle_sized_items(self, cargo_data: Dict, owned_capacities: List[float], rental_capacity: float) -> List[Dict]:
+        # Stations too heavy for a rental take an owned vehicle each, largest
+        # first, while there are any; past that they are cut into pieces so
+        # every item fits some vehicle of the fleet
+        owned_left = sorted(owned_capacities, reverse=True)
+        items = []
+        for sid, c in sorted(cargo_data.items(), key=lambda kv: -kv[1]["total_weight"]):
+            weight = c["total_weight"]
+            pieces = []
+            remaining = weight
+            while remaining > rental_capacity + 1e-9 and owned_left and owned_left[0] > rental_capacity:
+                take = min(remaining, owned_left.pop(0))
+                pieces.append(take)
+                remaining -= take
+            while remaining > 1e-9:
+                take = min(remaining, rental_capacity)
+                pieces.append(take)
+                remaining -= take
+            
+            if len(pieces) <= 1:
+                items.append({"sid": sid, "weight": weight, "count": c["total_count"], "station": c["station"]})
+                continue
+            assigned_count = 0
+            for p, piece_weight in enumerate(pieces):
+                if p == len(pieces) - 1:
+                    piece_count = c["total_count"] - assigned_count
+                else:
+                    piece_count = int(c["total_count"] * piece_weight / weight)
+                assigned_count += piece_count
+                items.append({"sid": sid, "weight": piece_weight, "count": piece_count,
+                              "station": c["station"], "is_partial": True})
+        
+        return items
+    
+    def _absorb_rentals(self, ctx: SolverContext, cargo_data: Dict, depot: Location, assignments: List[Dict],
+                        cost_per_km: float, rental_cost: float) -> List[Dict]:
+        # Split deliveries: constructions that keep each station whole leave
+        # room on most routes, so the lightest rentals are emptied into that
+        # room, a station's load divided over the routes nearest to it,
+        # whenever the detours cost less than the rental and its km
+        absorbed = 0
+        while True:
+            loads = [sum(c["weight"] for c in a["cargo_list"]) for a in assignments]
+            rooms = [a["vehicle"].capacity - load for a, load in zip(assignments, loads)]
+            total_room = sum(max(0.0, room) for room in rooms)
+            rentals = sorted((r for r, a in enumerate(assignments) if a["vehicle"].is_rented), key=lambda r: loads[r])
+            for r in rentals:
+                if loads[r] > total_room - max(0.0, rooms[r]) + 1e-9:
+                    continue
+                moves = self._spread_route(ctx, cargo_data, depot, assignments, r, rooms, cost_per_km, rental_cost)
+                if moves is not None:
+                    break
+            else:
+                break
+            
+            for o, item, take in moves:
+                count = item["count"] if take >= item["weight"] - 1e-9 else int(item["count"] * take / item["weight"])
+                assignments[o]["cargo_list"].append({
+                    "sid": item["sid"], "weight": take, "count": count, "station": item["station"],
+                    "is_partial": take < cargo_data[item["sid"]]["total_weight"] - 1e-9
+                })
+                item["weight"] -= take
+                item["count"] -= count
+            del assignments[r]
+            absorbed += 1
+        
+        if absorbed:
+            print(f"   ✂️ Parçalı teslimat: {absorbed} kiralık araç diğer rotalara dağıtıldı")
+            rental_counter = 1
+            for a in assignments:
+                if a["vehicle"].is_rented:
+                    a["vehicle"].name = f"Kiralık Araç {rental_counter}"
+                    rental_counter += 1
+        return assignments
+    
+    def _spread_route(self, ctx: SolverContext, cargo_data: Dict, depot: Location, assignments: List[Dict],
+                      r: int, rooms: List[float], cost_per_km: float, rental_cost: float) -> Optional[List[tuple]]:
+        # (route, item, weight) moves emptying route r, heaviest item first,
+        # each into the routes with the cheapest detour: none for a station
+        # the route already visits, else a round trip from its nearest stop.
+        # Items without weight need no room but still go to one route.
+        # None if the room runs out or the detours are not worth the rental.
+        values = ctx.matrix.values
+        index = ctx.matrix.index
+        rooms = list(rooms)
+        members = {o: [index[c["sid"]] for c in a["cargo_list"]] for o, a in enumerate(assignments) if o != r}
+        moves = []
+        detours = 0.0
+        for item in sorted(assignments[r]["cargo_list"], key=lambda c: -c["weight"]):
+            node = index[item["sid"]]
+            weightless = item["weight"] <= 1e-9
+            detour = {o: 0.0 if node in nodes else float((values[node, nodes] + values[nodes, node]).min())
+                      for o, nodes in members.items() if nodes and (weightless or rooms[o] > 1e-9)}
+            if weightless:
+                if not detour:
+                    return None
+                o = min(detour, key=lambda o: detour[o])
+                moves.append((o, item, item["weight"]))
+                detours += detour[o]
+                members[o].append(node)
+                continue
+            left = item["weight"]
+            for o in sorted(detour, key=lambda o: detour[o]):
+                if left <= 1e-9:
+                    break
+                take = min(left, rooms[o])
+                moves.append((o, item, take))
+                rooms[o] -= take
+                left -= take
+                detours += detour[o]
+                members[o].append(node)
+            if left > 1e-9:
+                return None
+        
+        route_km = self._route_order(ctx, [c["sid"] for c in assignments[r]["cargo_list"]], cargo_data, depot)[0]
+        if detours * cost_per_km >= rental_cost + route_km * cost_per_km:
+            return None
+        return moves
+    
+    def _candidate_clusterings(self, ctx: SolverContext, cargo_data: Dict, depot: Location, num_clusters: int,
+                               vehicles_sorted: List[FleetVehicle]) -> List[List[Dict]]:
+        # Geographic clusters, plus capacity-aware ones when a cluster is far
+        # heavier than the largest vehicle; the capacity-aware set comes
+        # first so it wins ties
+        if num_clusters == 0:
+            return []
+        clusters = self._create_clusters(ctx, cargo_data, depot, num_clusters, list(cargo_data.keys()))
+        candidates = [clusters]
+        
+        if num_clusters <= len(vehicles_sorted) and clusters:
+            max_cluster_weight = max(c["total_weight"] for c in clusters)
+            if max_cluster_weight > vehicles_sorted[0].capacity * 1.3:
+                alt_clusters = self._create_capacity_aware_clusters(
+                    ctx, cargo_data, depot, num_clusters, vehicles_sorted
+                )
+                if alt_clusters is not None:
+                    candidates.insert(0, alt_clusters)
+        return candidates
+    
+    def _route_lengths(self, ctx: SolverContext, cargo_data: Dict, depot: Location,
+                       station_sets: List[List[int]]) -> List[float]:
+        # Route km of each station set; on big sweeps the sets not cached yet
+        # are sequenced in the pool, and the workers' routes join the cache
+        workers = self._sweep_workers(len(cargo_data))
+        pending = [ids for ids in station_sets if frozenset(ids) not in ctx.route_costs]
+        if workers > 1 and len(pending) > 1:
+            size = -(-len(pending) // (workers * 4))
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            evaluate_configurations(_route_lengths, SweepProblem(ctx, depot, cargo_data, []), chunks, workers)
+        return [self._route_order(ctx, ids, cargo_data, depot)[0] for ids in station_sets]
+    
+    def _route_order(self, ctx: SolverContext, station_ids: List[int], cargo_data: Dict, depot: Location) -> tuple:
+        # Route length and visiting order of a station set, sequenced once per
+        # solve: the same sets come back across cluster counts and moves.
+        if not station_ids:
+            return 0, []
+        
+        key = frozenset(station_ids)
+        cached = ctx.route_costs.get(key)
+        if cached is not None:
+            return cached[0], list(cached[1])
+        
+        if len(key) <= ctx.exact_max_stops:
+            index = ctx.matrix.index
+            total_dist, tour = held_karp(ctx.matrix, index[depot.id], [index[sid] for sid in key])
+            ordered = [ctx.matrix.ids[i] for i in tour]
+        else:
+            ordered = self._order_stations_nn(ctx, list(key), cargo_data, depot)
+            ordered = self._quick_2opt(ctx, ordered, cargo_data, depot)
+            
+            total_dist = self._get_dist(ctx, depot.id, ordered[0])
+            for i in range(len(ordered) - 1):
+                total_dist += self._get_dist(ctx, ordered[i], ordered[i+1])
+            total_dist += self._get_dist(ctx, ordered[-1], depot.id)
+        
+        ctx.route_costs.put(key, total_dist, ordered)
+        return total_dist, ordered
+    
+    def _create_clusters(self, ctx: SolverContext, cargo_data: Dict, depot: Location, num_clusters: int, 
+                         unvisited: List) -> List[Dict]:
+        clusters = []
+        
+        candidates = sorted(unvisited, key=lambda sid: self._get_dist(ctx, sid, depot.id), reverse=True)
+        index = SpatialIndex([cargo_data[sid]["station"] for sid in candidates], ctx.matrix.straight_line)
+        buffer = 25.0 if num_clusters <= 3 else 15.0
+        # Stations closer than the buffer to a chosen seed; only ever grows
+        blocked = set()
+        taken = set()
+        
+        for _ in range(num_clusters):
+            if len(taken) == len(candidates):
+                break
+            
+            seed = None
+            for sid in candidates:
+                if sid not in taken and sid not in blocked:
+                    seed = sid
+                    break
+            
+            if seed is None:
+                seed = next(sid for sid in candidates if sid not in taken)
+            
+            taken.add(seed)
+            for sid in index.within(seed, buffer):
+                if self._get_dist(ctx, sid, seed) < buffer:
+                    blocked.add(sid)
+            clusters.append({
+                "seed_sid": seed,
+                "stations": [seed],
+                "total_weight": cargo_data[seed]["total_weight"]
+            })
+        
+        rest = [sid for sid in unvisited if sid not in taken]
+        if clusters and rest:
+            detours = self._detour_table(ctx, [c["seed_sid"] for c in clusters], rest, depot)
+            weights = [cargo_data[sid]["total_weight"] for sid in rest]
+            unbounded = [float('inf')] * len(clusters)
+            for p, c_idx in assign_stations(detours, weights, [0.0] * len(clusters), unbounded):
+                clusters[c_idx]["stations"].append(rest[p])
+                clusters[c_idx]["total_weight"] += weights[p]
+        
+        return clusters
+    
+    def _detour_table(self, ctx: SolverContext, seeds: List[Optional[int]], station_ids: List[int],
+                      depot: Location) -> np.ndarray:
+        # [cluster, station] extra km of visiting the station on the way back
+        # from the seed; a cluster without a seed costs the depot round trip
+        index = ctx.matrix.index
+        values = ctx.matrix.values
+        depot_idx = index[depot.id]
+        st = np.fromiter((index[sid] for sid in station_ids), dtype=np.intp, count=len(station_ids))
+        to_depot = values[st, depot_idx]
+        table = np.empty((len(seeds), len(station_ids)))
+        for c, seed in enumerate(seeds):
+            if seed is None:
+                table[c] = to_depot
+            else:
+                table[c] = values[index[seed], st] + to_depot - values[index[seed], depot_idx]
+        return table
+    
+    def _create_capacity_aware_clusters(self, ctx: SolverContext, cargo_data: Dict, depot: Location, 
+                                        num_clusters: int, vehicles_sorted: List) -> List[Dict]:
+        if num_clusters > len(vehicles_sorted):
+            return None
+        
+        vehicle_capacities = [v.capacity for v in vehicles_sorted[:num_clusters]]
+        
+        station_ids = list(cargo_data.keys())
+        total_weight = sum(cargo_data[sid]["total_weight"] for sid in station_ids)
+        
+        if total_weight > sum(vehicle_capacities):
+            return None
+
+        clusters = []
+        for i in range(num_clusters):
+            clusters.append({
+                "seed_sid": None,
+                "stations": [],
+                "total_weight": 0,
+                "capacity": vehicle_capacities[i]
+            })
+        
+        stations_by_distance = []
+        for sid in station_ids:
+            d = self._get_dist(ctx, sid, depot.id)
+            w = cargo_data[sid]["total_weight"]
+            stations_by_distance.append((sid, d, w))
+        stations_by_distance.sort(key=lambda x: x[1], reverse=True)
+        
+        index = SpatialIndex([cargo_data[sid]["station"] for sid in station_ids], ctx.matrix.straight_line)
+        unassigned = [x[0] for x in stations_by_distance]
+        assigned = set()
+        # Stations within 15 km of a chosen seed
+        near_seed = set()
+        
+        for i, cluster in enumerate(clusters):
+            best_seed = None
+            for sid, dist, weight in stations_by_distance:
+                if sid in assigned or sid in near_seed:
+                    continue
+                if weight > cluster["capacity"]:
+                    continue  
+                
+                best_seed = sid
+                break
+            
+            if best_seed is None:
+                for sid in unassigned:
+                    if cargo_data[sid]["total_weight"] <= cluster["capacity"]:
+                        best_seed = sid
+                        break
+            
+            if best_seed:
+                cluster["seed_sid"] = best_seed
+                cluster["stations"].append(best_seed)
+                cluster["total_weight"] = cargo_data[best_seed]["total_weight"]
+                unassigned.remove(best_seed)
+                assigned.add(best_seed)
+                for sid in index.within(best_seed, 15):
+                    if self._get_dist(ctx, sid, best_seed) <= 15:
+                        near_seed.add(sid)
+        
+        if unassigned:
+            detours = self._detour_table(ctx, [c["seed_sid"] or None for c in clusters], unassigned, depot)
+            weights = [cargo_data[sid]["total_weight"] for sid in unassigned]
+            loads = [c["total_weight"] for c in clusters]
+            capacities = [c["capacity"] for c in clusters]
+            assignments = assign_stations(detours, weights, loads, capacities)
+            if len(assignments) < len(unassigned):
+                # Cheapest-first stranded a station; placing the stations with
+                # the fewest good alternatives first may still fit everyone
+                assignments = assign_stations(detours, weights, loads, capacities, regret=True)
+            
+            if len(assignments) < len(unassigned):
+                print(f"         ❌ Kalan {len(unassigned) - len(assignments)} istasyon atanamadı")
+                return None
+            
+            for p, c_idx in assignments:
+                clusters[c_idx]["stations"].append(unassigned[p])
+                clusters[c_idx]["total_weight"] += weights[p]
+        
+        for i, cluster in enumerate(clusters):
+            if cluster["total_weight"] > cluster["capacity"]:
+                return None
+
+        for cluster in clusters:
+            del cluster["capacity"]
+        
+        return clusters
+    
+    def _calculate_cluster_route_distance(self, ctx: SolverContext, cluster: Dict, cargo_data: Dict, depot: Location) -> float:
+        return self._route_order(ctx, cluster["stations"], cargo_data, depot)[0]
+    
+    def _execute_configuration(self, ctx: SolverContext, cargo_data: Dict, depot: Location, 
+                               clusters: List[Dict], existing_vehicles: List[FleetVehicle],
+                               cost_per_km: float, rental_cost: float, rental_capacity: float) -> List[PlannedRoute]:
+        # Runs the clustering the sweep picked: the same vehicle filling as
+        # ConfigurationEvaluator.plan, now with partial loads and counts
+        clusters = sorted(clusters, key=lambda x: x["total_weight"], reverse=True)
+        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
+        
+        assignments = []  
+        overflow_pool = []  
+        
+        for i, cluster in enumerate(clusters):
+            if i < len(vehicles_sorted):
+                vehicle = vehicles_sorted[i]
+                vehicle_capacity = vehicle.capacity
+            else:
+                for sid in cluster["stations"]:
+                    overflow_pool.append({
+                        "sid": sid,
+                        "weight": cargo_data[sid]["total_weight"],
+                        "count": cargo_data[sid]["total_count"],
+                        "station": cargo_data[sid]["station"]
+                    })
+                continue
+            
+            vehicle_assignments = []
+            remaining_capacity = vehicle_capacity
+            
+            cluster_stations = []
+            for sid in cluster["stations"]:
+                cluster_stations.append({
+                    "sid": sid,
+                    "weight": cargo_data[sid]["total_weight"],
+                    "count": cargo_data[sid]["total_count"],
+                    "station": cargo_data[sid]["station"]
+                })
+            cluster_stations.sort(key=lambda x: -x["weight"])
+            
+            for cs in cluster_stations:
+                if cs["weight"] <= remaining_capacity:
+                    vehicle_assignments.append(cs)
+                    remaining_capacity -= cs["weight"]
+                elif remaining_capacity > 0:
+                    portion = remaining_capacity / cs["weight"]
+                    partial_count = max(1, int(cs["count"] * portion))
+                    
+                    vehicle_assignments.append({
+                        "sid": cs["sid"],
+                        "weight": remaining_capacity,
+                        "count": partial_count,
+                        "station": cs["station"],
+                        "is_partial": True
+                    })
+                    
+                    overflow_pool.append({
+                        "sid": cs["sid"],
+                        "weight": cs["weight"] - remaining_capacity,
+                        "count": cs["count"] - partial_count,
+                        "station": cs["station"],
+                        "is_partial": True
+                    })
+                    remaining_capacity = 0
+                else:
+                    overflow_pool.append(cs)
+            
+            if vehicle_assignments:
+                assignments.append({
+                    "vehicle": vehicle,
+                    "cargo_list": vehicle_assignments
+                })
+        
+        return self._finalize_assignments(
+            ctx, cargo_data, depot, assignments, overflow_pool, cost_per_km, rental_cost, rental_capacity
+        )
+    
+    def _finalize_assignments(self, ctx: SolverContext, cargo_data: Dict, depot: Location,
+                              assignments: List[Dict], overflow_pool: List[Dict], cost_per_km: float,
+                              rental_cost: float, rental_capacity: float) -> List[PlannedRoute]:
+        # Tops vehicles up from the overflow, rents for what is left, runs the
+        # inter-route pass and builds the final routes
+        if overflow_pool:
+            overflow_pool.sort(key=lambda x: -x["weight"])
+
+            for assign in assignments:
+                vehicle = assign["vehicle"]
+                current_weight = sum(c["weight"] for c in assign["cargo_list"])
+                remaining_cap = vehicle.capacity - current_weight
+                
+                if remaining_cap > 0:
+                    still_overflow = []
+                    for ov in overflow_pool:
+                        if ov["weight"] <= remaining_cap:
+                            assign["cargo_list"].append(ov)
+                            remaining_cap -= ov["weight"]
+                        else:
+                            still_overflow.append(ov)
+                    overflow_pool = still_overflow
+                    
+                    if not overflow_pool:
+                        break  
+            
+            if overflow_pool:
+                # Stations heavier than a rental are cut to rental size, and
+                # the packing fixes how many rentals there are before any is
+                # created
+                items = self._rental_sized_items(overflow_pool, rental_capacity)
+                bins = pack_bins([(it["sid"], it["weight"]) for it in items], rental_capacity, ctx.matrix, depot.id)
+                total_overflow = sum(it["weight"] for it in items)
+                lower_bound = l2_lower_bound([it["weight"] for it in items], rental_capacity)
+                
+                print(f"   📦 Overflow: {total_overflow:.1f} kg | {len(bins)} kiralık araç gerekli (alt sınır {lower_bound})")
+                print(f"   🚚 Toplam Araç: {len(assignments)} mevcut + {len(bins)} kiralık = {len(assignments) + len(bins)} araç")
+                
+                for n, b in enumerate(bins, 1):
+                    rv = FleetVehicle(None, f"Kiralık Araç {n}", rental_capacity,
+                                      is_rented=True, rental_cost=rental_cost)
+                    assignments.append({"vehicle": rv, "cargo_list": [items[i] for i in b]})
+        
+
+        has_partial_splits = any(
+            any(c.get("is_partial") for c in assign["cargo_list"])
+            for assign in assignments
+        )
+        
+        if len(assignments) >= 2 and not has_partial_splits:
+            print("   🔀 Inter-route optimizasyonu uygulanıyor...")
+        elif has_partial_splits:
+            print("   ⚠️ Parçalı kargo mevcut - Inter-route optimizasyonu atlandı")
+        
+        if len(assignments) >= 2 and not has_partial_splits:
+            vehicle_bins_for_iro = []
+            for assign in assignments:
+                vehicle = assign["vehicle"]
+                cargo_list = assign["cargo_list"]
+                stations = list(set(c["sid"] for c in cargo_list))
+                total_weight = sum(c["weight"] for c in cargo_list)
+                total_count = sum(c["count"] for c in cargo_list)
+                vehicle_bins_for_iro.append({
+                    "vehicle": vehicle,
+                    "stations": stations,
+                    "total_weight": total_weight,
+                    "total_count": total_count
+                })
+            
+            vehicle_bins_for_iro = self._inter_route_optimization(ctx, vehicle_bins_for_iro, cargo_data, depot, cost_per_km)
+            
+            for i, vbin in enumerate(vehicle_bins_for_iro):
+                if i < len(assignments):
+                    new_cargo_list = []
+                    for sid in vbin["stations"]:
+                        station = cargo_data[sid]["station"]
+                        weight = cargo_data[sid]["total_weight"]
+                        count = cargo_data[sid]["total_count"]
+                        new_cargo_list.append({
+                            "sid": sid,
+                            "station": station,
+                            "weight": weight,
+                            "count": count
+                        })
+                    assignments[i]["cargo_list"] = new_cargo_list
+            
+            active_routes = sum(1 for a in assignments if a["cargo_list"])
+            if active_routes < len(vehicle_bins_for_iro):
+                print(f"   📊 Rota konsolidasyonu: {len(vehicle_bins_for_iro)} küme → {active_routes} aktif rota")
+        
+        jobs = []
+        for assign in assignments:
+            vehicle = assign["vehicle"]
+            cargo_list = assign["cargo_list"]
+            
+            if not cargo_list:
+                continue
+            
+            loads = {}
+            for c in cargo_list:
+                sid = c["sid"]
+                if sid not in loads:
+                    loads[sid] = {"weight": 0, "count": 0, "is_partial": False}
+                loads[sid]["weight"] += c["weight"]
+                loads[sid]["count"] += c["count"]
+                if c.get("is_partial"):
+                    loads[sid]["is_partial"] = True
+            jobs.append((vehicle, loads))
+        
+        return self._build_routes(ctx, cargo_data, depot, jobs, cost_per_km, rental_cost, "unlimited")
+    
+    def _rental_sized_items(self, overflow_pool: List[Dict], rental_capacity: float) -> List[Dict]:
+        items = []
+        for ov in overflow_pool:
+            if ov["weight"] <= rental_capacity + 1e-9:
+                items.append(ov)
+                continue
+            remaining = ov["weight"]
+            assigned_count = 0
+            while remaining > 1e-9:
+                piece_weight = min(remaining, rental_capacity)
+                remaining -= piece_weight
+                if remaining > 1e-9:
+                    piece_count = int(ov["count"] * piece_weight / ov["weight"])
+                else:
+                    piece_count = ov["count"] - assigned_count
+                assigned_count += piece_count
+                items.append({"sid": ov["sid"], "weight": piece_weight, "count": piece_count,
+                              "station": ov["station"], "is_partial": True})
+        return items
+    
+    def _route_head_logs(self, vehicle: FleetVehicle, loads: Dict, rental_cost: float, scenario_type: str) -> List[str]:
+        total_assigned = sum(l["weight"] for l in loads.values())
+        if scenario_type == "unlimited":
+            logs = [f"ℹ️ Rota Planı: Toplam {total_assigned:.1f} kg yük için {vehicle.name} ({vehicle.capacity} kg) atandı."]
+            if vehicle.is_rented:
+                logs.append(f"💰 Kiralık Araç Maliyeti: {rental_cost} birim eklendi.")
+            return logs
+        
+        optimization_mode = scenario_type[len("limited_"):]
+        return [
+            f"ℹ️ Araç: {vehicle.name} | Kapasite: {vehicle.capacity} kg | Atanan Yük: {total_assigned:.1f} kg",
+            f"📋 Optimizasyon Modu: {'Maksimum Kargo Sayısı' if optimization_mode == 'max_count' else 'Maksimum Kargo Ağırlığı'}"
+        ]
+    
+    def _build_route(self, ctx: SolverContext, cargo_data: Dict, depot: Location, vehicle: FleetVehicle,
+                     loads: Dict, cost_per_km: float, rental_cost: float, scenario_type: str,
+                     order: Optional[List[int]] = None, sequenced: bool = False) -> PlannedRoute:
+        # loads: sid -> {"weight", "count", "is_partial"} carried by this vehicle.
+        # order is a visiting order to start from instead of a fresh one, or
+        # the final one when sequenced is set.
+        if sequenced:
+            ordered_stations = list(order)
+        else:
+            ordered_stations = self._sequence_route(ctx, cargo_data, depot, list(loads.keys()), order)
+        
+        route_path = []
+        route_logs = self._route_head_logs(vehicle, loads, rental_cost, scenario_type)
+        route_dist = 0
+        route_weight = 0
+        route_count = 0
+        
+        route_path.append({
+            "station_id": depot.id,
+            "lat": depot.latitude,
+            "lon": depot.longitude,
+            "name": depot.name,
+            "weight": 0,
+            "count": 0,
+            "is_depot": True,
+            "is_start": True
+        })
+        route_logs.append(f"🚀 Başlangıç: {depot.name} (Depo)")
+        
+        current_sid = depot.id
+        
+        for sid in ordered_stations:
+            station = cargo_data[sid]["station"]
+            weight = loads[sid]["weight"]
+            count = loads[sid]["count"]
+            
+            dist = self._get_dist(ctx, current_sid, sid)
+            route_dist += dist
+            route_weight += weight
+            route_count += count
+            
+            station_name = station.name
+            if loads[sid].get("is_partial"):
+                station_name = f"{station.name} (Parça)"
+            
+            route_path.append({
+                "station_id": sid,
+                "lat": station.latitude,
+                "lon": station.longitude,
+                "name": station_name,
+                "weight": weight,
+                "count": count
+            })
+            
+            remaining_cap = vehicle.capacity - route_weight
+            if current_sid == depot.id:
+                route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km (Depodan) | Toplam Yol: {route_dist:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
+            else:
+                route_logs.append(f"✅ Gidilen İstasyon: {station_name} | Mesafe: {dist:.2f} km | Toplam Yol: {route_dist:.2f} km | Alınan Yük: {weight:.1f} kg | Kalan Kapasite: {remaining_cap:.1f} kg")
+            
+            current_sid = sid
+        
+        return_dist = self._get_dist(ctx, current_sid, depot.id)
+        route_dist += return_dist
+        
+        route_logs.append(f"🏁 Hedefe (Umuttepe) Gidiliyor. Son Mesafe: {return_dist:.2f} km | Toplam Yol: {route_dist:.2f} km")
+        
+        route_path.append({
+            "station_id": depot.id,
+            "lat": depot.latitude,
+            "lon": depot.longitude,
+            "name": depot.name,
+            "weight": 0,
+            "count": 0,
+            "is_depot": True
+        })
+        
+        total_cost = route_dist * cost_per_km
+        if vehicle.is_rented:
+            total_cost += rental_cost
+        if scenario_type != "unlimited":
+            route_logs.append(f"💰 Toplam Maliyet: {total_cost:.2f} birim (Kiralama maliyeti yok)")
+        
+        return PlannedRoute(
+            vehicle=vehicle,
+            stops=ordered_stations,
+            path=route_path,
+            logs=route_logs,
+            distance=round(route_dist, 2),
+            cost=round(total_cost, 2),
+            weight=round(route_weight, 2),
+            count=route_count,
+            scenario_type=scenario_type,
+            loads=loads
+        )
+    
+    def _sequence_route(self, ctx: SolverContext, cargo_data: Dict, depot: Location, station_ids: List[int],
+                        order: Optional[List[int]] = None) -> List[int]:
+        # Short routes are sequenced exactly whatever order is given
+        if len(station_ids) <= ctx.exact_max_stops:
+            return self._route_order(ctx, station_ids, cargo_data, depot)[1]
+        if order is None:
+            _, order = self._route_order(ctx, station_ids, cargo_data, depot)
+        return self._optimize_route_2opt(ctx, list(order), cargo_data, depot)
+    
+    def _build_routes(self, ctx: SolverContext, cargo_data: Dict, depot: Location, jobs: List[tuple],
+                      cost_per_km: float, rental_cost: float, scenario_type: str) -> List[PlannedRoute]:
+        # jobs: (vehicle, loads) per route. Routes are sequenced independently
+        # of each other, so on big days the sequencing runs in the worker pool
+        # and only the cheap route assembly stays here.
+        # Routes already in the cache (most of them after a sweep) are
+        # finished here from their cached order.
+        station_lists = [list(loads.keys()) for _, loads in jobs]
+        workers = self._sweep_workers(sum(len(ids) for ids in station_lists))
+        pending = [i for i, ids in enumerate(station_lists) if frozenset(ids) not in ctx.route_costs]
+        sequenced = {}
+        if workers > 1 and len(pending) > 1:
+            sequenced = dict(zip(pending, evaluate_configurations(
+                _sequence_route, SweepProblem(ctx, depot, cargo_data, []),
+                [station_lists[i] for i in pending], workers
+            )))
+        orders = [
+            sequenced[i] if i in sequenced else self._sequence_route(ctx, cargo_data, depot, ids)
+            for i, ids in enumerate(station_lists)
+        ]
+        
+        return [
+            self._build_route(ctx, cargo_data, depot, vehicle, loads, cost_per_km, rental_cost, scenario_type,
+                              order=order, sequenced=True)
+            for (vehicle, loads), order in zip(jobs, orders)
+        ]
+    
+    def insert_demand(self, matrix: DistanceMatrix, depot: Location, stations: Dict[int, Location],
+                      routes: List[PlannedRoute], demand: Demand, cost_per_km: float = 1.0,
+                      idle_vehicles: Optional[List[FleetVehicle]] = None) -> Optional[tuple]:
+        # Cheapest feasible insertion of one late demand into a planned day;
+        # owned vehicles without a route that day can take it on a round
+        # trip of its own. stations covers every stop of routes plus the
+        # demand's station. Returns (route index, rebuilt route), with index
+        # None for a new route, or None when no vehicle has room left and the
+        # day has to be solved again.
+        ctx = self._context(matrix, depot.id)
+        cargo_data = {sid: {"station": loc} for sid, loc in stations.items()}
+        sid = demand.station.id
+        best = None
+        for i, route in enumerate(routes):
+            if route.weight + demand.weight > route.vehicle.capacity + 1e-9:
+                continue
+            if sid in route.stops:
+                # Already visited: only the load grows
+                delta, order = 0.0, list(route.stops)
+            else:
+                stops = [depot.id] + route.stops + [depot.id]
+                delta, position = None, 0
+                for p in range(len(stops) - 1):
+                    a, b = stops[p], stops[p + 1]
+                    extra = self._get_dist(ctx, a, sid) + self._get_dist(ctx, sid, b) - self._get_dist(ctx, a, b)
+                    if delta is None or extra < delta:
+                        delta, position = extra, p
+                order = route.stops[:position] + [sid] + route.stops[position:]
+            if best is None or delta < best[0]:
+                best = (delta, i, order)
+        
+        # Smallest idle vehicle that fits, so larger ones stay free
+        idle = [v for v in idle_vehicles or [] if not v.is_rented and demand.weight <= v.capacity + 1e-9]
+        if idle:
+            delta = self._get_dist(ctx, depot.id, sid) + self._get_dist(ctx, sid, depot.id)
+            if best is None or delta < best[0]:
+                best = (delta, None, [sid])
+        
+        if best is None:
+            return None
+        
+        delta, i, order = best
+        if i is None:
+            vehicle = min(idle, key=lambda v: v.capacity)
+            loads = {}
+            scenario_type = routes[0].scenario_type if routes else "unlimited"
+        else:
+            vehicle = routes[i].vehicle
+            loads = {s: dict(l) for s, l in routes[i].loads.items()}
+            scenario_type = routes[i].scenario_type
+        if sid in loads:
+            loads[sid]["weight"] += demand.weight
+            loads[sid]["count"] += demand.count
+        else:
+            loads[sid] = {"weight": demand.weight, "count": demand.count, "is_partial": False}
+        
+        print(f"➕ Geç kargo: {demand.station.name} ({demand.weight} kg) → {vehicle.name}, +{delta:.2f} km")
+        rebuilt = self._build_route(
+            ctx, cargo_data, depot, vehicle, loads, cost_per_km,
+            vehicle.rental_cost, scenario_type, order=order
+        )
+        return i, rebuilt
+    
+    def _optimize_route_2opt(self, ctx: SolverContext, route: List[int], cargo_data: Dict, depot: Location) -> List[int]:
+        if len(route) <= 2:
+            return route  
+        
+        tour = ctx.to_tour(route)
+        two_opt_gain = ctx.two_opt(tour)
+        or_opt_gain = 0.0
+        for _ in range(5):
+            gain = or_opt(ctx.matrix, tour)
+            if gain <= 0:
+                break
+            or_opt_gain += gain
+            two_opt_gain += ctx.two_opt(tour)
+        
+        if two_opt_gain > 0:
+            print(f"   🔄 2-opt: Rota iyileştirildi! {two_opt_gain:.2f} km tasarruf.")
+        if or_opt_gain > 0:
+            print(f"   🔄 Or-opt: Segment taşımalarıyla {or_opt_gain:.2f} km tasarruf.")
+        
+        return ctx.from_tour(tour)
+    
+    def _quick_2opt(self, ctx: SolverContext, route: List[int], cargo_data: Dict, depot: Location) -> List[int]:
+        if len(route) <= 2:
+            return route
+        
+        tour = ctx.to_tour(route)
+        ctx.two_opt(tour)
+        return ctx.from_tour(tour)
+    
+    def _inter_route_optimization(self, ctx: SolverContext, routes_data: List[Dict], cargo_data: Dict, 
+                                   depot: Location, cost_per_km: float = 1.0) -> List[Dict]:
+        if len(routes_data) < 2:
+            return routes_data  
+        
+        routes = []
+        for rd in routes_data:
+            routes.append({
+                "vehicle": rd.get("vehicle"),
+                "capacity": rd.get("vehicle").capacity if rd.get("vehicle") else rd.get("capacity", 1000),
+                "stations": list(rd.get("stations", [])),
+                "total_weight": rd.get("total_weight", 0),
+                "total_count": rd.get("total_count", 0)
+            })
+        
+        # Moves are scored on the current visiting orders, so every route
+        # starts from its cached best order
+        tours = [ctx.to_tour(self._route_order(ctx, r["stations"], cargo_data, depot)[1]) for r in routes]
+        index = ctx.matrix.index
+        weights = {index[sid]: cargo_data[sid]["total_weight"] for r in routes for sid in r["stations"]}
+        total_improvement, changed = inter_route(
+            ctx.matrix, tours, [r["total_weight"] for r in routes], [r["capacity"] for r in routes],
+            weights, min_gain=INTER_ROUTE_MIN_GAIN, two_opt_pass=ctx.two_opt
+        )
+        
+        for idx in changed:
+            stations = ctx.from_tour(tours[idx])
+            routes[idx]["stations"] = stations
+            routes[idx]["total_weight"] = sum(cargo_data[sid]["total_weight"] for sid in stations)
+            routes[idx]["total_count"] = sum(cargo_data[sid]["total_count"] for sid in stations)
+        
+        if total_improvement > 0:
+            print(f"   🔀 Inter-route optimizasyonu: {total_improvement:.2f} km tasarruf ({len(changed)} rota değişti)")
+        
+        for idx, rd in enumerate(routes_data):
+            if idx < len(routes):
+                rd["stations"] = routes[idx]["stations"]
+                rd["total_weight"] = routes[idx]["total_weight"]
+                rd["total_count"] = routes[idx]["total_count"]
+        
+        return routes_data
+    
+    def _get_dist(self, ctx: SolverContext, sid1, sid2):
+        return ctx.matrix.between(sid1, sid2)
+    
+    def solve_limited(self, ctx: SolverContext, cargo_data: Dict, depot: Location, existing_vehicles: List[FleetVehicle],
+                       cost_per_km: float = 1.0, optimization_mode: str = "max_count",
+                       demands: Optional[List[Demand]] = None) -> tuple:
+        if demands is None:
+            demands = [Demand(c["station"], c["total_weight"], c["total_count"]) for c in cargo_data.values()]
+        
+        if not existing_vehicles:
+            total_rejected_count = sum(c["total_count"] for c in cargo_data.values())
+            total_rejected_weight = sum(c["total_weight"] for c in cargo_data.values())
+            rejected_requests = [d.request_id for d in demands if d.request_id is not None]
+            return [], total_rejected_count, total_rejected_weight, rejected_requests
+        
+        total_fleet_capacity = sum(v.capacity for v in existing_vehicles)
+        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
+        total_cargo_count = sum(c["total_count"] for c in cargo_data.values())
+        num_vehicles = len(existing_vehicles)
+        
+        print(f"📊 Sınırlı Araç: {num_vehicles} araç, {total_fleet_capacity} kg kapasite")
+        print(f"📦 Toplam Kargo: {total_cargo_count} adet, {total_cargo_weight} kg")
+        
+        capacity_sufficient = total_cargo_weight <= total_fleet_capacity
+        
+        if capacity_sufficient:
+            print(f"✅ Kapasite yeterli! Coğrafi kümeleme ile minimum maliyet hedefleniyor...")
+            vehicle_bins = self._assign_by_geographic_clustering(
+                ctx, cargo_data, depot, existing_vehicles, cost_per_km
+            )
+            rejected_count, rejected_weight, rejected_requests = 0, 0, []
+            accepted_cargo = cargo_data
+            split_stations = False
+        else:
+            print(f"⚠️ Kapasite yetersiz! Sırt çantası DP ile maksimum kargo hedefleniyor...")
+            vehicle_bins, rejected_count, rejected_weight, rejected_requests = self._assign_by_knapsack(
+                cargo_data, demands, existing_vehicles, optimization_mode
+            )
+            # Stations moved between routes below carry only their accepted cargo
+            accepted_cargo = {}
+            for vbin in vehicle_bins:
+                for assign in vbin["station_assignments"]:
+                    accepted_cargo[assign["sid"]] = {
+                        "station": cargo_data[assign["sid"]]["station"],
+                        "total_weight": assign["weight"],
+                        "total_count": assign["count"]
+                    }
+            # The inter-route pass moves whole stations, so it cannot run on split ones
+            split_stations = sum(len(v["stations"]) for v in vehicle_bins) > len(accepted_cargo)
+        
+        accepted_weight = total_cargo_weight - rejected_weight
+        print(f"✅ Kabul: {total_cargo_count - rejected_count} adet, {accepted_weight:.1f} kg")
+        if rejected_count or rejected_weight:
+            print(f"❌ Red: {rejected_count} adet, {rejected_weight:.1f} kg")
+        
+        initial_routes = len([v for v in vehicle_bins if v.get("stations")])
+        if not split_stations:
+            vehicle_bins = self._inter_route_optimization(ctx, vehicle_bins, accepted_cargo, depot, cost_per_km)
+        active_routes = len([v for v in vehicle_bins if v.get("stations")])
+        if active_routes < initial_routes:
+            print(f"   📊 Rota konsolidasyonu: {initial_routes} → {active_routes} aktif rota")
+        
+        jobs = []
+        for vbin in vehicle_bins:
+            vehicle = vbin["vehicle"]
+            stations_to_visit = vbin["stations"]
+            station_assignments = vbin.get("station_assignments", [])
+            
+            if not stations_to_visit:
+                continue
+            
+            assignment_lookup = {}
+            for assign in station_assignments:
+                sid = assign["sid"]
+                if sid not in assignment_lookup:
+                    assignment_lookup[sid] = {"weight": 0, "count": 0, "is_partial": False}
+                assignment_lookup[sid]["weight"] += assign["weight"]
+                assignment_lookup[sid]["count"] += assign["count"]
+                if assign.get("is_partial"):
+                    assignment_lookup[sid]["is_partial"] = True
+            
+            # Stations moved by the inter-route pass carry their accepted cargo
+            loads = {}
+            for sid in stations_to_visit:
+                loads[sid] = assignment_lookup.get(sid) or {
+                    "weight": accepted_cargo[sid]["total_weight"],
+                    "count": accepted_cargo[sid]["total_count"],
+                    "is_partial": accepted_cargo[sid]["total_weight"] < cargo_data[sid]["total_weight"] - 1e-9
+                }
+            jobs.append((vehicle, loads))
+        
+        final_routes = self._build_routes(
+            ctx, cargo_data, depot, jobs, cost_per_km, 0, f"limited_{optimization_mode}"
+        )
+        return final_routes, rejected_count, rejected_weight, rejected_requests
+    
+    def _evaluate_limited_configuration(self, ctx: SolverContext, cargo_data: Dict, depot: Location,
+                                        num_clusters: int, vehicles_sorted: List, cost_per_km: float) -> tuple:
+        # (cost, clusters, capacity_aware); clusters is None when no split fits the fleet
+        station_ids = list(cargo_data.keys())
+        test_clusters = self._create_clusters(ctx, cargo_data, depot, num_clusters, station_ids.copy())
+        
+        test_clusters_sorted = sorted(test_clusters, key=lambda x: x["total_weight"], reverse=True)
+        all_fit = True
+        for i, cluster in enumerate(test_clusters_sorted):
+            if i < len(vehicles_sorted):
+                if cluster["total_weight"] > vehicles_sorted[i].capacity:
+                    all_fit = False
+                    break
+        
+        if not all_fit:
+            test_clusters = self._create_capacity_aware_clusters(
+                ctx, cargo_data, depot, num_clusters, vehicles_sorted
+            )
+            if test_clusters is None:
+                return float('inf'), None, True
+        
+        test_cost = 0
+        for cluster in test_clusters:
+            route_dist = self._calculate_cluster_route_distance(ctx, cluster, cargo_data, depot)
+            test_cost += route_dist * cost_per_km
+        
+        return test_cost, test_clusters, not all_fit
+    
+    def _sweep_workers(self, num_stations: int) -> int:
+        # Shipping the problem to the workers costs more than a small day's
+        # whole sweep
+        if num_stations < self.parallel_min_stations:
+            return 1
+        return max(1, self.max_workers)
+    
+    def _assign_by_geographic_clustering(self, ctx: SolverContext, cargo_data: Dict, depot: Location, 
+                                          existing_vehicles: List, cost_per_km: float) -> List[Dict]:
+        num_vehicles = len(existing_vehicles)
+        station_ids = list(cargo_data.keys())
+        total_cargo_weight = sum(c["total_weight"] for c in cargo_data.values())
+        
+        vehicles_sorted = sorted(existing_vehicles, key=lambda v: v.capacity, reverse=True)
+        max_vehicle_capacity = vehicles_sorted[0].capacity if vehicles_sorted else 0
+        
+        min_clusters = max(1, int((total_cargo_weight + max_vehicle_capacity - 1) / max_vehicle_capacity))
+        max_clusters = min(num_vehicles, len(station_ids))
+        
+        best_clusters = None
+        best_cost = float('inf')
+        best_cluster_count = min_clusters
+        
+        print(f"   🔍 Sınırlı Araç: {min_clusters} - {max_clusters} küme deneniyor...")
+        
+        problem = SweepProblem(ctx, depot, cargo_data, vehicles_sorted)
+        configs = list(range(min_clusters, max_clusters + 1))
+        results = evaluate_configurations(
+            _evaluate_limited_configuration, problem,
+            [(n, cost_per_km) for n in configs],
+            self._sweep_workers(len(station_ids))
+        )
+        
+        for num_clusters, (test_cost, test_clusters, capacity_aware) in zip(configs, results):
+            if capacity_aware:
+                print(f"      ⚠️ {num_clusters} küme (k-means): Kapasite aşımı - alternatif deneniyor...")
+                if test_clusters is None:
+                    print(f"      ❌ {num_clusters} küme: Kapasite-duyarlı kümeleme de başarısız - atlandı")
+                    continue
+                else:
+                    print(f"      ✅ {num_clusters} küme: Kapasite-duyarlı kümeleme başarılı!")
+            
+            print(f"      📊 {num_clusters} küme: Tahmini maliyet = {test_cost:.2f} birim")
+            
+            if test_cost < best_cost:
+                best_cost = test_cost
+                best_clusters = test_clusters
+                best_cluster_count = num_clusters
+        
+        if best_clusters is None:
+            best_clusters = self._create_clusters(ctx, cargo_data, depot, num_vehicles, station_ids.copy())
+            best_cluster_count = num_vehicles
+        
+        print(f"   🚚 Sınırlı Araç Optimizasyonu: {best_cluster_count} araç (mevcut: {num_vehicles}), Tahmini: {best_cost:.2f} birim")
+        
+        clusters = best_clusters
+        clusters.sort(key=lambda x: x["total_weight"], reverse=True)
+        
+        vehicle_bins = []
+        for i, vehicle in enumerate(vehicles_sorted):
+            if i < len(clusters):
+                cluster = clusters[i]
+                cluster_weight = cluster["total_weight"]
+                
+                if cluster_weight <= vehicle.capacity:
+                    station_list = list(cluster["stations"])
+                    station_assignments = []
+                    for sid in station_list:
+                        station_assignments.append({
+                            "sid": sid,
+                            "weight": cargo_data[sid]["total_weight"],
+                            "count": cargo_data[sid]["total_count"]
+                        })
+                    
+                    vehicle_bins.append({
+                        "vehicle": vehicle,
+                        "stations": station_list,
+                        "station_assignments": station_assignments,
+                        "remaining_capacity": vehicle.capacity - cluster_weight,
+                        "total_weight": cluster_weight,
+                        "total_count": sum(cargo_data[sid]["total_count"] for sid in cluster["stations"])
+                    })
+                else:
+                    assigned_weight = 0
+                    assigned_stations = []
+                    station_assignments = []
+                    for sid in cluster["stations"]:
+                        if assigned_weight + cargo_data[sid]["total_weight"] <= vehicle.capacity:
+                            assigned_stations.append(sid)
+                            station_assignments.append({
+                                "sid": sid,
+                                "weight": cargo_data[sid]["total_weight"],
+                                "count": cargo_data[sid]["total_count"]
+                            })
+                            assigned_weight += cargo_data[sid]["total_weight"]
+                    
+                    vehicle_bins.append({
+                        "vehicle": vehicle,
+                        "stations": assigned_stations,
+                        "station_assignments": station_assignments,
+                        "remaining_capacity": vehicle.capacity - assigned_weight,
+                        "total_weight": assigned_weight,
+                        "total_count": sum(cargo_data[sid]["total_count"] for sid in assigned_stations)
+                    })
+            else:
+                vehicle_bins.append({
+                    "vehicle": vehicle,
+                    "stations": [],
+                    "station_assignments": [],
+                    "remaining_capacity": vehicle.capacity,
+                    "total_weight": 0,
+                    "total_count": 0
+                })
+        
+        return vehicle_bins
+    
+    def _assign_by_knapsack(self, cargo_data: Dict, demands: List[Demand], existing_vehicles: List,
+                            optimization_mode: str) -> tuple:
+        # Requests, not stations, are accepted or rejected: a station whose
+        # cargo does not fit on one vehicle is split between vehicles or
+        # partly left behind.
+        vehicles = sorted(existing_vehicles, key=lambda x: -x.capacity)
+        weights = [d.weight for d in demands]
+        values = cargo_values(weights, [d.count for d in demands], optimization_mode)
+        if optimization_mode == "max_count":
+            print(f"   📊 max_count modu: Kargo sayısı en çoklanıyor ({len(demands)} talep)")
+        else:
+            print(f"   📊 max_weight modu: Kargo ağırlığı en çoklanıyor ({len(demands)} talep)")
+        
+        chosen, rejected = multi_knapsack(
+            weights, values, [v.capacity for v in vehicles], self.knapsack_time_ms
+        )
+        
+        vehicle_bins = []
+        for vehicle, items in zip(vehicles, chosen):
+            per_station = {}
+            for i in items:
+                sid = demands[i].station.id
+                if sid not in per_station:
+                    per_station[sid] = {"sid": sid, "weight": 0.0, "count": 0}
+                per_station[sid]["weight"] += demands[i].weight
+                per_station[sid]["count"] += demands[i].count
+            for assign in per_station.values():
+                assign["is_partial"] = assign["weight"] < cargo_data[assign["sid"]]["total_weight"] - 1e-9
+            load = sum(a["weight"] for a in per_station.values())
+            vehicle_bins.append({
+                "vehicle": vehicle,
+                "stations": list(per_station.keys()),
+                "station_assignments": list(per_station.values()),
+                "remaining_capacity": vehicle.capacity - load,
+                "total_weight": load,
+                "total_count": sum(a["count"] for a in per_station.values())
+            })
+            print(f"      ✅ {vehicle.name}: {len(items)} talep, {load:.1f} / {vehicle.capacity:.0f} kg")
+        
+        rejected_count = sum(demands[i].count for i in rejected)
+        rejected_weight = sum(demands[i].weight for i in rejected)
+        rejected_requests = [demands[i].request_id for i in rejected if demands[i].request_id is not None]
+        return vehicle_bins, rejected_count, rejected_weight, rejected_requests
+    
+    def _order_stations_nn(self, ctx: SolverContext, stations: List[int], cargo_data: Dict, depot: Location) -> List[int]:
+        if not stations:
+            return []
+        
+        if len(stations) == 1:
+            return stations.copy()
+        
+        farthest_sid = None
+        max_dist = -1
+        for sid in stations:
+            d = self._get_dist(ctx, depot.id, sid)
+            if d > max_dist:
+                max_dist = d
+                farthest_sid = sid
+        
+        # Ties go to the earlier station in the input, as the old linear scan did
+        position = {sid: p for p, sid in enumerate(stations)}
+        index = SpatialIndex([cargo_data[sid]["station"] for sid in stations], ctx.matrix.straight_line)
+        index.remove(farthest_sid)
+        ordered = [farthest_sid]
+        current_id = farthest_sid
+        
+        while len(ordered) < len(stations):
+            best = None
+            best_score = float('inf')
+            # score >= 0.9 * d(current, s) - 0.1 * d(current, depot) by the
+            # triangle inequality, so rings beyond the best score are skipped.
+            # That needs a symmetric metric; on road tables the index hands
+            # back every station in one ring.
+            current_to_depot = self._get_dist(ctx, current_id, depot.id)
+            
+            for reach, ids in index.rings(current_id):
+                for sid in ids:
+                    dist_from_current = self._get_dist(ctx, current_id, sid)
+                    dist_to_depot = self._get_dist(ctx, sid, depot.id)
+                    
+                    score = dist_from_current - (dist_to_depot * 0.1)
+                    
+                    if score < best_score or (score == best_score and position[sid] < position[best]):
+                        best_score = score
+                        best = sid
+                
+                if best is not None and 0.9 * reach - 0.1 * current_to_depot > best_score:
+                    break
+            
+            ordered.append(best)
+            index.remove(best)
+            current_id = best
+        
+        return ordered
+
+
+# Process-pool entry points for the configuration sweeps. They live at module
+# level so they pickle by reference and rebuild the cargo view from the
+# SweepProblem inside each worker.
+
+def _evaluate_limited_configuration(problem: SweepProblem, args: tuple) -> tuple:
+    num_clusters, cost_per_km = args
+    return VRPSolver()._evaluate_limited_configuration(
+        problem.context(), problem.cargo_data(), problem.depot, num_clusters,
+        problem.vehicles, cost_per_km
+    )
+
+
+def _route_lengths(problem: SweepProblem, station_sets: List[List[int]]) -> List[float]:
+    solver = VRPSolver()
+    ctx = problem.context()
+    cargo_data = problem.cargo_data()
+    return [solver._route_order(ctx, ids, cargo_data, problem.depot)[0] for ids in station_sets]
+
+
+def _sequence_route(problem: SweepProblem, station_ids: List[int]) -> List[int]:
+    return VRPSolver()._sequence_route(problem.context(), problem.cargo_data(), problem.depot, station_ids)
+
+
+def _solve_region(batch: RegionBatch, index: int) -> VRPSolution:
+    return VRPSolver(**batch.solver_settings).solve(batch.problems[index])
@@ -0,0 +1,162 @@
+import sys
+import os
+import argparse
+import contextlib
+import io
+import random
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.solver.local_search import TWO_OPT_ENGINES, tour_length, two_opt, two_opt_batch
+from app.solver.matrix import DistanceMatrix
+from app.solver.problem import Demand, FleetVehicle, Location, VRPProblem
+from app.solver.vrp import VRPSolver
+
+# Offline benchmark of the VRP solver on random days around Kocaeli. No
+# database or routing server is needed: distances are great-circle km.
+# Exits non-zero when an unlimited plan leaves cargo or parcels behind.
+#   python scripts/benchmark_solver.py --stations 100 --requests 400 --alns-ms 1000
+#   python scripts/benchmark_solver.py --stations 20 --requests 60 --seed 2 --zero-share 0.3 --owned 0 --only savings split
+#   python scripts/benchmark_solver.py --two-opt 10 20 40 80 160
+
+DEPOT = Location(0, "Umuttepe", 40.8241, 29.9259)
+FLEET = [("Kamyon 1", 500.0), ("Kamyon 2", 750.0), ("Tır 1", 1000.0)]
+
+# (label, scenario, construction, algorithm)
+CONFIGURATIONS = [
+    ("clusters", "unlimited", "clusters", "greedy"),
+    ("savings", "unlimited", "savings", "greedy"),
+    ("split", "unlimited", "split", "greedy"),
+    ("clusters+alns", "unlimited", "clusters", "alns"),
+    ("savings+alns", "unlimited", "savings", "alns"),
+    ("limited", "limited", "clusters", "greedy"),
+    ("limited+alns", "limited", "clusters", "alns"),
+]
+
+
+def random_demands(num_stations, num_requests, seed, zero_share=0.0):
+    # zero_share of the requests carry no weight (documents), which the
+    # schema allows
+    rnd = random.Random(seed)
+    stations = [
+        Location(i, f"S{i}", 40.65 + rnd.random() * 0.45, 29.35 + rnd.random() * 0.85)
+        for i in range(1, num_stations + 1)
+    ]
+    demands = []
+    for _ in range(num_requests):
+        station = rnd.choice(stations)
+        weight = 0.0 if zero_share and rnd.random() < zero_share else round(rnd.uniform(5, 120), 1)
+        demands.append(Demand(station, weight, rnd.randint(1, 10)))
+    return demands
+
+
+def undelivered(problem, solution):
+    # Stations whose weight or parcel count the routes do not carry in full;
+    # the limited scenario may leave out rejected cargo
+    carried = {}
+    for route in solution.routes:
+        for sid, load in route.loads.items():
+            weight, count = carried.get(sid, (0.0, 0))
+            carried[sid] = (weight + load["weight"], count + load["count"])
+    missing = []
+    for sid, c in problem.cargo_data().items():
+        weight, count = carried.get(sid, (0.0, 0))
+        if abs(weight - c["total_weight"]) > 1e-6 or count != c["total_count"]:
+            missing.append(sid)
+    return missing
+
+
+def run(args):
+    demands = random_demands(args.stations, args.requests, args.seed, args.zero_share)
+    print(f"{args.stations} istasyon, {args.requests} talep, seed {args.seed}, ALNS {args.alns_ms} ms")
+    print(f"{'yöntem':<16}{'süre ms':>10}{'maliyet':>12}{'km':>10}{'rota':>6}{'kiralık':>9}{'kabul kg':>11}{'eksik':>7}")
+    failed = []
+
+    for label, scenario, construction, algorithm in CONFIGURATIONS:
+        if args.only and label not in args.only:
+            continue
+        vehicles = [FleetVehicle(i + 1, name, cap) for i, (name, cap) in enumerate(FLEET)][:args.owned]
+        problem = VRPProblem(
+            DEPOT, demands, vehicles, scenario_type=scenario, construction=construction,
+            algorithm=algorithm, time_limit_ms=args.alns_ms, optimization_mode="max_count",
+            seed=args.seed
+        )
+        solver = VRPSolver(max_workers=args.workers, two_opt_engine=args.two_opt_engine)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            solution = solver.solve(problem)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        rentals = sum(1 for r in solution.routes if r.vehicle.is_rented)
+        weight = sum(r.weight for r in solution.routes)
+        missing = undelivered(problem, solution) if scenario == "unlimited" else []
+        if missing:
+            failed.append(label)
+        print(f"{label:<16}{elapsed:>10.0f}{solution.total_cost:>12.2f}{solution.total_distance:>10.2f}"
+              f"{len(solution.routes):>6}{rentals:>9}{weight:>11.1f}{len(missing):>7}")
+
+    # Every unlimited plan must carry every station's cargo and parcels
+    if failed:
+        sys.exit(f"Eksik teslimat: {', '.join(failed)}")
+
+
+def nearest_neighbor_tour(matrix, m):
+    # Depot 0 and stops 1..m in nearest-neighbour order, the solver's usual start
+    left = set(range(1, m + 1))
+    tour = [0]
+    while left:
+        nxt = min(left, key=lambda j: matrix.dist(tour[-1], j))
+        tour.append(nxt)
+        left.remove(nxt)
+    tour.append(0)
+    return tour
+
+
+def run_two_opt(args):
+    # Scalar (neighbour lists) against batch (all moves as one array) 2-opt
+    # on single routes of each length; auto should switch where batch stops winning
+    rnd = random.Random(args.seed)
+    print(f"2-opt motorları, uzunluk başına {args.repeat} rota, seed {args.seed}")
+    print(f"{'durak':>6}{'scalar ms':>12}{'scalar km':>12}{'batch ms':>12}{'batch km':>12}")
+    for m in args.two_opt:
+        results = {"scalar": [0.0, 0.0], "batch": [0.0, 0.0]}
+        for _ in range(args.repeat):
+            coords = [(DEPOT.latitude, DEPOT.longitude)] + [
+                (40.65 + rnd.random() * 0.45, 29.35 + rnd.random() * 0.85) for _ in range(m)
+            ]
+            matrix = DistanceMatrix.from_coordinates(list(range(m + 1)), coords)
+            start = nearest_neighbor_tour(matrix, m)
+            for name, engine in (("scalar", two_opt), ("batch", two_opt_batch)):
+                tour = list(start)
+                started = time.perf_counter()
+                engine(matrix, tour)
+                results[name][0] += (time.perf_counter() - started) * 1000 / args.repeat
+                results[name][1] += tour_length(matrix, tour) / args.repeat
+        print(f"{m:>6}{results['scalar'][0]:>12.2f}{results['scalar'][1]:>12.1f}"
+              f"{results['batch'][0]:>12.2f}{results['batch'][1]:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline VRP solver benchmark")
+    parser.add_argument("--stations", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--alns-ms", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="Run only these methods")
+    parser.add_argument("--two-opt-engine", choices=TWO_OPT_ENGINES, default="auto")
+    parser.add_argument("--two-opt", type=int, nargs="*", metavar="STOPS",
+                        help="Compare the 2-opt engines on routes of these lengths instead")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--zero-share", type=float, default=0.0,
+                        help="Share of requests without weight")
+    parser.add_argument("--owned", type=int, default=len(FLEET),
+                        help="Owned vehicles to use from the fleet")
+    args = parser.parse_args()
+    if args.two_opt:
+        run_two_opt(args)
+    else:
+        run(args)
@@ -0,0 +1,108 @@
+import sys
+import os
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.solver.matrix import haversine_km, haversine_matrix
+
+# Local stand-in for the OSRM HTTP API (table + route services) so matrices
+# can be built reproducibly in tests and benchmarks without the public
+# server. Distances are great-circle km scaled by a fixed road factor.
+# Point config.json -> routing.osrm_base_url at http://127.0.0.1:<port>.
+
+ROAD_FACTOR = 1.3
+
+
+def parse_coords(coord_str):
+    coords = []
+    for pair in unquote(coord_str).split(";"):
+        lon, lat = pair.split(",")
+        coords.append((float(lat), float(lon)))
+    return coords
+
+
+def parse_index_list(query, name, default):
+    values = query.get(name)
+    if not values or values[0] == "all":
+        return default
+    return [int(v) for v in unquote(values[0]).split(";")]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    max_table_size = 100
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if len(parts) != 4 or parts[1] != "v1":
+            return self._send({"code": "InvalidUrl"}, 400)
+
+        service, coord_str = parts[0], parts[3]
+        try:
+            coords = parse_coords(coord_str)
+        except ValueError:
+            return self._send({"code": "InvalidQuery"}, 400)
+
+        query = parse_qs(url.query)
+        if service == "table":
+            return self._table(coords, query)
+        if service == "route":
+            return self._route(coords)
+        return self._send({"code": "InvalidService"}, 400)
+
+    def _table(self, coords, query):
+        if len(coords) > self.max_table_size:
+            return self._send({"code": "TooBig", "message": "Too many table coordinates"}, 400)
+
+        everything = list(range(len(coords)))
+        sources = parse_index_list(query, "sources", everything)
+        destinations = parse_index_list(query, "destinations", everything)
+
+        matrix = haversine_matrix(coords) * (ROAD_FACTOR * 1000)
+        distances = [[round(float(matrix[i, j]), 1) for j in destinations] for i in sources]
+        return self._send({"code": "Ok", "distances": distances})
+
+    def _route(self, coords):
+        if len(coords) < 2:
+            return self._send({"code": "InvalidQuery"}, 400)
+        distance = 0.0
+        for (lat1, lon1), (lat2, lon2) in zip(coords, coords[1:]):
+            distance += haversine_km(lat1, lon1, lat2, lon2) * ROAD_FACTOR * 1000
+        return self._send({"code": "Ok", "routes": [{"distance": round(distance, 1)}]})
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=5001, max_table_size=100):
+    StandInHandler.max_table_size = max_table_size
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    print(f"OSRM stand-in listening on http://{host}:{port} (max table size {max_table_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OSRM stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--max-table-size", type=int, default=100)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_table_size)